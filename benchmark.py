@@ -0,0 +1,834 @@
+# benchmark (offline, against fake_reddit.py)
+# a) Connection reuse: per-request connections vs the pooled Transport
+#    python benchmark.py transport --requests 500 --connect-latency 0.02
+# b) Rate limiting: fixed --delay pacing vs header-driven AdaptiveLimiter
+#    python benchmark.py ratelimit --ratelimit 30 --window 2 --requests 60
+# c) data_quality_check: legacy json.load loop vs the parallel streaming engine on a synthetic archive
+#    python benchmark.py quality --files 10000 --posts 50
+# d) End-to-end scrape_reddit throughput across target counts, --max-posts and --concurrency
+#    python benchmark.py scrape --targets 4,16 --max-posts 100,500 --concurrency 1,4 --latency 0.01
+#    python benchmark.py scrape --fixtures fixtures/ --apps Uber "Google Drive" --targets 2 --max-posts 100,500
+# e) Listing decode/build: resp.json() + dicts + eager views vs fast decode + Post records on recorded pages
+#    python benchmark.py build --fixtures fixtures/
+# f) Work queue scaling: N worker processes, each with its own --delay budget, draining one SQLite queue
+#    python benchmark.py queue --workers 1,2,4 --targets 64 --delay 0.05
+# g) Request coalescing: every configured target with and without --coalesce under a fixed --delay
+#    python benchmark.py coalesce --coalesce 4 --max-posts 25,150,200 --delay 0.02
+# h) Daemon polling: a fixed cadence for every source vs the adaptive per-source schedule, on live listings
+#    python benchmark.py daemon --duration 60 --live-rate 1 --fixed-interval 20 --poll-target 10
+# i) Historical backfill: one deep listing (cut off at ~1000 posts) vs --backfill time windows at several --concurrency
+#    python benchmark.py backfill --days 14 --concurrency 1,4,8 --latency 0.02
+# j) report.py aggregates: per-dict Python loops vs NumPy group-bys (and the .npz snapshot load) on synthetic posts
+#    python benchmark.py report --posts 2000000 --apps 40
+# k) Near-duplicate titles: near_dupes.py MinHash/LSH clustering vs all-pairs exact Jaccard, with injected cross-posts
+#    python benchmark.py near-dupes --titles 300000 --dup-fraction 0.2 --brute 3000
+# l) Output stage: in-place writes on the fetching thread vs atomic writes, the write-behind thread and --fsync batches
+#    python benchmark.py write --targets 40 --max-posts 1000 --latency 0.005 --fsync 1,8
+# m) OAuth identity pool: throughput vs the number of --oauth identities, each with its own per-window budget
+#    python benchmark.py oauth --identities 1,2,4 --ratelimit 30 --window 2 --token-ttl 4
+
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+import numpy as np
+import requests
+
+try:
+    import orjson
+except ImportError:  # optional: the build benchmark skips its orjson variant without it
+    orjson = None
+
+import data_quality_check as dqc
+import fake_reddit
+import near_dupes
+import report
+import scraper.output
+from scraper.apps import APP_INFO, build_targets
+from scraper.backfill import DEFAULT_BACKFILL_WINDOW_DAYS, backfill
+from scraper.common import derive_title_from_permalink, key_for_app
+from scraper.daemon import run_daemon
+from scraper.listing import normalize_post
+from scraper.metrics import METRICS
+from scraper.oauth import OAUTH_TOKEN_PATH, load_identities
+from scraper.output import OUTPUT_FORMATS, append_views
+from scraper.scrape import run_worker, scrape_reddit
+from scraper.state import STATE_DB_NAME, StateStore
+from scraper.transport import DEFAULT_POOL_SIZE, REDDIT_BASE_URL, UA_BROWSER, get_with_retries, transport_for_delay
+from scraper.workqueue import SqliteWorkQueue
+from scraper.writer import RunWriter
+
+
+def bench_transport(args: argparse.Namespace) -> None:
+    headers = {"User-Agent": UA_BROWSER, "Accept": "application/json"}
+    with fake_reddit.serving(connect_latency=args.connect_latency) as server:
+        url = f"{server.base_url}/r/bench/.json"
+        rows = []
+
+        server.connections = 0
+        t0 = time.perf_counter()
+        for _ in range(args.requests):
+            requests.get(url, headers=headers, params={"limit": 100}, timeout=15).json()
+        rows.append(("requests.get", time.perf_counter() - t0, server.connections))
+
+        transport = transport_for_delay(0.0)
+        server.connections = 0
+        t0 = time.perf_counter()
+        for _ in range(args.requests):
+            transport.get(url, {"limit": 100}).json()
+        rows.append(("Transport (pooled)", time.perf_counter() - t0, server.connections))
+        transport.close()
+
+    print(f"{args.requests} requests, connect latency {args.connect_latency * 1000:.0f} ms")
+    for name, elapsed, conns in rows:
+        print(f"- {name:20} {elapsed:7.3f}s  {elapsed / args.requests * 1000:6.2f} ms/req  connections={conns}")
+    print(f"- speedup: {rows[0][1] / rows[1][1]:.2f}x")
+
+
+def bench_ratelimit(args: argparse.Namespace) -> None:
+    rows = []
+    for name, adaptive in (("fixed --delay", False), ("adaptive", True)):
+        with fake_reddit.serving(ratelimit=args.ratelimit, ratelimit_window=args.window) as server:
+            url = f"{server.base_url}/r/bench/.json"
+            transport = transport_for_delay(args.delay, adaptive=adaptive)
+            try:
+                t0 = time.perf_counter()
+                for _ in range(args.requests):
+                    get_with_retries(transport, url, {"limit": 100}, "r/bench", args.delay)
+                rows.append((name, time.perf_counter() - t0, server.throttled))
+            finally:
+                transport.close()
+
+    print(f"{args.requests} requests, budget {args.ratelimit} per {args.window:g}s, --delay {args.delay:g}s")
+    for name, elapsed, throttled in rows:
+        print(f"- {name:14} {elapsed:7.2f}s  {args.requests / elapsed:6.2f} req/s  429s={throttled}")
+    print(f"- allowed rate: {args.ratelimit / args.window:.2f} req/s")
+
+
+def synthetic_archive(root: str, n_files: int, posts_per_file: int, seed: int = 7) -> list[str]:
+    """Write n_files legacy <app>_topics.json files; ~5% of URLs repeat across or within files."""
+    rng = random.Random(seed)
+    files = []
+    for i in range(n_files):
+        app_key = f"app{i:05d}"
+        posts = []
+        for j in range(posts_per_file):
+            n = rng.randrange(i * posts_per_file) if i and rng.random() < 0.05 else i * posts_per_file + j
+            posts.append({
+                "title": f"post {n}" if rng.random() > 0.01 else "", "url": f"https://www.reddit.com/r/x/comments/{n:x}/",
+                "score": rng.randrange(500), "num_comments": rng.randrange(80), "created_utc": 1.7e9 - n,
+                "author": f"u{n % 977}" if rng.random() > 0.02 else None, "subreddit": "x",
+                "subreddit_name_prefixed": "r/x", "id": f"{n:x}",
+            })
+        topics, discussions = [], []
+        append_views(app_key, posts, topics, discussions, set())
+        data = {"app_key": app_key, "category": f"Cat{i % 5}", key_for_app(app_key): topics,
+                "discussions": discussions, "posts": posts}
+        fp = os.path.join(root, f"Cat{i % 5}", f"{app_key}_topics.json")
+        os.makedirs(os.path.dirname(fp), exist_ok=True)
+        with open(fp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=True)
+        files.append(fp)
+    return sorted(files)
+
+def legacy_quality_check(files: list[str]) -> tuple[list[tuple], int, int]:
+    """The original data_quality_check loop: json.load every file and keep every URL in one list."""
+    rows, global_urls = [], []
+    for fp in files:
+        with open(fp, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        posts = data.get("posts", [])
+        discussions = data.get("discussions", [])
+        topic_lists = [v for k, v in data.items() if k.endswith("_topics") and isinstance(v, list)]
+        topics = topic_lists[0] if topic_lists else []
+        urls = [p.get("url") for p in posts if p.get("url")]
+        rows.append((
+            data.get("app_key", "unknown"), len(posts), len(urls) - len(set(urls)),
+            sum(1 for p in posts if not (p.get("title") or "").strip()),
+            sum(1 for p in posts if not p.get("author")),
+            len(posts) == len(topics) == len(discussions),
+        ))
+        global_urls.extend(urls)
+    dedup_bytes = sys.getsizeof(global_urls) + sum(sys.getsizeof(u) for u in global_urls)
+    return rows, len(global_urls) - len(set(global_urls)), dedup_bytes
+
+def bench_quality(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        t0 = time.perf_counter()
+        files = synthetic_archive(root, args.files, args.posts)
+        print(f"Generated {len(files)} files x {args.posts} posts in {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        legacy_rows, legacy_dups, legacy_bytes = legacy_quality_check(files)
+        legacy_elapsed = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        dedup = dqc.GlobalDedup(args.bloom_error_rate, max(1, args.files * args.posts))
+        rows = []
+        for r in dqc.iter_reports(files, args.workers):
+            rows.append((r["app"], r["posts"], r["dup_in_file"], r["empty_titles"], r["missing_authors"], r["shape_ok"]))
+            dedup.add(r["url_hashes"])
+        dups = dedup.duplicates()
+        elapsed = time.perf_counter() - t0
+        dedup_bytes = len(dedup.bloom.bits) if dedup.bloom else dedup.hashes.buffer_info()[1] * dedup.hashes.itemsize
+
+    print(f"- legacy            {legacy_elapsed:7.2f}s  global_dups={legacy_dups}  dedup_index={legacy_bytes / 1e6:7.1f} MB")
+    print(f"- streaming x{args.workers:<3}     {elapsed:7.2f}s  global_dups={dups}  dedup_index={dedup_bytes / 1e6:7.1f} MB")
+    print(f"- speedup: {legacy_elapsed / elapsed:.2f}x")
+    assert rows == legacy_rows, "the streaming engine's per-file results differ from the legacy loop's"
+    assert dups == legacy_dups or args.bloom_error_rate, "global duplicate counts differ"
+
+
+def bench_targets(n: int) -> dict[str, dict]:
+    """Synthetic targets for the fake server, alternating subreddit listings and searches."""
+    return {f"bench{i:04d}": dict({"sub": f"bench{i:04d}"} if i % 2 == 0 else {"search": f"bench query {i}"},
+                                  category="Bench") for i in range(n)}
+
+def run_scrape_case(base_url: str, apps: list[str], n_targets: int, max_posts: int, concurrency: int,
+                    fmt: str) -> dict:
+    """One scrape_reddit run writing to a temp dir; runs in a fresh process so peak RSS is per case."""
+    if not apps:
+        targets = bench_targets(n_targets)
+        APP_INFO.update(targets)
+        apps = list(targets)
+    METRICS.reset()
+    transport = transport_for_delay(0.0, max(DEFAULT_POOL_SIZE, concurrency), base_url=base_url)
+    with tempfile.TemporaryDirectory() as outdir, open(os.devnull, "w") as devnull:
+        writer = RunWriter(outdir, fmt=fmt)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            scrape_reddit(apps, [], max_posts, 0.0, concurrency, transport, sink=writer)
+        elapsed = time.perf_counter() - t0
+    transport.close()
+    stages = METRICS.snapshot()["stages"]
+    return {
+        "completed": writer.targets, "posts": writer.posts, "pages": stages.get("parse", {}).get("calls", 0),
+        "elapsed": elapsed, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        **{f"{stage}_s": stages.get(stage, {}).get("wall_seconds", 0.0)
+           for stage in ("network", "parse", "build", "write")},
+    }
+
+def int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def bench_scrape(args: argparse.Namespace) -> int:
+    spawn = multiprocessing.get_context("spawn")
+    results = []
+    for n_targets in args.targets:
+        apps = args.apps[:n_targets] if args.apps else []
+        for max_posts in args.max_posts:
+            for concurrency in args.concurrency:
+                with fake_reddit.serving(
+                        listing_size=args.listing_size, fixtures=args.fixtures, latency=args.latency,
+                        error_rate=args.error_rate, burst_every=args.burst_every, burst_length=args.burst_length,
+                        retry_after=args.retry_after, seed=args.seed) as server, \
+                        ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    row = pool.submit(run_scrape_case, server.base_url, apps, n_targets, max_posts,
+                                      concurrency, args.format).result()
+                row.update(targets=len(apps) if apps else n_targets, max_posts=max_posts, concurrency=concurrency, requests=server.requests,
+                           throttled=server.throttled, errors=server.errors)
+                row["pages_per_s"] = row["pages"] / row["elapsed"]
+                row["posts_per_s"] = row["posts"] / row["elapsed"]
+                results.append(row)
+                print(f"- targets={row['targets']:<4} max_posts={max_posts:<5} concurrency={concurrency:<3} "
+                      f"{row['elapsed']:7.2f}s  {row['pages_per_s']:7.1f} pages/s  {row['posts_per_s']:8.0f} posts/s  "
+                      f"rss={row['peak_rss_mb']:6.1f} MB  network={row['network_s']:.2f}s parse={row['parse_s']:.2f}s "
+                      f"build={row['build_s']:.2f}s write={row['write_s']:.2f}s  429s={row['throttled']} 5xx={row['errors']}"
+                      + ("" if row["completed"] == row["targets"] else f"  FAILED={row['targets'] - row['completed']}"))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if not args.baseline: return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = {(r["targets"], r["max_posts"], r["concurrency"]): r for r in json.load(f)}
+    regressions = 0
+    for row in results:
+        base = baseline.get((row["targets"], row["max_posts"], row["concurrency"]))
+        if base and row["posts_per_s"] < base["posts_per_s"] * (1 - args.tolerance):
+            regressions += 1
+            print(f"REGRESSION targets={row['targets']} max_posts={row['max_posts']} "
+                  f"concurrency={row['concurrency']}: {row['posts_per_s']:.0f} posts/s "
+                  f"vs baseline {base['posts_per_s']:.0f}")
+    return 1 if regressions else 0
+
+
+def reddit_like_page(source: str, start: int, size: int) -> bytes:
+    """A listing page whose children carry the ~100 fields a real t3 object has, not just the ones we keep."""
+    children = []
+    for n in range(start, start + size):
+        child = fake_reddit.synthetic_post(source, n)
+        d = child["data"]
+        d.update({f"extra_{k}": None if k % 3 == 0 else (f"value {n} {k}" if k % 3 == 1 else k * n) for k in range(60)})
+        d.update({
+            "selftext": f"body text of post {n} " * 8, "thumbnail": "self", "over_18": False, "stickied": False,
+            "link_flair_richtext": [{"e": "text", "t": "Question"}], "all_awardings": [],
+            "preview": {"images": [{"source": {"url": f"https://i.redd.it/{n}.jpg", "width": 640, "height": 480},
+                                    "resolutions": [{"url": f"https://i.redd.it/{n}_{w}.jpg", "width": w}
+                                                    for w in (108, 216, 320)]}], "enabled": True},
+            "media_embed": {}, "secure_media": None, "gildings": {}, "upvote_ratio": 0.97,
+        })
+        children.append(child)
+    return json.dumps({"kind": "Listing", "data": {"after": None, "children": children}}).encode("utf-8")
+
+def load_listing_pages(fixtures: str | None, n_pages: int) -> list[bytes]:
+    if not fixtures:
+        return [reddit_like_page("bench", i * 100, 100) for i in range(n_pages)]
+    pages = []
+    for body in fake_reddit.load_fixtures(fixtures).values():
+        if isinstance(body, dict) and body.get("data", {}).get("children"):
+            pages.append(json.dumps(body).encode("utf-8"))
+    return pages
+
+def legacy_build(pages: list[bytes]) -> tuple:
+    """The pre-Post path: requests' resp.json() (text decode + json), a dict per post, eager topic/discussion copies."""
+    posts, topics, discussions, seen = [], [], [], set()
+    for raw in pages:
+        payload = json.loads(raw.decode("utf-8"))
+        page = []
+        for child in payload.get("data", {}).get("children", []):
+            d = child.get("data") or {}
+            permalink = urljoin(REDDIT_BASE_URL, d.get("permalink", ""))
+            page.append({
+                "title": d.get("title") or derive_title_from_permalink(permalink), "url": permalink,
+                "score": d.get("score"), "num_comments": d.get("num_comments"), "created_utc": d.get("created_utc"),
+                "author": d.get("author"), "subreddit": d.get("subreddit"),
+                "subreddit_name_prefixed": d.get("subreddit_name_prefixed"), "id": d.get("id"),
+            })
+        posts.extend(page)
+        append_views("bench", page, topics, discussions, seen)
+    return posts, topics, discussions
+
+def compact_build(pages: list[bytes], decode) -> list:
+    posts = []
+    for raw in pages:
+        payload = decode(raw)
+        posts.extend(normalize_post(child.get("data") or {}) for child in payload.get("data", {}).get("children", []))
+    return posts
+
+def timed_cpu(build, pages: list[bytes]) -> float:
+    t0 = time.process_time()
+    build(pages)
+    return time.process_time() - t0
+
+def bench_build(args: argparse.Namespace) -> None:
+    pages = load_listing_pages(args.fixtures, args.pages)
+    if not pages:
+        print(f"No listing pages found in {args.fixtures}"); return
+    variants = [("resp.json + dict + views", legacy_build), ("json + Post", lambda p: compact_build(p, json.loads))]
+    if orjson is not None:
+        variants.append(("orjson + Post", lambda p: compact_build(p, orjson.loads)))
+    n_posts = len(compact_build(pages, json.loads))
+    print(f"{len(pages)} pages, {n_posts} posts, {sum(map(len, pages)) / 1e6:.1f} MB of listing JSON")
+    baseline = None
+    for name, build in variants:
+        cpu = min(timed_cpu(build, pages) for _ in range(args.repeat))
+        tracemalloc.start()
+        kept = build(pages)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        baseline = baseline or cpu
+        print(f"- {name:26} {cpu / len(pages) * 1000:7.3f} ms/page CPU  retained={retained / 1e6:6.1f} MB "
+              f"({retained / max(1, n_posts):5.0f} B/post)  peak={peak / 1e6:6.1f} MB  speedup={baseline / cpu:.2f}x")
+
+
+def run_queue_worker(queue_path: str, base_url: str, outdir: str, max_posts: int, delay: float) -> int:
+    """One worker process with its own transport (and so its own rate budget) on the shared queue."""
+    queue = SqliteWorkQueue(queue_path)
+    transport = transport_for_delay(delay, base_url=base_url)
+    writer = RunWriter(outdir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return run_worker(queue, max_posts, delay, 1, transport, sink=writer)
+    finally:
+        transport.close()
+        queue.close()
+
+def bench_queue(args: argparse.Namespace) -> None:
+    spawn = multiprocessing.get_context("spawn")
+    rows = []
+    with fake_reddit.serving(latency=args.latency) as server:
+        for n_workers in args.workers:
+            with tempfile.TemporaryDirectory() as root:
+                queue_path = os.path.join(root, "queue.db")
+                queue = SqliteWorkQueue(queue_path)
+                queue.enqueue(list(bench_targets(args.targets).items()))
+                with ProcessPoolExecutor(max_workers=n_workers, mp_context=spawn) as pool:
+                    # Start (and import in) every worker process first so only the draining is timed.
+                    list(pool.map(time.sleep, [0.5] * n_workers))
+                    t0 = time.perf_counter()
+                    done = [f.result() for f in [pool.submit(run_queue_worker, queue_path, server.base_url,
+                                                             os.path.join(root, "out"), args.max_posts, args.delay)
+                                                 for _ in range(n_workers)]]
+                    elapsed = time.perf_counter() - t0
+                files = sum(len(names) for _, _, names in os.walk(os.path.join(root, "out")) if names)
+                rows.append((n_workers, elapsed, sum(done), queue.counts(), files))
+                queue.close()
+
+    print(f"{args.targets} targets x {args.max_posts} posts, --delay {args.delay:g}s per worker")
+    for n_workers, elapsed, done, counts, files in rows:
+        print(f"- {n_workers:2} workers {elapsed:7.2f}s  {done / elapsed:6.2f} targets/s  speedup={rows[0][1] / elapsed:5.2f}x  "
+              f"completed={done} queue={counts} output_files={files}")
+
+
+def bench_coalesce(args: argparse.Namespace) -> None:
+    print(f"{len(build_targets([], []))} targets, --delay {args.delay:g}s, group size {args.coalesce}")
+    with fake_reddit.serving(listing_size=args.listing_size) as server:
+        for max_posts in args.max_posts:
+            rows = []
+            for coalesce in (1, args.coalesce):
+                collected = {}
+                sink = lambda result: collected.__setitem__(result["app_key"], [p.get("id") for p in result["posts"]])
+                transport = transport_for_delay(args.delay, base_url=server.base_url)
+                server.requests = 0
+                t0 = time.perf_counter()
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    scrape_reddit([], [], max_posts, args.delay, 1, transport, sink=sink, coalesce=coalesce)
+                rows.append((coalesce, time.perf_counter() - t0, server.requests, collected))
+                transport.close()
+            for coalesce, elapsed, n_requests, collected in rows:
+                print(f"- max_posts={max_posts:<5} coalesce={coalesce:<3} {elapsed:7.2f}s  requests={n_requests:<5} "
+                      f"posts={sum(map(len, collected.values()))}")
+            print(f"  requests saved: {1 - rows[1][2] / rows[0][2]:.0%}")
+            assert rows[0][3] == rows[1][3], f"coalesced crawl returned different posts at max_posts={max_posts}"
+
+
+def run_daemon_case(server: fake_reddit.FakeRedditServer, targets: list[tuple[str, dict]], args: argparse.Namespace,
+                    min_interval: float, max_interval: float) -> dict:
+    captured = []
+    sink = lambda result: captured.append((time.time(), [p.get("created_utc") for p in result["posts"]]))
+    with tempfile.TemporaryDirectory() as root, open(os.devnull, "w") as devnull:
+        state = StateStore(os.path.join(root, STATE_DB_NAME))
+        transport = transport_for_delay(args.delay, base_url=server.base_url)
+        stop = threading.Timer(args.duration, lambda: None)
+        stop.start()
+        requests_before, start = server.requests, time.time()
+        with contextlib.redirect_stdout(devnull):
+            polls = run_daemon(targets, args.max_posts, args.delay, transport, state, sink,
+                                  poll_target=args.poll_target, min_interval=min_interval,
+                                  max_interval=max_interval, stop=stop.finished)
+        end = time.time()
+        transport.close()
+        state.close()
+    # Only posts created while the daemon ran count; the first poll of each source is backlog.
+    lags = sorted(at - created for at, times in captured for created in times if created >= start)
+    sources = [info["sub"] if "sub" in info else f"search:{info['search']}" for _, info in targets]
+    produced = sum(int((end - server.started) * rate) - int((start - server.started) * rate)
+                   for rate in (fake_reddit.source_rate(source, args.live_rate) for source in sources))
+    return {"polls": polls, "requests": server.requests - requests_before, "new_posts": len(lags),
+            "produced": produced, "mean_lag": sum(lags) / len(lags) if lags else 0.0,
+            "p95_lag": lags[int(len(lags) * 0.95)] if lags else 0.0}
+
+def bench_daemon(args: argparse.Namespace) -> None:
+    targets = build_targets([], [])
+    print(f"{len(targets)} live sources ({args.live_rate:g} .. {args.live_rate / 128:g} posts/s), "
+          f"{args.duration:g}s per case, --delay {args.delay:g}s")
+    with fake_reddit.serving(live_rate=args.live_rate) as server:
+        cases = [(f"fixed {args.fixed_interval:g}s", args.fixed_interval, args.fixed_interval),
+                 (f"adaptive {args.min_interval:g}..{args.max_interval:g}s", args.min_interval, args.max_interval)]
+        for label, min_interval, max_interval in cases:
+            r = run_daemon_case(server, targets, args, min_interval, max_interval)
+            # The first round (one request per source) is the same backlog crawl in both cases.
+            polling = max(r["requests"] - len(targets), 1)
+            print(f"- {label:<18} polls={r['polls']:<5} requests={r['requests']:<5} "
+                  f"new posts={r['new_posts']}/{r['produced']}  per request={r['new_posts'] / polling:5.2f}  "
+                  f"lag mean={r['mean_lag']:5.1f}s p95={r['p95_lag']:5.1f}s")
+
+
+def bench_backfill(args: argparse.Namespace) -> None:
+    end = int(fake_reddit.SYNTHETIC_NEWEST_UTC)
+    start = end - int(args.days * 86400)
+    targets = bench_targets(args.targets)
+    APP_INFO.update(targets)
+    expected = sum(1 for n in range(fake_reddit.HISTORY_POSTS)
+                   if start <= fake_reddit.SYNTHETIC_NEWEST_UTC - n * fake_reddit.SYNTHETIC_SPACING_SECONDS < end)
+    print(f"{len(targets)} targets x {args.days:g} days ({expected} posts each), latency {args.latency:g}s")
+    with fake_reddit.serving(latency=args.latency) as server:
+        cases = [("listing", 1)] + [("backfill", c) for c in args.concurrency]
+        for mode, concurrency in cases:
+            transport = transport_for_delay(0.0, max(DEFAULT_POOL_SIZE, concurrency), base_url=server.base_url)
+            server.requests = 0
+            t0 = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                if mode == "listing":
+                    results = scrape_reddit(list(targets), [], expected, 0.0, 1, transport)
+                else:
+                    results = backfill(list(targets.items()), start, end, args.window_days * 86400, 0.0,
+                                       concurrency, transport)
+            elapsed = time.perf_counter() - t0
+            transport.close()
+            complete = sum(len({p.get("id") for p in r["posts"]}) == expected for r in results)
+            posts = sum(len(r["posts"]) for r in results)
+            print(f"- {mode:<8} concurrency={concurrency:<3} {elapsed:7.2f}s  requests={server.requests:<5} "
+                  f"posts={posts:<7} complete targets={complete}/{len(targets)}")
+
+
+def read_while_writing(outdir: str, stop: threading.Event, counts: dict) -> None:
+    """A concurrent reader: keep parsing every saved JSON file and count the ones caught half-written."""
+    while not stop.is_set():
+        for fp in glob.glob(os.path.join(outdir, "**", "*_topics.json"), recursive=True):
+            try:
+                with open(fp, "r", encoding="utf-8") as f:
+                    json.load(f)
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                counts["torn"] += 1
+            counts["reads"] += 1
+
+def bench_write(args: argparse.Namespace) -> None:
+    targets = bench_targets(args.targets)
+    APP_INFO.update(targets)
+    cases = [("in place, inline", 0, 0), ("atomic, inline", 0, 0), (f"write-behind x{args.write_queue}", args.write_queue, 0)]
+    cases += [(f"write-behind, --fsync {n}", args.write_queue, n) for n in args.fsync]
+    print(f"{len(targets)} targets x {args.max_posts} posts, json output, latency {args.latency:g}s, concurrency 1")
+    atomic_output = scraper.output.atomic_output
+    with fake_reddit.serving(latency=args.latency) as server:
+        try:
+            for name, write_queue, fsync_every in cases:
+                # The pre-atomic behaviour: write straight into the final path.
+                scraper.output.atomic_output = contextlib.nullcontext if name.startswith("in place") else atomic_output
+                METRICS.reset()
+                transport = transport_for_delay(0.0, DEFAULT_POOL_SIZE, base_url=server.base_url)
+                counts, stop = {"reads": 0, "torn": 0}, threading.Event()
+                with tempfile.TemporaryDirectory() as outdir, open(os.devnull, "w") as devnull:
+                    reader = threading.Thread(target=read_while_writing, args=(outdir, stop, counts), daemon=True)
+                    reader.start()
+                    writer = RunWriter(outdir, write_queue=write_queue, fsync_every=fsync_every)
+                    t0 = time.perf_counter()
+                    with contextlib.redirect_stdout(devnull):
+                        scrape_reddit(list(targets), [], args.max_posts, 0.0, 1, transport, sink=writer)
+                        writer.close()
+                    elapsed = time.perf_counter() - t0
+                    stop.set()
+                    reader.join()
+                transport.close()
+                stages = METRICS.snapshot()["stages"]
+                print(f"- {name:<24} {elapsed:7.2f}s  write {stages.get('write', {}).get('wall_seconds', 0):6.2f}s  "
+                      f"fetchers waiting on the queue {stages.get('write_wait', {}).get('wall_seconds', 0):6.2f}s  "
+                      f"posts={writer.posts}  torn reads {counts['torn']}/{counts['reads']}")
+        finally:
+            scraper.output.atomic_output = atomic_output
+
+
+def bench_oauth(args: argparse.Namespace) -> None:
+    targets = bench_targets(args.targets)
+    APP_INFO.update(targets)
+    print(f"{len(targets)} targets x {args.max_posts} posts, budget {args.ratelimit} per {args.window:g}s per identity, "
+          f"token ttl {args.token_ttl:g}s, concurrency {args.concurrency}")
+    base = None
+    for n in args.identities:
+        with fake_reddit.serving(oauth_clients=n, token_ttl=args.token_ttl, ratelimit=args.ratelimit,
+                                 ratelimit_window=args.window) as server, tempfile.TemporaryDirectory() as tmp:
+            creds = os.path.join(tmp, "oauth.json")
+            with open(creds, "w", encoding="utf-8") as f:
+                json.dump([{"client_id": f"client{i}", "client_secret": f"secret{i}"} for i in range(n)], f)
+            pool = load_identities(creds, server.base_url + OAUTH_TOKEN_PATH, None, 0.0)
+            transport = transport_for_delay(0.0, max(DEFAULT_POOL_SIZE, args.concurrency),
+                                            base_url=server.base_url, identities=pool)
+            try:
+                t0 = time.perf_counter()
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    results = scrape_reddit(list(targets), [], args.max_posts, 0.0, args.concurrency, transport)
+                elapsed = time.perf_counter() - t0
+            finally:
+                transport.close()
+        posts = sum(len(r["posts"]) for r in results)
+        base = base or server.requests / elapsed
+        spread = "/".join(str(server.client_requests.get(f"client{i}", 0)) for i in range(n))
+        print(f"- {n} identities {elapsed:7.2f}s  {server.requests / elapsed:6.2f} req/s ({server.requests / elapsed / base:.2f}x)  "
+              f"posts={posts}  429s={server.throttled}  tokens issued={server.tokens_issued}  requests per identity {spread}")
+    print(f"- allowed rate: {args.ratelimit / args.window:.2f} req/s per identity")
+
+
+def synthetic_columns(n_posts: int, n_apps: int, n_authors: int, seed: int = 7) -> report.PostColumns:
+    rng = np.random.default_rng(seed)
+    groups = [(f"Category {i % 5}", f"app{i:03d}") for i in range(n_apps)]
+    authors = ["", "[deleted]"] + [f"user{i}" for i in range(n_authors)]
+    created = 1700000000.0 - rng.exponential(30 * 86400, n_posts).round()
+    created[rng.random(n_posts) < 0.001] = np.nan
+    columns = {
+        "group": rng.integers(0, n_apps, n_posts).astype(np.int32),
+        # Zipf-like author activity, so the top-author lists are meaningful.
+        "author": np.minimum(rng.zipf(1.3, n_posts), len(authors) - 1).astype(np.int32),
+        "created_utc": created,
+        "score": rng.zipf(1.8, n_posts).clip(0, 100000).astype(np.int64),
+        "num_comments": rng.poisson(12, n_posts).astype(np.int64),
+    }
+    return report.PostColumns(groups, authors, columns)
+
+def loop_report(posts: list[dict], n_top: int) -> dict:
+    """The per-dict approach: bucket posts in Python, then sort and count each app's lists."""
+    by_app, timeline = {}, {}
+    for p in posts:
+        by_app.setdefault((p["category"], p["app"]), []).append(p)
+        if p["created_utc"] is not None:
+            day = time.strftime("%Y-%m-%d", time.gmtime(p["created_utc"]))
+            timeline[(p["category"], p["app"], day)] = timeline.get((p["category"], p["app"], day), 0) + 1
+    apps = {}
+    for key, app_posts in sorted(by_app.items()):
+        row = {"posts": len(app_posts)}
+        for field in ("score", "num_comments"):
+            values = sorted(p[field] for p in app_posts)
+            row[field] = {"mean": round(sum(values) / len(values), 3), "max": float(values[-1]),
+                          **{k: float(values[int(q * (len(values) - 1))]) for k, q in report.PERCENTILES.items()}}
+        authors = {}
+        for p in app_posts:
+            if p["author"] not in report.IGNORED_AUTHORS: authors[p["author"]] = authors.get(p["author"], 0) + 1
+        row["top_authors"] = [[a, c] for a, c in sorted(authors.items(), key=lambda kv: -kv[1])[:n_top]]
+        apps[key] = row
+    return {"apps": apps, "timeline": timeline}
+
+def bench_report(args: argparse.Namespace) -> None:
+    cols = synthetic_columns(args.posts, args.apps, args.authors)
+    with tempfile.TemporaryDirectory() as root:
+        snapshot = os.path.join(root, "snapshot.npz")
+        cols.save(snapshot, "bench")
+        t0 = time.perf_counter()
+        cols = report.PostColumns.load(snapshot, "bench")
+        load_s = time.perf_counter() - t0
+        size_mb = os.path.getsize(snapshot) / 1e6
+    t0 = time.perf_counter()
+    fast = report.build_report(cols, "day", args.top_authors)
+    fast_s = time.perf_counter() - t0
+
+    posts = [{"category": cols.groups[g][0], "app": cols.groups[g][1], "author": cols.authors[a],
+              "created_utc": None if np.isnan(c) else c, "score": s, "num_comments": n}
+             for g, a, c, s, n in zip(cols.group.tolist(), cols.author.tolist(), cols.created_utc.tolist(),
+                                      cols.score.tolist(), cols.num_comments.tolist())]
+    t0 = time.perf_counter()
+    slow = loop_report(posts, args.top_authors)
+    slow_s = time.perf_counter() - t0
+
+    # Authors tied on post count may be listed in either order, so compare the counts.
+    same = all(
+        row["posts"] == slow["apps"][key]["posts"]
+        and all(row[f]["max"] == slow["apps"][key][f]["max"] and row[f]["p50"] == slow["apps"][key][f]["p50"]
+                and row[f]["p90"] == slow["apps"][key][f]["p90"] for f in ("score", "num_comments"))
+        and [c for _, c in row["top_authors"]] == [c for _, c in slow["apps"][key]["top_authors"]]
+        for row in fast["apps"] for key in [(row["category"], row["app"])]
+    ) and {(t["category"], t["app"], t["bucket"]): t["posts"] for t in fast["timeline"]} == slow["timeline"]
+    print(f"{args.posts} posts, {args.apps} apps, {len(cols.authors)} authors")
+    print(f"- snapshot load  {load_s:7.3f}s  ({size_mb:.1f} MB .npz)")
+    print(f"- numpy report   {fast_s:7.3f}s")
+    print(f"- python loops   {slow_s:7.3f}s")
+    print(f"- speedup: {slow_s / fast_s:.1f}x")
+    assert same, "the NumPy report differs from the per-dict loops"
+
+
+def synthetic_titles(n_titles: int, dup_fraction: float, seed: int = 11) -> tuple[list[dict], list[int]]:
+    """Posts with random titles; a dup_fraction of them re-post an earlier title with a small edit.
+
+    Returns the posts and, per post, the index of the original it copies (its own index for originals).
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = ["".join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(5000)]
+    edits = (
+        lambda w: [w[0].capitalize()] + w[1:] + ["?"],                             # case and punctuation
+        lambda w: w[:-1] + ["help"],                                                # last word swapped
+        lambda w: ["[question]"] + w,                                               # tag prefixed
+        lambda w: w[:len(w) // 2] + w[len(w) // 2 + 1:],                            # a word dropped
+    )
+    posts, origin, words_of = [], [], []
+    for i in range(n_titles):
+        if posts and rng.random() < dup_fraction:
+            src = rng.randrange(len(posts))
+            words = rng.choice(edits)(list(words_of[origin[src]]))
+            origin.append(origin[src])
+        else:
+            words = rng.choices(vocab, k=rng.randint(6, 14))
+            origin.append(i)
+        words_of.append(words)
+        posts.append({"id": f"p{i:07x}", "title": " ".join(words)})
+    return posts, origin
+
+def shingle_set(title: str) -> set[bytes]:
+    raw = near_dupes.normalize_title(title).encode("utf-8").ljust(near_dupes.SHINGLE_BYTES)
+    return {raw[i:i + near_dupes.SHINGLE_BYTES] for i in range(len(raw) - near_dupes.SHINGLE_BYTES + 1)}
+
+def bench_near_dupes(args: argparse.Namespace) -> None:
+    posts, origin = synthetic_titles(args.titles, args.dup_fraction)
+    index = near_dupes.NearDupIndex(threshold=args.threshold)
+    t0 = time.perf_counter()
+    clusters = []
+    # Batches stand in for targets arriving one by one during a scrape.
+    for lo in range(0, len(posts), args.batch):
+        clusters.extend(index.assign(posts[lo:lo + args.batch]))
+    lsh_s = time.perf_counter() - t0
+    cluster_of = {p["id"]: c for p, c in zip(posts, clusters)}
+    first_of = {}
+    for i, o in enumerate(origin): first_of.setdefault(o, i)
+    dups = [i for i, o in enumerate(origin) if i != first_of[o]]
+    found = sum(clusters[i] == clusters[first_of[origin[i]]] for i in dups)
+    wrong = sum(origin[int(clusters[i][1:], 16)] != origin[i] for i in range(len(posts)))
+    print(f"{len(posts)} titles, {len(dups)} injected near-duplicates, threshold {args.threshold}, "
+          f"batches of {args.batch}")
+    print(f"- minhash/lsh    {lsh_s:7.2f}s  ({len(posts) / lsh_s:,.0f} titles/s)  {len(index)} clusters  "
+          f"near-duplicates found {found / max(len(dups), 1):.1%}  posts in a wrong cluster {wrong}")
+
+    # All-pairs exact Jaccard on a sample; its cost grows with the square of the title count.
+    sample = posts[:args.brute]
+    sets = [shingle_set(p["title"]) for p in sample]
+    t0 = time.perf_counter()
+    pairs = [(i, j) for i in range(len(sets)) for j in range(i)
+             if len(sets[i] & sets[j]) >= args.threshold * len(sets[i] | sets[j])]
+    brute_s = time.perf_counter() - t0
+    recall = sum(cluster_of[sample[i]["id"]] == cluster_of[sample[j]["id"]] for i, j in pairs) / max(len(pairs), 1)
+    print(f"- all pairs      {brute_s:7.2f}s for the first {len(sample)} titles "
+          f"(~{brute_s * (len(posts) / max(len(sample), 1)) ** 2 / 3600:,.1f}h extrapolated to {len(posts)})  "
+          f"{len(pairs)} pairs at Jaccard >= {args.threshold}, {recall:.1%} of them share an LSH cluster")
+
+
+def subcommand(sub: argparse._SubParsersAction, func, help: str) -> argparse.ArgumentParser:
+    """A `python benchmark.py <name>` parser that runs `func`; bench_near_dupes is `near-dupes`."""
+    p = sub.add_parser(func.__name__.removeprefix("bench_").replace("_", "-"), help=help)
+    p.set_defaults(func=func)
+    return p
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Reddit scraper.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = subcommand(sub, bench_transport, "Compare per-request connections with the pooled Transport.")
+    p.add_argument("--requests", type=int, default=300, help="Requests per variant (default: %(default)s)")
+    p.add_argument("--connect-latency", type=float, default=0.02,
+                   help="Emulated handshake cost per new connection in seconds (default: %(default)s)")
+
+    p = subcommand(sub, bench_ratelimit, "Compare fixed-delay pacing with header-driven adaptive pacing.")
+    p.add_argument("--requests", type=int, default=60, help="Requests per variant (default: %(default)s)")
+    p.add_argument("--ratelimit", type=int, default=30, help="Server budget per window (default: %(default)s)")
+    p.add_argument("--window", type=float, default=2.0, help="Server window in seconds (default: %(default)s)")
+    p.add_argument("--delay", type=float, default=0.2, help="Fixed pacing delay in seconds (default: %(default)s)")
+
+    p = subcommand(sub, bench_quality, "Compare the legacy and streaming data_quality_check engines.")
+    p.add_argument("--files", type=int, default=10000, help="Synthetic files to generate (default: %(default)s)")
+    p.add_argument("--posts", type=int, default=50, help="Posts per file (default: %(default)s)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="Processes for the streaming engine (default: %(default)s)")
+    p.add_argument("--bloom-error-rate", type=float, default=None,
+                   help="Use the Bloom filter dedup at this error rate (default: exact)")
+
+    p = subcommand(sub, bench_build, "Compare listing decode + record building, old vs compact.")
+    p.add_argument("--fixtures", type=str, default=None,
+                   help="Use listing pages recorded with reddit_scraper.py --record (default: synthetic Reddit-shaped pages)")
+    p.add_argument("--pages", type=int, default=200, help="Synthetic pages of 100 posts (default: %(default)s)")
+    p.add_argument("--repeat", type=int, default=3, help="Timing runs per variant, best is kept (default: %(default)s)")
+
+    p = subcommand(sub, bench_queue, "Scale worker processes on one shared work queue.")
+    p.add_argument("--workers", type=int_list, default=[1, 2, 4], help="Worker counts, comma-separated (default: 1,2,4)")
+    p.add_argument("--targets", type=int, default=32, help="Synthetic targets to enqueue (default: %(default)s)")
+    p.add_argument("--max-posts", type=int, default=200, help="--max-posts per target (default: %(default)s)")
+    p.add_argument("--delay", type=float, default=0.05, help="Per-worker --delay budget (default: %(default)s)")
+    p.add_argument("--latency", type=float, default=0.01, help="Server latency per request (default: %(default)s)")
+
+    p = subcommand(sub, bench_coalesce, "Compare per-target crawls with coalesced r/a+b+c listings.")
+    p.add_argument("--coalesce", type=int, default=4, help="Group size (default: %(default)s)")
+    p.add_argument("--max-posts", type=int_list, default=[25, 150, 200],
+                   help="--max-posts values, comma-separated (default: 25,150,200)")
+    p.add_argument("--delay", type=float, default=0.02, help="Fixed pacing delay (default: %(default)s)")
+    p.add_argument("--listing-size", type=int, default=fake_reddit.DEFAULT_LISTING_SIZE,
+                   help="Posts per (combined) listing before the cursor ends (default: %(default)s)")
+
+    p = subcommand(sub, bench_daemon, "Compare fixed-cadence polling with the adaptive --daemon schedule.")
+    p.add_argument("--duration", type=float, default=60.0, help="Seconds each case runs (default: %(default)s)")
+    p.add_argument("--live-rate", type=float, default=1.0,
+                   help="Posts/sec of the busiest source; others get 1/2 .. 1/128 of it (default: %(default)s)")
+    p.add_argument("--fixed-interval", type=float, default=20.0,
+                   help="Poll interval of the fixed-cadence case (default: %(default)s)")
+    p.add_argument("--poll-target", type=int, default=10, help="--poll-target of the adaptive case (default: %(default)s)")
+    p.add_argument("--min-interval", type=float, default=1.0, help="--min-interval of the adaptive case (default: %(default)s)")
+    p.add_argument("--max-interval", type=float, default=60.0, help="--max-interval of the adaptive case (default: %(default)s)")
+    p.add_argument("--max-posts", type=int, default=100, help="Max posts per poll (default: %(default)s)")
+    p.add_argument("--delay", type=float, default=0.01, help="Fixed pacing delay (default: %(default)s)")
+
+    p = subcommand(sub, bench_backfill, "Compare a single deep listing with --backfill time windows.")
+    p.add_argument("--days", type=float, default=14.0, help="Length of the backfilled range in days (default: %(default)s)")
+    p.add_argument("--targets", type=int, default=2, help="Targets backfilled (default: %(default)s)")
+    p.add_argument("--concurrency", type=int_list, default=[1, 4, 8],
+                   help="Backfill --concurrency values, comma-separated (default: 1,4,8)")
+    p.add_argument("--window-days", type=float, default=DEFAULT_BACKFILL_WINDOW_DAYS,
+                   help="Initial window length in days (default: %(default)s)")
+    p.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response (default: %(default)s)")
+
+    p = subcommand(sub, bench_report, "Compare per-dict loops with report.py's NumPy group-bys.")
+    p.add_argument("--posts", type=int, default=1_000_000, help="Synthetic posts (default: %(default)s)")
+    p.add_argument("--apps", type=int, default=40, help="Apps the posts are spread over (default: %(default)s)")
+    p.add_argument("--authors", type=int, default=50_000, help="Distinct authors (default: %(default)s)")
+    p.add_argument("--top-authors", type=int, default=report.DEFAULT_TOP_AUTHORS,
+                   help="Top authors per app (default: %(default)s)")
+
+    p = subcommand(sub, bench_near_dupes, "Compare near_dupes.py MinHash/LSH clustering with all-pairs Jaccard.")
+    p.add_argument("--titles", type=int, default=300_000, help="Synthetic titles (default: %(default)s)")
+    p.add_argument("--dup-fraction", type=float, default=0.2,
+                   help="Share of titles that re-post an earlier one with a small edit (default: %(default)s)")
+    p.add_argument("--threshold", type=float, default=near_dupes.DEFAULT_THRESHOLD,
+                   help="Jaccard similarity threshold (default: %(default)s)")
+    p.add_argument("--batch", type=int, default=1000, help="Titles assigned per call (default: %(default)s)")
+    p.add_argument("--brute", type=int, default=3000,
+                   help="Titles in the all-pairs baseline sample (default: %(default)s)")
+
+    p = subcommand(sub, bench_write, "Compare inline in-place writes with atomic, write-behind and --fsync output.")
+    p.add_argument("--targets", type=int, default=40, help="Targets scraped (default: %(default)s)")
+    p.add_argument("--max-posts", type=int, default=1000, help="--max-posts per target (default: %(default)s)")
+    p.add_argument("--latency", type=float, default=0.005, help="Seconds added to every response (default: %(default)s)")
+    p.add_argument("--write-queue", type=int, default=8,
+                   help="--write-queue of the write-behind cases (default: %(default)s)")
+    p.add_argument("--fsync", type=int_list, default=[1, 8], help="--fsync batch sizes, comma-separated (default: 1,8)")
+
+    p = subcommand(sub, bench_oauth, "Scale throughput with the number of OAuth identities in the pool.")
+    p.add_argument("--identities", type=int_list, default=[1, 2, 4],
+                   help="Identity counts, comma-separated (default: 1,2,4)")
+    p.add_argument("--targets", type=int, default=24, help="Targets scraped (default: %(default)s)")
+    p.add_argument("--max-posts", type=int, default=1000, help="--max-posts per target (default: %(default)s)")
+    p.add_argument("--concurrency", type=int, default=8, help="--concurrency (default: %(default)s)")
+    p.add_argument("--ratelimit", type=int, default=30, help="Requests per window per identity (default: %(default)s)")
+    p.add_argument("--window", type=float, default=2.0, help="Rate limit window in seconds (default: %(default)s)")
+    p.add_argument("--token-ttl", type=float, default=4.0,
+                   help="Access token lifetime in seconds, so tokens expire mid-run (default: %(default)s)")
+
+    p = subcommand(sub, bench_scrape, "Run scrape_reddit end to end against the fake server.")
+    p.add_argument("--targets", type=int_list, default=[4, 16], help="Target counts, comma-separated (default: 4,16)")
+    p.add_argument("--max-posts", type=int_list, default=[100, 500],
+                   help="--max-posts values, comma-separated (default: 100,500)")
+    p.add_argument("--concurrency", type=int_list, default=[1, 4],
+                   help="--concurrency values, comma-separated (default: 1,4)")
+    p.add_argument("--format", choices=OUTPUT_FORMATS, default="json", help="Output format (default: %(default)s)")
+    p.add_argument("--apps", nargs="+", default=None,
+                   help="Scrape these configured apps (e.g. the ones recorded in --fixtures) instead of synthetic targets")
+    p.add_argument("--fixtures", type=str, default=None, help="Replay recorded fixtures instead of synthetic listings")
+    p.add_argument("--listing-size", type=int, default=fake_reddit.DEFAULT_LISTING_SIZE,
+                   help="Synthetic posts per listing (default: %(default)s)")
+    p.add_argument("--latency", type=float, default=0.0, help="Server latency per request in seconds (default: %(default)s)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses (default: %(default)s)")
+    p.add_argument("--burst-every", type=int, default=0, help="429 burst cycle in requests (default: off)")
+    p.add_argument("--burst-length", type=int, default=0, help="429s at the end of each cycle (default: %(default)s)")
+    p.add_argument("--retry-after", type=float, default=0.1,
+                   help="Retry-After sent with burst 429s (default: %(default)s)")
+    p.add_argument("--seed", type=int, default=0, help="Seed for error injection (default: %(default)s)")
+    p.add_argument("--json", type=str, default=None, help="Write the results to this JSON file (e.g. a CI baseline)")
+    p.add_argument("--baseline", type=str, default=None,
+                   help="Exit 1 if posts/sec falls below a previous --json result by more than --tolerance")
+    p.add_argument("--tolerance", type=float, default=0.25,
+                   help="Allowed posts/sec drop vs --baseline (default: %(default)s)")
+
+    args = parser.parse_args()
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,25 @@
 import argparse
-import glob
+import hashlib
 import json
+import math
 import os
+import re
+import sqlite3
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # optional: exact global dedup falls back to a Python set
+    np = None
+
+from scraper.files import iter_jsonl, load_saved_meta, read_posts_file, saved_output_files
+
+READ_CHUNK_SIZE = 1 << 16
+DEFAULT_BLOOM_CAPACITY = 10_000_000
+STREAM_THRESHOLD_BYTES = 8 << 20
+PARALLEL_MIN_BYTES = 4 << 20  # below this much output, starting worker processes costs more than it saves
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
 
 
 def parse_args() -> argparse.Namespace:
@@ -9,65 +27,325 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--outdir",
         default="output",
-        help="Root output directory that contains per-category JSON files (default: %(default)s)",
+        help="Root output directory written by reddit_scraper.py, any --format (default: %(default)s)",
     )
     parser.add_argument(
         "--strict",
         action="store_true",
         help="Exit with non-zero status if any file has shape issues or duplicate URLs.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to analyze files in parallel once the output exceeds 4 MB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--bloom-error-rate",
+        type=float,
+        default=None,
+        help="Count global duplicates with a Bloom filter at this false-positive rate instead of exact hashes.",
+    )
+    parser.add_argument(
+        "--bloom-capacity",
+        type=int,
+        default=DEFAULT_BLOOM_CAPACITY,
+        help="Expected number of URLs the Bloom filter is sized for (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        help="Check a consolidated SQLite store (reddit_scraper.py --store sqlite:PATH) instead of JSON files.",
+    )
+    args = parser.parse_args()
+    if args.bloom_error_rate is not None and not 0 < args.bloom_error_rate < 1:
+        parser.error("--bloom-error-rate must be between 0 and 1")
+    return args
+
+
+def check_db(path: str, strict: bool) -> int:
+    if not os.path.exists(path):
+        print(f"No database found at '{path}'")
+        return 1
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    rows = conn.execute(
+        "SELECT app_key, COUNT(*),"
+        " COUNT(NULLIF(url, '')) - COUNT(DISTINCT NULLIF(url, '')),"
+        " SUM(TRIM(COALESCE(title, '')) = ''),"
+        " SUM(COALESCE(author, '') = '')"
+        " FROM posts GROUP BY app_key ORDER BY category, app_key"
+    ).fetchall()
+    if not rows:
+        print(f"No posts found in '{path}'")
+        return 1
+    total_posts, global_dup_urls = conn.execute(
+        "SELECT COUNT(*), COUNT(NULLIF(url, '')) - COUNT(DISTINCT NULLIF(url, '')) FROM posts"
+    ).fetchone()
+    conn.close()
+
+    apps_with_dup_urls = 0
+    print("Per-app quality report:")
+    for app, posts, dup_in_app, empty_titles, missing_authors in rows:
+        if dup_in_app > 0:
+            apps_with_dup_urls += 1
+        print(
+            f"- {app:30} posts={posts:4} dup_urls={dup_in_app:3} "
+            f"empty_titles={empty_titles:3} missing_authors={missing_authors:3}"
+        )
+
+    print("\nSummary:")
+    print(f"- apps: {len(rows)}")
+    print(f"- total_posts: {total_posts}")
+    print(f"- global_duplicate_urls: {global_dup_urls}")
+    print(f"- apps_with_dup_urls: {apps_with_dup_urls}")
+
+    if strict and apps_with_dup_urls > 0:
+        return 2
+    return 0
+
+
+class _StreamReader:
+    """Minimal incremental JSON reader: decodes one value at a time from a file read in chunks."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof: return False
+        chunk = self.f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if not self._fill(): raise ValueError("unexpected end of JSON input")
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if c not in chars: raise ValueError(f"expected one of {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(): raise
+                continue
+            # A number touching the end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]": return
+
+    def object_members(self):
+        """Yield (key, is_array, value); array values are lazy item iterators that must be consumed in order."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                items = self.array_items()
+                yield key, True, items
+                for _ in items: pass
+            else:
+                yield key, False, self.value()
+            if self.expect(",}") == "}": return
+
+
+def url_hash(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _loaded_members(f):
+    for key, value in json.load(f).items():
+        is_array = isinstance(value, list)
+        yield key, is_array, iter(value) if is_array else value
+
+
+class _PostStats:
+    """Per-file post counters: URLs (and their hashes for the global dedup), empty titles, missing authors."""
+
+    def __init__(self):
+        self.posts = self.empty_titles = self.missing_authors = 0
+        self.urls = set()
+        self.hashes = array("Q")
+
+    def add(self, posts) -> None:
+        for p in posts:
+            self.posts += 1
+            url = p.get("url")
+            if url:
+                self.urls.add(url)
+                self.hashes.append(url_hash(url))
+            if not (p.get("title") or "").strip():
+                self.empty_titles += 1
+            if not p.get("author"):
+                self.missing_authors += 1
+
+    def report(self, app: str, shape_ok: bool, error: str | None = None) -> dict:
+        return {
+            "app": app,
+            "posts": self.posts,
+            "dup_in_file": len(self.hashes) - len(self.urls),
+            "empty_titles": self.empty_titles,
+            "missing_authors": self.missing_authors,
+            "shape_ok": shape_ok,
+            "error": error,
+            "url_hashes": self.hashes.tobytes(),
+        }
+
+
+def analyze_compact(fp: str) -> dict:
+    """Report for an app saved with a compact --format: its <app>_meta.json plus the post store it names.
+    Views are rebuilt from the posts, so the shape check is that the store holds total_posts_collected posts."""
+    meta, fmt, path = load_saved_meta(fp)
+    stats = _PostStats()
+    try:
+        stats.add(iter_jsonl(path) if fmt.startswith("jsonl") else read_posts_file(path, fmt))
+    except Exception as e:  # missing or unreadable post store, or no pyarrow/zstandard to read it
+        return stats.report(meta.get("app_key", "unknown"), False, f"{os.path.basename(path)}: {e}")
+    expected = meta.get("total_posts_collected", stats.posts)
+    return stats.report(meta.get("app_key", "unknown"), stats.posts == expected)
+
+
+def analyze_file(fp: str) -> dict:
+    """Per-file report. Files above STREAM_THRESHOLD_BYTES are parsed incrementally so their
+    posts array is never held in memory; smaller ones take the faster json.load path."""
+    if fp.endswith("_meta.json"): return analyze_compact(fp)
+    app, topics, discussions = "unknown", None, 0
+    stats = _PostStats()
+    with open(fp, "r", encoding="utf-8") as f:
+        streaming = os.path.getsize(fp) > STREAM_THRESHOLD_BYTES
+        members = _StreamReader(f).object_members() if streaming else _loaded_members(f)
+        for key, is_array, value in members:
+            if key == "app_key":
+                app = value
+            elif key == "posts" and is_array:
+                stats.add(value)
+            elif key == "discussions" and is_array:
+                discussions = sum(1 for _ in value)
+            elif key.endswith("_topics") and is_array and topics is None:
+                topics = sum(1 for _ in value)
+    return stats.report(app, stats.posts == (topics or 0) == discussions)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit hashes (double hashing for the k probes)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, h: int) -> bool:
+        """Insert h; return True if it was (probably) already present."""
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        present = True
+        for i in range(self.k):
+            bit = (h1 + i * h2) % self.size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self.bits[byte] & mask:
+                present = False
+                self.bits[byte] |= mask
+        return present
+
+
+class GlobalDedup:
+    """Counts duplicate URLs across files from 64-bit hashes (exact) or a Bloom filter (approximate)."""
+
+    def __init__(self, bloom_error_rate: float | None = None, bloom_capacity: int = DEFAULT_BLOOM_CAPACITY):
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_error_rate else None
+        self.hashes = array("Q")
+        self.bloom_dups = 0
+
+    def add(self, raw: bytes) -> None:
+        chunk = array("Q")
+        chunk.frombytes(raw)
+        if self.bloom is None:
+            self.hashes.extend(chunk)
+            return
+        for h in chunk:
+            if self.bloom.add(h): self.bloom_dups += 1
+
+    def duplicates(self) -> int:
+        if self.bloom is not None: return self.bloom_dups
+        if np is not None:
+            return len(self.hashes) - len(np.unique(np.frombuffer(self.hashes, dtype=np.uint64)))
+        return len(self.hashes) - len(set(self.hashes))
+
+
+def iter_reports(files: list[str], workers: int):
+    workers = min(workers, len(files))
+    if workers <= 1 or sum(os.path.getsize(path) for path in files) < PARALLEL_MIN_BYTES:
+        yield from map(analyze_file, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map keeps file order, so the report stays deterministic.
+        yield from pool.map(analyze_file, files, chunksize=max(1, len(files) // (workers * 8)))
 
 
 def main() -> int:
     args = parse_args()
-    pattern = os.path.join(args.outdir, "**", "*_topics.json")
-    files = sorted(glob.glob(pattern, recursive=True))
+    if args.db:
+        return check_db(args.db, args.strict)
+    files = saved_output_files(args.outdir)
 
     if not files:
-        print(f"No JSON files found under '{args.outdir}'")
+        print(f"No output files found under '{args.outdir}'")
         return 1
 
     total_posts = 0
-    global_urls = []
+    dedup = GlobalDedup(args.bloom_error_rate, args.bloom_capacity)
     files_with_shape_issue = 0
     files_with_dup_urls = 0
 
     print("Per-file quality report:")
-    for fp in files:
-        with open(fp, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        app = data.get("app_key", "unknown")
-        posts = data.get("posts", [])
-        discussions = data.get("discussions", [])
-        topic_lists = [v for k, v in data.items() if k.endswith("_topics") and isinstance(v, list)]
-        topics = topic_lists[0] if topic_lists else []
-
-        urls = [p.get("url") for p in posts if p.get("url")]
-        dup_in_file = len(urls) - len(set(urls))
-        empty_titles = sum(1 for p in posts if not (p.get("title") or "").strip())
-        missing_authors = sum(1 for p in posts if not p.get("author"))
-        shape_ok = len(posts) == len(topics) == len(discussions)
-
-        if not shape_ok:
+    for report in iter_reports(files, args.workers):
+        if not report["shape_ok"]:
             files_with_shape_issue += 1
-        if dup_in_file > 0:
+        if report["dup_in_file"] > 0:
             files_with_dup_urls += 1
 
-        total_posts += len(posts)
-        global_urls.extend(urls)
+        total_posts += report["posts"]
+        dedup.add(report["url_hashes"])
 
         print(
-            f"- {app:30} posts={len(posts):4} dup_urls={dup_in_file:3} "
-            f"empty_titles={empty_titles:3} missing_authors={missing_authors:3} shape_ok={shape_ok}"
+            f"- {report['app']:30} posts={report['posts']:4} dup_urls={report['dup_in_file']:3} "
+            f"empty_titles={report['empty_titles']:3} missing_authors={report['missing_authors']:3} "
+            f"shape_ok={report['shape_ok']}" + (f" error={report['error']}" if report["error"] else "")
         )
 
-    global_dup_urls = len(global_urls) - len(set(global_urls))
+    global_dup_urls = dedup.duplicates()
+    approx = f" (approx, Bloom error rate {args.bloom_error_rate:g})" if args.bloom_error_rate else ""
     print("\nSummary:")
     print(f"- files: {len(files)}")
     print(f"- total_posts: {total_posts}")
-    print(f"- global_duplicate_urls: {global_dup_urls}")
+    print(f"- global_duplicate_urls: {global_dup_urls}{approx}")
     print(f"- files_with_shape_issue: {files_with_shape_issue}")
     print(f"- files_with_dup_urls: {files_with_dup_urls}")
 
@@ -0,0 +1,456 @@
+# fake_reddit (local stand-in for www.reddit.com)
+# a) Serve synthetic listings on localhost:8765
+#    python fake_reddit.py --port 8765
+# b) Emulate a slow handshake (charged once per new TCP connection)
+#    python fake_reddit.py --connect-latency 0.05
+# c) Enforce a request budget with X-Ratelimit-* headers and 429 + Retry-After
+#    python fake_reddit.py --ratelimit 100 --ratelimit-window 60
+# d) Replay fixtures recorded with `reddit_scraper.py --record DIR` instead of synthetic listings
+#    python fake_reddit.py --fixtures fixtures/
+# e) Inject per-request latency, a 429 burst every N requests and random 5xx errors
+#    python fake_reddit.py --latency 0.05 --burst-every 200 --burst-length 5 --error-rate 0.01
+# f) Live listings: new posts keep arriving, at a different rate per source (for --daemon)
+#    python fake_reddit.py --live-rate 0.5
+# g) OAuth: /api/v1/access_token issues bearer tokens to client0..clientN-1 (secret0..); listings then require a
+#    valid token, and --ratelimit applies per client, like oauth.reddit.com
+#    python fake_reddit.py --oauth-clients 4 --token-ttl 60 --ratelimit 100 --ratelimit-window 60
+# Every 5th search hit matches its query only in the selftext (the title is generic), as Reddit search allows.
+# Time-restricted searches (q=timestamp:FROM..TO, as sent by --backfill) are answered from a synthetic history
+# of one post per minute per source, cut off at --listing-size posts like any other listing.
+
+import argparse
+import base64
+import contextlib
+import glob
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from scraper.files import fixture_key
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_LISTING_SIZE = 1000
+DEFAULT_RETRY_AFTER = 1.0
+DEFAULT_TOKEN_TTL = 3600.0
+SYNTHETIC_NEWEST_UTC = 1700000000.0
+SYNTHETIC_SPACING_SECONDS = 60
+HISTORY_POSTS = 1_000_000  # per source, so about 1.9 years of history
+BODY_MATCH_EVERY = 5  # every 5th search hit matches the query only in its selftext, as Reddit search allows
+
+
+def synthetic_post(source: str, n: int) -> dict:
+    pid = f"{zlib.crc32(source.encode()) & 0xffff:04x}{n:06x}"
+    search = source.startswith("search:")
+    sub = source if not search else "AskReddit"
+    title = f"{source} post {n}"
+    if search and n % BODY_MATCH_EVERY == BODY_MATCH_EVERY - 1: title = f"untitled post {n}"
+    return {
+        "kind": "t3",
+        "data": {
+            "id": pid, "name": f"t3_{pid}", "title": title, "selftext": f"{source} post {n} body",
+            "permalink": f"/r/{sub}/comments/{pid}/{source.replace(':', '_')}_post_{n}/",
+            "score": n % 97, "num_comments": n % 41, "created_utc": SYNTHETIC_NEWEST_UTC - n * SYNTHETIC_SPACING_SECONDS,
+            "author": f"user{n % 13}", "subreddit": sub, "subreddit_name_prefixed": f"r/{sub}",
+        },
+    }
+
+def synthetic_listing(source: str, params: dict, listing_size: int) -> dict:
+    limit = min(int(params.get("limit", 25)), 100)
+    after = params.get("after")
+    start = int(after[-6:], 16) + 1 if after else 0
+    end = min(start + limit, listing_size)
+    children = [synthetic_post(source, n) for n in range(start, end)]
+    next_after = children[-1]["data"]["name"] if children and end < listing_size else None
+    return {"kind": "Listing", "data": {"after": next_after, "children": children}}
+
+
+def source_rate(source: str, live_rate: float) -> float:
+    """Posts/sec of a live source: from --live-rate down to 1/128 of it, picked by a hash of the name."""
+    return live_rate / 2 ** (zlib.crc32(source.encode()) % 8)
+
+def live_listing(source: str, params: dict, rate: float, started: float, listing_size: int) -> dict:
+    """Newest-first listing that grows at `rate` posts/sec after `started`, on top of `listing_size` older posts."""
+    limit = min(int(params.get("limit", 25)), 100)
+    after = params.get("after")
+    newest = listing_size - 1 + int((time.time() - started) * rate)
+    start = int(after[-6:], 16) - 1 if after else newest
+    children = []
+    for n in range(start, max(start - limit, -1), -1):
+        post = synthetic_post(source, n)
+        post["data"]["created_utc"] = started + (n - listing_size + 1) / rate
+        children.append(post)
+    next_after = children[-1]["data"]["name"] if children and start - limit >= 0 else None
+    return {"kind": "Listing", "data": {"after": next_after, "children": children}}
+
+
+def window_query(params: dict) -> tuple[str, int, int] | None:
+    """(query, start, end) of a time-restricted search such as q="(and 'uber' timestamp:START..END)"."""
+    window = re.search(r"timestamp:(\d+)\.\.(\d+)", params.get("q", ""))
+    if not window: return None
+    quoted = re.search(r"'((?:[^'\\]|\\.)*)'", params["q"])
+    query = re.sub(r"\\(.)", r"\1", quoted.group(1)) if quoted else ""
+    return query, int(window.group(1)), int(window.group(2))
+
+def window_listing(source: str, params: dict, start: int, end: int, listing_size: int) -> dict:
+    """Newest-first synthetic posts created in [start, end] (inclusive, like Reddit's timestamp ranges)."""
+    limit = min(int(params.get("limit", 25)), 100)
+    first = max(0, math.floor((SYNTHETIC_NEWEST_UTC - end) / SYNTHETIC_SPACING_SECONDS))
+    if SYNTHETIC_NEWEST_UTC - first * SYNTHETIC_SPACING_SECONDS > end: first += 1
+    last = min(math.floor((SYNTHETIC_NEWEST_UTC - start) / SYNTHETIC_SPACING_SECONDS), HISTORY_POSTS - 1)
+    last = min(last, first + listing_size - 1)
+    after = params.get("after")
+    lo = int(after[-6:], 16) + 1 if after else first
+    hi = min(lo + limit - 1, last)
+    children = [synthetic_post(source, n) for n in range(lo, hi + 1)]
+    next_after = children[-1]["data"]["name"] if children and hi < last else None
+    return {"kind": "Listing", "data": {"after": next_after, "children": children}}
+
+
+def synthetic_multi_listing(sources: list[str], params: dict, listing_size: int) -> dict:
+    """Combined r/a+b+c listing: the subreddits' posts interleaved round-robin."""
+    k = len(sources)
+    limit = min(int(params.get("limit", 25)), 100)
+    after = params.get("after")
+    start = 0
+    if after:
+        prefixes = [f"{zlib.crc32(source.encode()) & 0xffff:04x}" for source in sources]
+        start = int(after[-6:], 16) * k + prefixes.index(after[3:7]) + 1
+    end = min(start + limit, listing_size)
+    children = [synthetic_post(sources[n % k], n // k) for n in range(start, end)]
+    next_after = children[-1]["data"]["name"] if children and end < listing_size else None
+    return {"kind": "Listing", "data": {"after": next_after, "children": children}}
+
+
+def synthetic_comment(post_id: str, k: int, depth: int = 0, replies: dict | str = "") -> dict:
+    cid = f"{post_id}c{k:x}"
+    parent = f"t3_{post_id}" if depth == 0 else f"t1_{post_id}c{k - 1:x}"
+    return {
+        "kind": "t1",
+        "data": {
+            "id": cid, "name": f"t1_{cid}", "parent_id": parent, "link_id": f"t3_{post_id}",
+            "author": f"user{k % 17}", "body": f"comment {k} on {post_id}", "score": k % 23,
+            "created_utc": 1700000000.0 + k, "depth": depth, "replies": replies,
+        },
+    }
+
+def synthetic_thread(post_id: str, inline: int = 20) -> list:
+    """Comment page for a synthetic post: `inline` comments as pairs (top-level + reply), rest behind a `more` stub."""
+    total = int(post_id[-6:], 16) % 41
+    children = []
+    for k in range(0, min(total, inline), 2):
+        reply = synthetic_comment(post_id, k + 1, 1) if k + 1 < min(total, inline) else None
+        replies = {"kind": "Listing", "data": {"children": [reply]}} if reply else ""
+        children.append(synthetic_comment(post_id, k, 0, replies))
+    rest = [f"{post_id}c{k:x}" for k in range(inline, total)]
+    if rest:
+        children.append({"kind": "more", "data": {"count": len(rest), "children": rest}})
+    post = {"kind": "Listing", "data": {"children": [], "after": None}}
+    return [post, {"kind": "Listing", "data": {"children": children, "after": None}}]
+
+def synthetic_morechildren(params: dict) -> dict:
+    things = []
+    for cid in params.get("children", "").split(",")[:100]:
+        post_id, _, k = cid.rpartition("c")
+        if post_id and k:
+            things.append(synthetic_comment(post_id, int(k, 16)))
+    return {"json": {"errors": [], "data": {"things": things}}}
+
+
+def load_fixtures(dirpath: str) -> dict[str, dict]:
+    """Index recorded fixtures by the same key the recorder used to name them."""
+    fixtures = {}
+    for fp in glob.glob(os.path.join(dirpath, "*.json")):
+        with open(fp, "r", encoding="utf-8") as f:
+            fixture = json.load(f)
+        fixtures[fixture_key(fixture["path"], fixture.get("params"))] = fixture["body"]
+    return fixtures
+
+
+class FakeRedditServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, connect_latency: float = 0.0, listing_size: int = DEFAULT_LISTING_SIZE,
+                 ratelimit: int = 0, ratelimit_window: float = 60.0, fixtures: str | None = None,
+                 latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 burst_every: int = 0, burst_length: int = 0, retry_after: float = DEFAULT_RETRY_AFTER,
+                 seed: int = 0, live_rate: float = 0.0, oauth_clients: int = 0, token_ttl: float = DEFAULT_TOKEN_TTL):
+        super().__init__(addr, FakeRedditHandler)
+        self.connect_latency = connect_latency
+        self.listing_size = listing_size
+        self.ratelimit = ratelimit
+        self.ratelimit_window = ratelimit_window
+        self.fixtures = load_fixtures(fixtures) if fixtures else None
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.live_rate = live_rate
+        self.started = time.time()
+        self.windows = {}  # budget key ("" = anonymous, else OAuth client id) -> [window start, requests used]
+        self.clients = {f"client{i}": f"secret{i}" for i in range(oauth_clients)}
+        self.token_ttl = token_ttl
+        self.tokens = {}  # access token -> (client id, expires at)
+        self.tokens_issued = 0
+        self.client_requests = {}
+        self.connections = 0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.fixture_misses = 0
+        self.lock = threading.Lock()
+
+    def take_fault(self, n: int) -> tuple[int, dict] | None:
+        """Decide whether request number `n` fails: the tail of every burst cycle gets a 429, then random 5xx."""
+        with self.lock:
+            if self.burst_every and (n - 1) % self.burst_every >= self.burst_every - self.burst_length:
+                self.throttled += 1
+                return 429, {"Retry-After": f"{self.retry_after:g}"}
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors += 1
+                return 503, {}
+        return None
+
+    def response_delay(self) -> float:
+        if not self.latency_jitter: return self.latency
+        with self.lock:
+            return self.latency + self.rng.uniform(0.0, self.latency_jitter)
+
+    def issue_token(self, client_id: str) -> dict:
+        with self.lock:
+            self.tokens_issued += 1
+            token = f"{client_id}-{self.tokens_issued}-{self.rng.getrandbits(64):016x}"
+            self.tokens[token] = (client_id, time.time() + self.token_ttl)
+        return {"access_token": token, "token_type": "bearer", "expires_in": self.token_ttl, "scope": "*"}
+
+    def client_for(self, authorization: str | None) -> str | None:
+        """OAuth client id of a valid, unexpired `bearer` token, else None."""
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer": return None
+        with self.lock:
+            client_id, expires_at = self.tokens.get(token, (None, 0.0))
+        return client_id if time.time() < expires_at else None
+
+    def take_budget(self, key: str = "") -> tuple[bool, dict]:
+        """Charge one request against `key`'s current window; returns (allowed, X-Ratelimit headers)."""
+        if not self.ratelimit: return True, {}
+        with self.lock:
+            now = time.monotonic()
+            window = self.windows.setdefault(key, [now, 0])
+            if now - window[0] >= self.ratelimit_window:
+                window[:] = [now, 0]
+            allowed = window[1] < self.ratelimit
+            if allowed:
+                window[1] += 1
+            else:
+                self.throttled += 1
+            reset = max(0.0, self.ratelimit_window - (now - window[0]))
+            headers = {
+                "X-Ratelimit-Used": str(window[1]),
+                "X-Ratelimit-Remaining": f"{self.ratelimit - window[1]:.1f}",
+                "X-Ratelimit-Reset": str(math.ceil(reset)),
+            }
+            if not allowed:
+                headers["Retry-After"] = str(math.ceil(reset))
+        return allowed, headers
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        if urlparse(self.path).path.rstrip("/") != "/api/v1/access_token" or not self.server.clients:
+            self.send_json(404, {"message": "Not Found", "error": 404})
+            return
+        scheme, _, encoded = (self.headers.get("Authorization") or "").partition(" ")
+        try:
+            client_id, _, secret = base64.b64decode(encoded).decode("utf-8").partition(":")
+        except ValueError:
+            client_id = secret = ""
+        form = {k: v[-1] for k, v in parse_qs(body).items()}
+        if scheme.lower() != "basic" or self.server.clients.get(client_id) != secret:
+            self.send_json(401, {"message": "Unauthorized", "error": 401})
+        elif form.get("grant_type") not in ("client_credentials", "password"):
+            self.send_json(200, {"error": "unsupported_grant_type"})
+        else:
+            self.send_json(200, self.server.issue_token(client_id))
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            n = self.server.requests
+        delay = self.server.response_delay()
+        if delay: time.sleep(delay)
+        fault = self.server.take_fault(n)
+        if fault is not None:
+            status, headers = fault
+            self.send_json(status, {"message": "Injected fault", "error": status}, headers)
+            return
+        client_id = ""
+        if self.server.clients:
+            client_id = self.server.client_for(self.headers.get("Authorization"))
+            if client_id is None:
+                self.send_json(401, {"message": "Unauthorized", "error": 401},
+                               {"WWW-Authenticate": 'Bearer realm="reddit", error="invalid_token"'})
+                return
+            with self.server.lock:
+                self.server.client_requests[client_id] = self.server.client_requests.get(client_id, 0) + 1
+        allowed, rl_headers = self.server.take_budget(client_id)
+        if not allowed:
+            self.send_json(429, {"message": "Too Many Requests", "error": 429}, rl_headers)
+            return
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        window = window_query(params) if parts[-1:] == ["search.json"] else None
+        if self.server.fixtures is not None:
+            body = self.server.fixtures.get(fixture_key(url.path, params))
+            if body is None:
+                with self.server.lock:
+                    self.server.fixture_misses += 1
+                self.send_json(404, {"message": "Not Found", "error": 404}, rl_headers)
+                return
+        elif window is not None:
+            query, start, end = window
+            source = parts[1] if parts[0] == "r" else f"search:{query}"
+            body = window_listing(source, params, start, end, self.server.listing_size)
+        elif len(parts) >= 2 and parts[0] == "r" and "+" in parts[1]:
+            body = synthetic_multi_listing(parts[1].split("+"), params, self.server.listing_size)
+        elif len(parts) >= 2 and parts[0] == "r" and self.server.live_rate:
+            body = live_listing(parts[1], params, source_rate(parts[1], self.server.live_rate),
+                                self.server.started, self.server.listing_size)
+        elif len(parts) >= 2 and parts[0] == "r":
+            body = synthetic_listing(parts[1], params, self.server.listing_size)
+        elif parts and parts[0] == "search.json" and self.server.live_rate:
+            source = f"search:{params.get('q', '')}"
+            body = live_listing(source, params, source_rate(source, self.server.live_rate),
+                                self.server.started, self.server.listing_size)
+        elif parts and parts[0] == "search.json":
+            body = synthetic_listing(f"search:{params.get('q', '')}", params, self.server.listing_size)
+        elif len(parts) >= 2 and parts[0] == "comments":
+            body = synthetic_thread(parts[1])
+        elif parts[:2] == ["api", "morechildren.json"]:
+            body = synthetic_morechildren(params)
+        else:
+            self.send_json(404, {"message": "Not Found", "error": 404}, rl_headers)
+            return
+        etag = f'"{zlib.crc32(json.dumps(body).encode("utf-8")):08x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            for k, v in rl_headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(200, body, dict(rl_headers, ETag=etag))
+
+
+def start_server(host: str = DEFAULT_HOST, port: int = 0, **kwargs) -> FakeRedditServer:
+    """Start a FakeRedditServer on a background thread (port 0 picks a free port)."""
+    server = FakeRedditServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@contextlib.contextmanager
+def serving(host: str = DEFAULT_HOST, port: int = 0, **kwargs):
+    """start_server() for the length of a with block; the server is shut down and its socket closed on exit."""
+    server = start_server(host, port, **kwargs)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local fake Reddit listing server for benchmarks.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Bind port (default: %(default)s)")
+    parser.add_argument("--connect-latency", type=float, default=0.0,
+                        help="Seconds charged per new TCP connection to emulate a TLS handshake (default: %(default)s)")
+    parser.add_argument("--listing-size", type=int, default=DEFAULT_LISTING_SIZE,
+                        help="Posts available per listing before the cursor ends (default: %(default)s)")
+    parser.add_argument("--ratelimit", type=int, default=0,
+                        help="Requests allowed per window; 0 disables rate limiting (default: %(default)s)")
+    parser.add_argument("--ratelimit-window", type=float, default=60.0,
+                        help="Rate-limit window in seconds (default: %(default)s)")
+    parser.add_argument("--fixtures", type=str, default=None,
+                        help="Replay fixtures recorded with reddit_scraper.py --record; unknown requests get 404")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every response (default: %(default)s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0,
+                        help="Extra random latency of up to this many seconds (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a 503 (default: %(default)s)")
+    parser.add_argument("--burst-every", type=int, default=0,
+                        help="Length of the 429 burst cycle in requests; 0 disables bursts (default: %(default)s)")
+    parser.add_argument("--burst-length", type=int, default=0,
+                        help="Requests at the end of each cycle answered with 429 (default: %(default)s)")
+    parser.add_argument("--retry-after", type=float, default=DEFAULT_RETRY_AFTER,
+                        help="Retry-After seconds sent with burst 429s (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and error injection (default: %(default)s)")
+    parser.add_argument("--live-rate", type=float, default=0.0,
+                        help="Posts/sec added to the busiest live source (others get 1/2 .. 1/128 of it); 0 = static listings")
+    parser.add_argument("--oauth-clients", type=int, default=0,
+                        help="Accept OAuth clients client0..clientN-1 (secrets secret0..) and require their bearer "
+                             "tokens on listings; --ratelimit then applies per client (default: %(default)s = off)")
+    parser.add_argument("--token-ttl", type=float, default=DEFAULT_TOKEN_TTL,
+                        help="Lifetime of issued access tokens in seconds (default: %(default)s)")
+    args = parser.parse_args()
+
+    server = FakeRedditServer((args.host, args.port), connect_latency=args.connect_latency,
+                              listing_size=args.listing_size, ratelimit=args.ratelimit,
+                              ratelimit_window=args.ratelimit_window, fixtures=args.fixtures,
+                              latency=args.latency, latency_jitter=args.latency_jitter,
+                              error_rate=args.error_rate, burst_every=args.burst_every,
+                              burst_length=args.burst_length, retry_after=args.retry_after, seed=args.seed,
+                              live_rate=args.live_rate, oauth_clients=args.oauth_clients, token_ttl=args.token_ttl)
+    print(f"Serving fake Reddit on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,327 @@
+# near_dupes (near-duplicate / cross-post clustering over post titles)
+# a) Cluster every saved post under output/ and list the largest clusters
+#    python near_dupes.py --outdir output
+# b) Also write cluster_id onto every saved post, keeping the index for later scrapes (reddit_scraper.py --near-dupes)
+#    python near_dupes.py --outdir output --index output/.near_dupes.sqlite3 --write
+#
+# Titles are normalized (lowercase, words only), cut into 4-byte shingles and MinHashed with NumPy.
+# LSH banding finds candidate clusters; a post joins the most similar cluster representative whose
+# estimated Jaccard similarity reaches the threshold, or starts a new cluster named after its own id.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from scraper.files import load_saved_meta, read_posts_file, saved_output_files
+from scraper.output import assign_clusters, save_scraped_data_per_app
+
+NUM_PERM = 64
+NUM_BANDS = 16  # 16 bands x 4 rows: candidates at Jaccard 0.7 are found ~99% of the time
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_SEED = 1
+DEFAULT_TOP_CLUSTERS = 20
+SHINGLE_BYTES = 4
+MINHASH_CHUNK_TITLES = 2048  # bounds the (shingles x NUM_PERM) hash matrix to tens of MB
+MAX_SEGMENTS = 8
+_WORDS = re.compile(r"\w+")
+_BAND_PRIME = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(_WORDS.findall((title or "").lower()))
+
+class MinHasher:
+    """MinHash signatures of normalized titles, computed for a whole batch at a time.
+
+    Each shingle (4 bytes of the UTF-8 title, read as a uint32) goes through NUM_PERM multiply-shift
+    hashes; a title's signature is the per-hash minimum over its shingles (np.minimum.reduceat).
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = DEFAULT_SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    def signatures(self, titles: list[str]) -> np.ndarray:
+        out = np.empty((len(titles), self.num_perm), dtype=np.uint32)
+        for lo in range(0, len(titles), MINHASH_CHUNK_TITLES):
+            # Padding gives every title at least one shingle.
+            chunk = [normalize_title(t).encode("utf-8").ljust(SHINGLE_BYTES) for t in titles[lo:lo + MINHASH_CHUNK_TITLES]]
+            lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+            raw = np.frombuffer(b"".join(chunk), dtype=np.uint8).astype(np.uint64)
+            packed = raw[:-3] << 24 | raw[1:-2] << 16 | raw[2:-1] << 8 | raw[3:]
+            # Keep only windows that lie inside one title.
+            counts = lengths - (SHINGLE_BYTES - 1)
+            first = np.cumsum(counts) - counts
+            shingles = packed[np.arange(counts.sum()) + np.repeat(np.cumsum(lengths) - lengths - first, counts)]
+            # (hash, shingle) layout: reducing along the contiguous axis is several times faster.
+            hashed = np.multiply(self.a[:, None], shingles)
+            hashed += self.b[:, None]
+            hashed >>= np.uint64(32)
+            out[lo:lo + len(chunk)] = np.minimum.reduceat(hashed, first, axis=1).T
+        return out
+
+def band_keys(signatures: np.ndarray, bands: int = NUM_BANDS) -> np.ndarray:
+    """One 64-bit LSH key per (title, band), with the band mixed in so bands never collide."""
+    rows = signatures.reshape(len(signatures), bands, -1).astype(np.uint64)
+    keys = np.broadcast_to(np.arange(bands, dtype=np.uint64), rows.shape[:2]).copy()
+    for r in range(rows.shape[2]):
+        keys = keys * _BAND_PRIME + rows[:, :, r]
+    return keys.view(np.int64)
+
+def similarity(signatures: np.ndarray, signature: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of each row of `signatures` with `signature`."""
+    return (signatures == signature).mean(axis=1)
+
+def post_key(post) -> str:
+    return post.get("id") or "title:" + hashlib.sha1(normalize_title(post.get("title")).encode("utf-8")).hexdigest()[:16]
+
+
+class NearDupIndex:
+    """Incremental near-duplicate clustering of posts by title, optionally persisted in SQLite.
+
+    Every cluster keeps the signature of its first post (the representative), and every representative's
+    LSH band keys live in sorted NumPy segments looked up with searchsorted. A new post is compared only
+    with the representatives that share a band with it (all of them, not just the first one per band key),
+    so each batch costs O(batch x bands x representatives per key), not O(n^2). Cluster IDs never change once given out, so the index can keep running as posts arrive.
+    """
+
+    def __init__(self, path: str | None = None, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM,
+                 bands: int = NUM_BANDS, seed: int = DEFAULT_SEED):
+        if num_perm % bands: raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, seed)
+        self.rep_ids = []
+        self.rep_sigs = np.empty((1024, num_perm), dtype=np.uint32)  # grown by doubling; rows past len(self) unused
+        self.segments = []
+        self.known = {}
+        self.lock = threading.Lock()
+        self.conn = None
+        if path: self._open(path, {"num_perm": num_perm, "bands": bands, "seed": seed})
+
+    def _open(self, path: str, params: dict) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.executescript(
+                "CREATE TABLE IF NOT EXISTS params (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS reps (rep INTEGER PRIMARY KEY, cluster_id TEXT NOT NULL, signature BLOB NOT NULL);"
+                # Band keys are rebuilt from the representatives' signatures on open (older files stored them).
+                "DROP TABLE IF EXISTS band_keys;"
+                "CREATE TABLE IF NOT EXISTS posts (post_key TEXT PRIMARY KEY, cluster_id TEXT NOT NULL) WITHOUT ROWID;"
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO params (name, value) VALUES (?, ?)", params.items())
+        saved = dict(self.conn.execute("SELECT name, value FROM params"))
+        if saved != params:
+            raise ValueError(f"{path} was built with {saved}, not {params}")
+        reps = self.conn.execute("SELECT cluster_id, signature FROM reps ORDER BY rep").fetchall()
+        if reps:
+            self._reserve(len(reps))
+            self.rep_ids = [r[0] for r in reps]
+            self.rep_sigs[:len(reps)] = np.frombuffer(b"".join(r[1] for r in reps), dtype=np.uint32).reshape(len(reps), -1)
+            self._add_segment(band_keys(self.rep_sigs[:len(reps)], self.bands).ravel(),
+                              np.repeat(np.arange(len(reps), dtype=np.int64), self.bands))
+        self.known = dict(self.conn.execute("SELECT post_key, cluster_id FROM posts"))
+
+    def __len__(self) -> int:
+        """Number of clusters."""
+        return len(self.rep_ids)
+
+    def _reserve(self, n: int) -> None:
+        if n > len(self.rep_sigs):
+            grown = np.empty((max(n, 2 * len(self.rep_sigs)), self.rep_sigs.shape[1]), dtype=np.uint32)
+            grown[:len(self.rep_ids)] = self.rep_sigs[:len(self.rep_ids)]
+            self.rep_sigs = grown
+
+    def _lookup(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(position in `keys`, representative) for every representative holding one of the band keys."""
+        at, reps = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        # Sorted needles let searchsorted walk each segment in order instead of jumping around it.
+        order = np.argsort(keys)
+        needles = keys[order]
+        for seg_keys, seg_reps in self.segments:
+            lo = np.searchsorted(seg_keys, needles, "left")
+            counts = np.searchsorted(seg_keys, needles, "right") - lo
+            starts = np.cumsum(counts) - counts
+            at.append(np.repeat(order, counts))
+            reps.append(seg_reps[np.repeat(lo - starts, counts) + np.arange(counts.sum())])
+        return np.concatenate(at), np.concatenate(reps)
+
+    def _add_segment(self, keys: np.ndarray, reps: np.ndarray) -> None:
+        order = np.argsort(keys, kind="stable")
+        self.segments.append((keys[order], reps[order]))
+        if len(self.segments) > MAX_SEGMENTS:
+            all_keys = np.concatenate([k for k, _ in self.segments])
+            all_reps = np.concatenate([r for _, r in self.segments])
+            order = np.argsort(all_keys, kind="stable")
+            self.segments = [(all_keys[order], all_reps[order])]
+
+    def assign(self, posts: list) -> list[str]:
+        """Cluster ID for each post (anything with get("id") and get("title")), adding new ones to the index."""
+        with self.lock:
+            keys_of = [post_key(p) for p in posts]
+            todo = {}
+            for i, k in enumerate(keys_of):
+                if k not in self.known: todo.setdefault(k, i)
+            if todo:
+                self._cluster(list(todo), [posts[i].get("title") or "" for i in todo.values()])
+            return [self.known[k] for k in keys_of]
+
+    def _cluster(self, post_keys: list[str], titles: list[str]) -> None:
+        sigs = self.hasher.signatures(titles)
+        keys = band_keys(sigs, self.bands)
+        base = len(self.rep_ids)
+        # Best indexed representative per post, over every representative sharing one of its bands.
+        best_rep = np.full(len(titles), -1, dtype=np.int64)
+        best_sim = np.zeros(len(titles))
+        at, reps = self._lookup(keys.ravel())
+        if len(at):
+            pairs = np.unique(at // self.bands * base + reps)
+            rows, reps = pairs // base, pairs % base
+            sims = (self.rep_sigs[reps] == sigs[rows]).mean(axis=1)
+            order = np.lexsort((sims, rows))
+            last = order[np.r_[rows[order][1:] != rows[order][:-1], True]]
+            best_rep[rows[last]], best_sim[rows[last]] = reps[last], sims[last]
+        matched = best_sim >= self.threshold
+        _, inverse, counts = np.unique(keys.ravel(), return_inverse=True, return_counts=True)
+        shared = (counts[inverse] > 1).reshape(keys.shape).any(axis=1)
+        self._reserve(base + len(titles))
+        rep_of = np.where(matched, best_rep, -1)
+        new_rows = []
+        batch_buckets = {}
+        # Posts sharing a band with another post of the batch may join a cluster started earlier in it.
+        for row in np.flatnonzero(shared).tolist():
+            candidates = set()
+            for k in keys[row].tolist():
+                candidates.update(batch_buckets.get(k, ()))
+            if candidates:
+                cands = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                sims = similarity(self.rep_sigs[cands], sigs[row])
+                if sims.max() >= self.threshold and sims.max() > best_sim[row]:
+                    rep_of[row] = cands[int(np.argmax(sims))]
+                    continue
+            if matched[row]: continue
+            rep_of[row] = base + len(new_rows)
+            self.rep_sigs[rep_of[row]] = sigs[row]
+            new_rows.append(row)
+            for k in keys[row].tolist():
+                batch_buckets.setdefault(k, []).append(rep_of[row])
+        # The rest match nothing: they start clusters of their own.
+        alone = np.flatnonzero(rep_of < 0)
+        rep_of[alone] = base + len(new_rows) + np.arange(len(alone))
+        new_rows = np.array(new_rows + alone.tolist(), dtype=np.int64)
+
+        self.rep_sigs[base:base + len(new_rows)] = sigs[new_rows]
+        new_ids = [post_keys[r] for r in new_rows.tolist()]
+        self.rep_ids.extend(new_ids)
+        if len(new_rows):
+            self._add_segment(keys[new_rows].ravel(), np.repeat(base + np.arange(len(new_rows)), self.bands))
+        clusters = [self.rep_ids[r] for r in rep_of.tolist()]
+        self.known.update(zip(post_keys, clusters))
+        if self.conn is not None:
+            with self.conn:
+                self.conn.executemany("INSERT INTO reps (rep, cluster_id, signature) VALUES (?, ?, ?)",
+                                      [(base + i, cid, sigs[r].tobytes()) for i, (cid, r) in
+                                       enumerate(zip(new_ids, new_rows.tolist()))])
+                self.conn.executemany("INSERT OR REPLACE INTO posts (post_key, cluster_id) VALUES (?, ?)",
+                                      zip(post_keys, clusters))
+
+    def close(self) -> None:
+        if self.conn is not None: self.conn.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate and cross-posted titles in scraped output.")
+    parser.add_argument(
+        "--outdir",
+        default="output",
+        help="Root output directory written by reddit_scraper.py, any --format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help="SQLite index to extend and keep (the file reddit_scraper.py --near-dupes uses); default: in memory.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Estimated title Jaccard similarity needed to join a cluster (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_CLUSTERS,
+        help="Largest clusters to list (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Rewrite every saved app with cluster_id on each post, in the format it was saved in.",
+    )
+    return parser.parse_args()
+
+def load_saved_apps(outdir: str) -> list[tuple[dict, str]]:
+    """(result, format) for every saved app; compact formats win over an older legacy JSON of the same app."""
+    apps = []
+    for fp in saved_output_files(outdir):
+        if fp.endswith("_topics.json"):
+            with open(fp, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            apps.append(({k: v for k, v in data.items() if k != "discussions" and not k.endswith("_topics")}, "json"))
+            continue
+        meta, fmt, path = load_saved_meta(fp)
+        meta["posts"] = read_posts_file(path, fmt) if os.path.isfile(path) else []
+        apps.append((meta, fmt))
+    return apps
+
+def main() -> int:
+    args = parse_args()
+    if not 0 < args.threshold <= 1:
+        print("--threshold must be in (0, 1]")
+        return 1
+    apps = load_saved_apps(args.outdir)
+    if not apps:
+        print(f"No output files found under '{args.outdir}'")
+        return 1
+    try:
+        index = NearDupIndex(args.index, args.threshold)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"--index: {e}")
+        return 1
+    t0 = time.perf_counter()
+    members, titles = Counter(), {}
+    apps_of = {}
+    try:
+        for sub, fmt in apps:
+            assign_clusters(sub, index)
+            for post in sub["posts"]:
+                members[post.cluster_id] += 1
+                apps_of.setdefault(post.cluster_id, set()).add(sub.get("app_key"))
+                if post_key(post) == post.cluster_id: titles[post.cluster_id] = post.title
+            if args.write: save_scraped_data_per_app([sub], args.outdir, fmt)
+    finally:
+        index.close()
+    elapsed = time.perf_counter() - t0
+    total = sum(members.values())
+    dup_clusters = [c for c, n in members.items() if n > 1]
+    print(f"{total} posts from {len(apps)} apps -> {len(members)} clusters in {elapsed:.2f}s; "
+          f"{len(dup_clusters)} clusters hold {sum(members[c] for c in dup_clusters)} near-duplicate posts, "
+          f"{sum(len(apps_of[c]) > 1 for c in dup_clusters)} of them span several apps")
+    for cluster_id, n in members.most_common(args.top):
+        if n < 2: break
+        print(f"- {cluster_id:<12} {n:>5} posts  {len(apps_of[cluster_id]):>3} apps  {titles.get(cluster_id, '')[:80]}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
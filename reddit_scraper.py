@@ -10,6 +10,10 @@
 #    python reddit_scraper.py -a "Google Drive" "TikTok Studio" Uber
 # f) Custom limits/output directory
 #    python reddit_scraper.py -c communication --max-posts 100 --delay 1.5 --outdir output
+# g) Long-running daemon instead of cron (Ctrl-C/SIGTERM stops it; the schedule is kept in the state db)
+#    python reddit_scraper.py -c all --daemon --delay 2
+# h) Historical backfill past the ~1000-post listing cap
+#    python reddit_scraper.py -a Uber --backfill 2022-01-01..2024-01-01 --concurrency 4 --format jsonl.gz
 
 # reddit_scraper (flag)   
 # 1) -a, --app: Scrape specific apps only.
@@ -18,420 +22,54 @@
 # 4) --max-posts : Max posts per app source (default: 200).
 # 5) --delay : Delay between requests in seconds (default: 2.0).
 # 6) --outdir : Output directory for JSON/CSV (default: output).
-
+# 7) Requests: --concurrency, --pool-size, --timeout, --adaptive-rate, --oauth, --token-cache, --base-url
+# 8) Incremental runs and recovery: --since-last, --state-db, --resume, --cache, --cache-ttl, --cache-max-mb
+# 9) Output: --format, --export-views, --store, --comments, --comment-budget, --comment-workers,
+#    --near-dupes, --near-dupe-threshold, --write-queue, --fsync
+# 10) Workers and long runs: --queue, --enqueue, --lease, --coalesce, --daemon, --poll-target,
+#     --min-interval, --max-interval, --backfill, --backfill-window
+# 11) Diagnostics: --record, --metrics, --profile
+# Run with --help, or see README.md, for what each flag does and its default.
 
 import argparse
-import requests
-import json
-import csv
-import time
 import os
-import re
-from urllib.parse import urljoin
-from requests.exceptions import RequestException
+import signal
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+try:
+    import near_dupes
+except ImportError:  # optional: only needed for --near-dupes (requires numpy)
+    near_dupes = None
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for --format parquet/arrow
+    pa = None
+try:
+    import zstandard
+except ImportError:  # optional: only needed for --format jsonl.zst
+    zstandard = None
+
+from scraper.apps import VALID_CATEGORIES, build_targets
+from scraper.backfill import DEFAULT_BACKFILL_WINDOW_DAYS, TimeRangeIgnored, backfill, parse_backfill_range
+from scraper.cache import DEFAULT_CACHE_MAX_MB, DEFAULT_CACHE_TTL_SECONDS, FixtureRecorder, ResponseCache
+from scraper.comments import DEFAULT_COMMENT_BUDGET, DEFAULT_COMMENT_WORKERS, CommentHarvester
+from scraper.daemon import DEFAULT_MAX_INTERVAL_SECONDS, DEFAULT_MIN_INTERVAL_SECONDS, DEFAULT_POLL_TARGET, run_daemon
+from scraper.metrics import METRICS, PROFILE_NAMES, profiled
+from scraper.oauth import OAUTH_TOKENS_NAME, OAUTH_TOKEN_PATH, REDDIT_OAUTH_URL, load_identities
+from scraper.output import OUTPUT_FORMATS
+from scraper.scrape import DEFAULT_COALESCE, DEFAULT_CONCURRENCY, run_worker, scrape_reddit
+from scraper.state import MANIFEST_NAME, STATE_DB_NAME, RunManifest, StateStore
+from scraper.store import open_store
+from scraper.transport import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT_SECONDS, REDDIT_BASE_URL, transport_for_delay
+from scraper.workqueue import DEFAULT_LEASE_SECONDS, MemoryWorkQueue, default_worker_id, open_queue
+from scraper.writer import DEFAULT_WRITE_QUEUE, RunWriter
 
-UA_BROWSER = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/124.0.0.0 Safari/537.36"
-)
 
-MAX_REDDIT_PAGE_SIZE = 100
 DEFAULT_MAX_POSTS = 200
 DEFAULT_DELAY_SECONDS = 2.0
 DEFAULT_OUTDIR = "output"
-MAX_RETRIES = 3
-
-
-def norm_app(name: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", name.lower())
-
-def norm_label(s: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", s.lower())
-
-def sanitize_filename(s: str) -> str:
-    return re.sub(r"[^a-zA-Z0-9._-]+", "_", s).strip("_")
-
-def sanitize_dirname(s: str) -> str:
-    return re.sub(r"[^a-zA-Z0-9._ -]+", "_", s).strip().strip("_")
-
-def key_for_app(app_key: str) -> str:
-    return f"{app_key}_topics"
-
-def derive_title_from_permalink(permalink: str) -> str:
-    parts = permalink.split("/")
-    if "comments" in parts:
-        i = parts.index("comments")
-        if len(parts) > i + 2:
-            return parts[i + 2].replace("-", " ").replace("_", " ").strip() or "Untitled"
-    return "Untitled"
-
-APP_INFO = {
-    # Productivity App
-    norm_app("Google Drive"):                 {"category": "Productivity", "sub": "googleworkspace"},
-    norm_app("Google Docs"):                  {"category": "Productivity", "sub": "googledocs"},
-    norm_app("CAmScanner"):                   {"category": "Productivity", "search": "CamScanner"},
-    norm_app("Google Gemini"):                {"category": "Productivity", "sub": "GoogleGeminiAI"},
-    norm_app("Google Sheets"):                {"category": "Productivity", "sub": "googlesheets"},
-    norm_app("Microsoft Word: Edit Documents"): {"category": "Productivity", "sub": "MicrosoftWord"},
-    norm_app("ChatGPT"):                      {"category": "Productivity", "sub": "ChatGPT"},
-    norm_app("Perplexity"):                   {"category": "Productivity", "sub": "perplexity_ai"},
-    norm_app("Adobe Acrobat Reader"):         {"category": "Productivity", "sub": "Acrobat"},
-
-    # Social networking (Pinterest default lives under Share photos & videos)
-    norm_app("Facebook"):                     {"category": "Social networking", "sub": "facebook"},
-    norm_app("Pinterest"):                    {"category": "Share photos & videos", "sub": "Pinterest"},
-    norm_app("Reddit"):                       {"category": "Social networking", "sub": "reddit"},
-    norm_app("SnapChat"):                     {"category": "Social networking", "sub": "snapchat"},
-    norm_app("telegram"):                     {"category": "Social networking", "sub": "Telegram"},
-    norm_app("Signal"):                       {"category": "Social networking", "sub": "signal"},
-    norm_app("Ok: Social network"):           {"category": "Social networking", "sub": "okru"},
-
-    # Communication
-    norm_app("Zoom"):                         {"category": "Communication", "sub": "Zoom"},
-    norm_app("Discord"):                      {"category": "Communication", "sub": "discordapp"},
-    norm_app("imo"):                          {"category": "Communication", "search": "imo app"},
-    norm_app("Viber"):                        {"category": "Communication", "sub": "viber"},
-    norm_app("WhatsApp"):                     {"category": "Communication", "sub": "WhatsApp"},
-    norm_app("Facebook Messenger"):           {"category": "Communication", "sub": "FacebookMessenger"},
-    norm_app("Google Meet"):                  {"category": "Communication", "sub": "GoogleMeet"},
-    norm_app("Ms Teams"):                     {"category": "Communication", "sub": "MicrosoftTeams"},
-
-    # Share photos & videos
-    norm_app("TickTock Live"):                {"category": "Share photos & videos", "sub": "TikTok"},
-    norm_app("TikTok Studio"):                {"category": "Share photos & videos", "sub": "TikTokhelp"},
-    norm_app("Bigo Live"):                    {"category": "Share photos & videos", "sub": "BIGOLIVE"},
-    norm_app("Moj: short Drame and Reels"):   {"category": "Share photos & videos", "search": "Moj app"},
-    norm_app("Likee"):                        {"category": "Share photos & videos", "sub": "Likee"},
-    norm_app("Twitch"):                       {"category": "Share photos & videos", "sub": "Twitch"},
-    norm_app("Threads"):                      {"category": "Share photos & videos", "sub": "ThreadsApp"},
-
-    # Travel & local
-    norm_app("Uber"):                         {"category": "Travel & local", "sub": "uber"},
-    norm_app("Rapido"):                       {"category": "Travel & local", "search": "Rapido app"},
-    norm_app("Booking.com"):                  {"category": "Travel & local", "sub": "Bookingcom"},
-    norm_app("Airbnd"):                       {"category": "Travel & local", "sub": "AirBnB"},
-    norm_app("InDrive"):                      {"category": "Travel & local", "sub": "Indrive"},
-    norm_app("ConfirmTKt"):                   {"category": "Travel & local", "search": "ConfirmTkt"},
-    norm_app("train booking ap"):             {"category": "Travel & local", "sub": "IRCTC"},
-    norm_app("redBus book Bus"):              {"category": "Travel & local", "sub": "redbus"},
-}
-
-CATEGORY_LISTS = {
-    "Productivity": [
-        "Google Drive","Google Docs","CAmScanner","Google Gemini","Google Sheets",
-        "Microsoft Word: Edit Documents","ChatGPT","Perplexity","Adobe Acrobat Reader",
-    ],
-    "Social networking": [
-        "Facebook","Pinterest","Reddit","SnapChat","telegram","Signal","Ok: Social network",
-    ],
-    "Communication": [
-        "Zoom","Discord","imo","Viber","WhatsApp","Facebook Messenger","Google Meet","Ms Teams",
-    ],
-    "Share photos & videos": [
-        "Pinterest","TickTock Live","TikTok Studio","Bigo Live",
-        "Moj: short Drame and Reels","Likee","Twitch","Threads",
-    ],
-    "Travel & local": [
-        "Uber","Rapido","Booking.com","Airbnd","InDrive","ConfirmTKt","train booking ap","redBus book Bus",
-    ],
-}
-VALID_CATEGORIES = list(CATEGORY_LISTS.keys())
-CATEGORY_NORM_TO_CANON = {norm_label(c): c for c in VALID_CATEGORIES}
-CATEGORY_ALIASES = {
-    "social": "Social networking",
-    "socialnetworking": "Social networking",
-    "sharephotosvideos": "Share photos & videos",
-    "sharephotosandvideos": "Share photos & videos",
-    "travellocal": "Travel & local",
-    "travelandlocal": "Travel & local",
-    "communication": "Communication",
-    "productivity": "Productivity",
-    "all": "*",
-    "*": "*",
-}
-
-
-def fetch_subreddit_posts(subreddit_slug: str, max_posts: int, delay_seconds: float) -> list[dict]:
-    headers = {"User-Agent": UA_BROWSER, "Accept": "application/json"}
-    base_url = f"https://www.reddit.com/r/{subreddit_slug}/.json"
-    posts, after = [], None
-    while len(posts) < max_posts:
-        limit = min(MAX_REDDIT_PAGE_SIZE, max_posts - len(posts))
-        params = {"limit": limit}
-        if after: params["after"] = after
-        for attempt in range(MAX_RETRIES):
-            try:
-                resp = requests.get(base_url, headers=headers, params=params, timeout=15)
-                if resp.status_code == 429 or 500 <= resp.status_code < 600:
-                    wait = delay_seconds * (attempt + 1)
-                    print(f"Transient HTTP {resp.status_code} on r/{subreddit_slug}; sleeping {wait:.1f}s...")
-                    time.sleep(wait)
-                    continue
-                resp.raise_for_status()
-                break
-            except RequestException as e:
-                if attempt == MAX_RETRIES - 1:
-                    raise RuntimeError(f"Request failed scraping r/{subreddit_slug}: {e}") from e
-                wait = delay_seconds * (attempt + 1)
-                print(f"Request error on r/{subreddit_slug}; sleeping {wait:.1f}s...")
-                time.sleep(wait)
-        else:
-            raise RuntimeError(f"Failed after {MAX_RETRIES} retries scraping r/{subreddit_slug}")
-        payload = resp.json()
-        children = payload.get("data", {}).get("children", [])
-        if not children: break
-        for child in children:
-            d = child.get("data") or {}
-            permalink = urljoin("https://www.reddit.com", d.get("permalink", ""))
-            title = d.get("title") or derive_title_from_permalink(permalink)
-            posts.append({
-                "title": title, "url": permalink, "score": d.get("score"),
-                "num_comments": d.get("num_comments"), "created_utc": d.get("created_utc"),
-                "author": d.get("author"), "subreddit": d.get("subreddit", subreddit_slug),
-                "subreddit_name_prefixed": d.get("subreddit_name_prefixed", f"r/{subreddit_slug}"),
-                "id": d.get("id"),
-            })
-            if len(posts) >= max_posts: break
-        after = payload.get("data", {}).get("after")
-        if not after: break
-        time.sleep(delay_seconds)
-    return posts
-
-def fetch_search_posts(query: str, max_posts: int, delay_seconds: float) -> list[dict]:
-    headers = {"User-Agent": UA_BROWSER, "Accept": "application/json"}
-    base_url = "https://www.reddit.com/search.json"
-    posts, after = [], None
-    while len(posts) < max_posts:
-        limit = min(MAX_REDDIT_PAGE_SIZE, max_posts - len(posts))
-        params = {"q": query, "limit": limit}
-        if after: params["after"] = after
-        for attempt in range(MAX_RETRIES):
-            try:
-                resp = requests.get(base_url, headers=headers, params=params, timeout=15)
-                if resp.status_code == 429 or 500 <= resp.status_code < 600:
-                    wait = delay_seconds * (attempt + 1)
-                    print(f"Transient HTTP {resp.status_code} on search '{query}'; sleeping {wait:.1f}s...")
-                    time.sleep(wait)
-                    continue
-                resp.raise_for_status()
-                break
-            except RequestException as e:
-                if attempt == MAX_RETRIES - 1:
-                    raise RuntimeError(f"Request failed searching '{query}': {e}") from e
-                wait = delay_seconds * (attempt + 1)
-                print(f"Request error on search '{query}'; sleeping {wait:.1f}s...")
-                time.sleep(wait)
-        else:
-            raise RuntimeError(f"Failed after {MAX_RETRIES} retries searching '{query}'")
-        payload = resp.json()
-        children = payload.get("data", {}).get("children", [])
-        if not children: break
-        for child in children:
-            d = child.get("data") or {}
-            permalink = urljoin("https://www.reddit.com", d.get("permalink", ""))
-            title = d.get("title") or derive_title_from_permalink(permalink)
-            posts.append({
-                "title": title, "url": permalink, "score": d.get("score"),
-                "num_comments": d.get("num_comments"), "created_utc": d.get("created_utc"),
-                "author": d.get("author"), "subreddit": d.get("subreddit"),
-                "subreddit_name_prefixed": d.get("subreddit_name_prefixed"), "id": d.get("id"),
-            })
-            if len(posts) >= max_posts: break
-        after = payload.get("data", {}).get("after")
-        if not after: break
-        time.sleep(delay_seconds)
-    return posts
-
-
-def scrape_one_target(app_key: str, info: dict, max_posts: int, delay_seconds: float) -> dict:
-    if "sub" in info:
-        slug = info["sub"]
-        print(f"Scraping r/{slug} (up to {max_posts} posts)...")
-        posts = fetch_subreddit_posts(slug, max_posts, delay_seconds)
-        display_name = posts[0].get("subreddit", slug) if posts else slug
-        title = posts[0].get("subreddit_name_prefixed", f"r/{slug}") if posts else f"r/{slug}"
-        source_url = f"https://www.reddit.com/r/{slug}/"
-        mode, source = "subreddit", slug
-    else:
-        query = info["search"]
-        print(f"Searching Reddit for '{query}' (up to {max_posts} posts)...")
-        posts = fetch_search_posts(query, max_posts, delay_seconds)
-        display_name = f"Search: {query}"
-        title = f"Search: {query}"
-        source_url = f"https://www.reddit.com/search/?q={requests.utils.quote(query)}"
-        mode, source = "search", query
-
-    data = {
-        "app_key": app_key,
-        "category": info.get("category", "Uncategorized"),
-        "mode": mode,
-        "source": source,
-        "url": source_url,
-        "title": title,
-        "subreddit": display_name,
-        "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "total_posts_collected": len(posts),
-    }
-
-    topics_key = key_for_app(app_key)
-    topics, discussions, seen = [], [], set()
-    for post in posts:
-        permalink = post.get("url", "")
-        if not permalink or permalink in seen: continue
-        seen.add(permalink)
-        ptitle = (post.get("title") or "Untitled").strip() or "Untitled"
-        discussions.append({
-            "title": ptitle, "url": permalink, "type": "discussion",
-            "score": post.get("score"), "num_comments": post.get("num_comments"),
-            "created_utc": post.get("created_utc"), "author": post.get("author"),
-            "post_subreddit": post.get("subreddit"),
-        })
-        topics.append({
-            "title": ptitle, "type": f"{app_key}_topic", "post_url": permalink,
-            "score": post.get("score"), "num_comments": post.get("num_comments"),
-            "created_utc": post.get("created_utc"), "post_subreddit": post.get("subreddit"),
-        })
-    data[topics_key] = topics
-    data["discussions"] = discussions
-    data["posts"] = posts
-    return data
-
-def canonical_category(label: str) -> str | list[str] | None:
-    nk = norm_label(label)
-    if nk in CATEGORY_NORM_TO_CANON: return CATEGORY_NORM_TO_CANON[nk]
-    if nk in CATEGORY_ALIASES:
-        canon = CATEGORY_ALIASES[nk]
-        return VALID_CATEGORIES if canon == "*" else canon
-    return None
-
-def build_targets_from_categories(categories: list[str]) -> list[tuple[str, dict]]:
-    # Expand categories (aliases + '*' support)
-    expanded = []
-    for c in categories:
-        canon = canonical_category(c)
-        if canon is None:
-            print(f"Unknown category '{c}'")
-            continue
-        if isinstance(canon, list):  # '*' expanded
-            expanded.extend(canon)
-        else:
-            expanded.append(canon)
-
-    targets, seen = [], set()
-    for cat in expanded:
-        app_names = CATEGORY_LISTS.get(cat, [])
-        for display in app_names:
-            app_key = norm_app(display)
-            base_info = APP_INFO.get(app_key)
-            if not base_info:
-                print(f"Skipping unknown app '{display}' in category '{cat}'")
-                continue
-            info = dict(base_info)
-            info["category"] = cat  # override to requested cat
-            sig = (app_key, cat)
-            if sig not in seen:
-                targets.append((app_key, info))
-                seen.add(sig)
-    return targets
-
-def build_targets_from_apps(apps: list[str]) -> list[tuple[str, dict]]:
-    targets, seen = [], set()
-    for name in apps:
-        key = norm_app(name)
-        if key in APP_INFO:
-            info = APP_INFO[key]
-            sig = (key, info.get("category",""))
-            if sig not in seen:
-                targets.append((key, info))
-                seen.add(sig)
-        else:
-            print(f"Skipping unknown app '{name}' (normalized '{key}')")
-    return targets
-
-def scrape_reddit(selected_apps: list[str], selected_categories: list[str], max_posts: int, delay_seconds: float) -> list[dict]:
-    targets = []
-    if selected_categories:
-        targets.extend(build_targets_from_categories(selected_categories))
-    if selected_apps:
-        targets.extend(build_targets_from_apps(selected_apps))
-    if not selected_apps and not selected_categories:
-        targets = [(k, v) for k, v in APP_INFO.items()]
-        targets.sort(key=lambda kv: (kv[1].get("category",""), kv[0]))
-    if not targets:
-        print("No valid targets.")
-        return []
-
-    deduped, seen = [], set()
-    for app_key, info in targets:
-        # Deduplicate per source so apps listed in multiple categories are scraped only once.
-        sig = (app_key, info.get("sub"), info.get("search"))
-        if sig in seen: continue
-        seen.add(sig); deduped.append((app_key, info))
-
-    results = []
-    for app_key, info in deduped:
-        try:
-            result = scrape_one_target(app_key, info, max_posts, delay_seconds)
-            results.append(result)
-            topics_key = key_for_app(app_key)
-            topics_count = len(result.get(topics_key, []))
-            discussions_count = len(result.get("discussions", []))
-            posts_count = result.get("total_posts_collected", 0)
-            print(
-                f"Collected for {app_key}: "
-                f"{posts_count} posts, {topics_count} topics, {discussions_count} discussions"
-            )
-        except Exception as e:
-            print(f"ERROR ({app_key}): {e}")
-        time.sleep(delay_seconds)
-    return results
-
-
-def save_scraped_data_per_app(data: list[dict], outdir: str) -> None:
-    if not data:
-        print("No data"); return
-    for sub in data:
-        category_label = sub.get("category", "Uncategorized")
-        app_key = sub.get("app_key", "unknown")
-        cat_dir = os.path.join(outdir, sanitize_dirname(category_label))
-        os.makedirs(cat_dir, exist_ok=True)
-        base = sanitize_filename(app_key)
-        json_name = os.path.join(cat_dir, f"{base}_topics.json")
-        csv_name = os.path.join(cat_dir, f"{base}_topics.csv")
-
-        try:
-            with open(json_name, "w", encoding="utf-8") as f:
-                json.dump(sub, f, indent=2, ensure_ascii=True)
-            print(f"Saved JSON -> {json_name}")
-        except Exception as e:
-            print("ERROR (JSON):", e)
-
-        try:
-            with open(csv_name, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["App Key","Category","Type","Title","URL","Post Subreddit","Scraped At"])
-                scraped_at = sub.get("scraped_at", "")
-                category = sub.get("category", "")
-                app = sub.get("app_key", "")
-                for k, v in sub.items():
-                    if k.endswith("_topics") and isinstance(v, list):
-                        for topic in v:
-                            w.writerow([
-                                app, category, topic.get("type",""),
-                                topic.get("title",""), topic.get("post_url",""),
-                                topic.get("post_subreddit",""), scraped_at,
-                            ])
-                for d in sub.get("discussions", []):
-                    w.writerow([
-                        app, category, d.get("type",""),
-                        d.get("title",""), d.get("url",""),
-                        d.get("post_subreddit",""), scraped_at,
-                    ])
-            print(f"Saved CSV  -> {csv_name}")
-        except Exception as e:
-            print("ERROR (CSV):", e)
-
 
 def _flatten_commas(seq):
     """Only split on commas; keep spaces/& intact (fix for quoted categories)."""
@@ -454,6 +92,83 @@ def main() -> None:
                         help="Delay between requests (seconds) (default: %(default)s)")
     parser.add_argument("--outdir", type=str, default=DEFAULT_OUTDIR,
                         help="Root output directory (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Targets scraped in parallel; --delay still caps total requests/sec (default: %(default)s)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Keep-alive connections kept per host (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help="Per-request timeout in seconds (default: %(default)s)")
+    parser.add_argument("--since-last", action="store_true",
+                        help="Incremental run: stop at already-seen posts and merge new ones into existing output.")
+    parser.add_argument("--state-db", type=str, default=None,
+                        help=f"State store used by --since-last and --daemon (default: <outdir>/{STATE_DB_NAME})")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="SQLite file used as an on-disk response cache (default: disabled)")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL_SECONDS,
+                        help="Seconds a cached response is reused before revalidation (default: %(default)s)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_MB,
+                        help="Cache size cap in MB, evicted least-recently-used first (default: %(default)s)")
+    parser.add_argument("--adaptive-rate", action="store_true",
+                        help="Pace requests from X-Ratelimit-* headers; --delay only applies until they arrive.")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Resume the last run from <outdir>/{MANIFEST_NAME}: skip finished targets, continue partial ones. "
+                             "Every normal run keeps this checkpoint, so any interrupted run can be resumed.")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                        help="Output format; all but json store each post once in <app>_posts.<format> (default: %(default)s)")
+    parser.add_argument("--export-views", action="store_true",
+                        help="With a compact --format, also export the topic/discussion CSV views.")
+    parser.add_argument("--store", type=str, default=None,
+                        help="Also upsert posts into a consolidated store, e.g. sqlite:output/posts.db")
+    parser.add_argument("--comments", action="store_true",
+                        help="After the listings, fetch comment trees for the most-commented posts.")
+    parser.add_argument("--comment-budget", type=int, default=DEFAULT_COMMENT_BUDGET,
+                        help="Max comments fetched per run with --comments (default: %(default)s)")
+    parser.add_argument("--comment-workers", type=int, default=DEFAULT_COMMENT_WORKERS,
+                        help="Threads fetched in parallel with --comments (default: %(default)s)")
+    parser.add_argument("--base-url", type=str, default=REDDIT_BASE_URL,
+                        help="Host to scrape, e.g. a local fake_reddit.py server (default: %(default)s)")
+    parser.add_argument("--record", type=str, default=None,
+                        help="Save every successful response as a replay fixture in this directory.")
+    parser.add_argument("--metrics", type=str, default=None,
+                        help="Write run metrics to this file at the end of the run: JSON, or Prometheus text format for *.prom")
+    parser.add_argument("--profile", choices=sorted(PROFILE_NAMES), default=None,
+                        help="Profile the run: cprofile (main thread) or sample (stack samples of every thread)")
+    parser.add_argument("--queue", type=str, default=None,
+                        help="Shared work queue, e.g. sqlite:queue.db; without --enqueue this process drains it as a worker")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="Coordinator mode: add the selected targets to --queue and exit.")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Seconds a claimed target stays leased without a heartbeat (default: %(default)s)")
+    parser.add_argument("--coalesce", type=int, default=DEFAULT_COALESCE,
+                        help="Fetch up to N subreddits per r/a+b+c listing; searches are not combined (default: %(default)s = off)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep polling incrementally; each source is polled as often as its posting rate warrants.")
+    parser.add_argument("--poll-target", type=int, default=DEFAULT_POLL_TARGET,
+                        help="New posts a --daemon poll aims to find (default: %(default)s)")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL_SECONDS,
+                        help="Shortest time between polls of one source, in seconds (default: %(default)s)")
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL_SECONDS,
+                        help="Longest time between polls of one source, in seconds (default: %(default)s)")
+    parser.add_argument("--backfill", type=str, default=None, metavar="FROM..TO",
+                        help="Fetch every post created in FROM..TO (YYYY-MM-DD or epoch seconds, TO exclusive) in "
+                             "parallel time windows; --max-posts does not apply. Needs timestamp: search support, "
+                             "which reddit.com's public search no longer has (the run stops if the range is ignored)")
+    parser.add_argument("--backfill-window", type=float, default=DEFAULT_BACKFILL_WINDOW_DAYS,
+                        help="Initial --backfill window in days; windows that hit the listing cap are split (default: %(default)s)")
+    parser.add_argument("--near-dupes", type=str, default=None, metavar="PATH",
+                        help="SQLite near-duplicate index; tag each saved post with its title cluster_id (default: off)")
+    parser.add_argument("--near-dupe-threshold", type=float, default=0.7,
+                        help="Estimated title Jaccard similarity needed to join a --near-dupes cluster (default: %(default)s)")
+    parser.add_argument("--write-queue", type=int, default=DEFAULT_WRITE_QUEUE,
+                        help="Finished targets buffered for a background writer thread, whose log lines then come out in "
+                             "completion order; 0 writes inline, keeping the log target-ordered (default: %(default)s)")
+    parser.add_argument("--fsync", type=int, default=0, metavar="N",
+                        help="fsync output before renaming it into place, N targets per batch (default: 0 = off)")
+    parser.add_argument("--oauth", type=str, default=None, metavar="PATH",
+                        help="JSON list of OAuth credentials {client_id, client_secret[, username, password]}; "
+                             "requests are balanced across them, each with its own rate budget")
+    parser.add_argument("--token-cache", type=str, default=None,
+                        help="File the --oauth access tokens are cached in (default: <outdir>/%s)" % OAUTH_TOKENS_NAME)
     args = parser.parse_args()
 
     if args.list_categories:
@@ -471,20 +186,154 @@ def main() -> None:
         parser.error("--max-posts must be a positive integer")
     if args.delay < 0:
         parser.error("--delay cannot be negative")
+    if args.concurrency <= 0:
+        parser.error("--concurrency must be a positive integer")
+    if args.pool_size <= 0:
+        parser.error("--pool-size must be a positive integer")
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.cache_ttl < 0:
+        parser.error("--cache-ttl cannot be negative")
+    if args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be a positive integer")
+    if args.comment_budget <= 0:
+        parser.error("--comment-budget must be a positive integer")
+    if args.comment_workers <= 0:
+        parser.error("--comment-workers must be a positive integer")
+    if args.format in ("parquet", "arrow") and pa is None:
+        parser.error(f"--format {args.format} requires the 'pyarrow' package")
+    if args.format.endswith(".zst") and zstandard is None:
+        parser.error(f"--format {args.format} requires the 'zstandard' package")
+    if urlparse(args.base_url).scheme not in ("http", "https"):
+        parser.error("--base-url must be an http(s) URL")
+    if args.enqueue and not args.queue:
+        parser.error("--enqueue requires --queue")
+    if args.queue and args.resume:
+        parser.error("--resume cannot be combined with --queue (the queue tracks progress itself)")
+    if args.lease <= 0:
+        parser.error("--lease must be positive")
+    if args.coalesce <= 0:
+        parser.error("--coalesce must be a positive integer")
+    if args.coalesce > 1 and (args.since_last or args.queue or args.daemon):
+        parser.error("--coalesce cannot be combined with --since-last, --queue or --daemon")
+    if args.daemon and (args.queue or args.resume or args.comments):
+        parser.error("--daemon cannot be combined with --queue, --resume or --comments")
+    if args.poll_target <= 0:
+        parser.error("--poll-target must be a positive integer")
+    if args.min_interval <= 0 or args.max_interval < args.min_interval:
+        parser.error("--min-interval must be positive and no larger than --max-interval")
+    backfill_range = None
+    if args.backfill:
+        try:
+            backfill_range = parse_backfill_range(args.backfill)
+        except ValueError as e:
+            parser.error(f"--backfill: {e}")
+        if args.since_last or args.daemon or args.queue or args.resume or args.coalesce > 1:
+            parser.error("--backfill cannot be combined with --since-last, --daemon, --queue, --resume or --coalesce")
+    if args.backfill_window <= 0:
+        parser.error("--backfill-window must be positive")
+    if args.near_dupes and near_dupes is None:
+        parser.error("--near-dupes requires the 'numpy' package")
+    if not 0 < args.near_dupe_threshold <= 1:
+        parser.error("--near-dupe-threshold must be in (0, 1]")
+    if args.write_queue < 0:
+        parser.error("--write-queue cannot be negative")
+    if args.fsync < 0:
+        parser.error("--fsync cannot be negative")
+    identities = None
+    if args.oauth:
+        # Against reddit.com the API host differs from the token host; a --base-url (fake_reddit.py) serves both.
+        token_url = (REDDIT_BASE_URL if args.base_url == REDDIT_BASE_URL else args.base_url.rstrip("/")) + OAUTH_TOKEN_PATH
+        if args.base_url == REDDIT_BASE_URL: args.base_url = REDDIT_OAUTH_URL
+        try:
+            identities = load_identities(args.oauth, token_url,
+                                         args.token_cache or os.path.join(args.outdir, OAUTH_TOKENS_NAME), args.delay)
+        except (OSError, ValueError) as e:
+            parser.error(f"--oauth: {e}")
 
-    data = scrape_reddit(selected_apps, selected_categories, args.max_posts, args.delay)
+    queue = None
+    if args.queue:
+        try:
+            queue = open_queue(args.queue)
+        except (ValueError, sqlite3.Error) as e:
+            parser.error(f"--queue: {e}")
+        if isinstance(queue, MemoryWorkQueue):
+            parser.error("--queue memory: only lives inside one process; use sqlite:PATH")
+    if args.enqueue:
+        targets = build_targets(selected_apps, selected_categories)
+        print(f"Enqueued {queue.enqueue(targets)} targets -> {args.queue} {queue.counts()}")
+        queue.close()
+        return
 
-    if data:
-        total_topics = 0
-        total_discussions = 0
-        for sub in data:
-            topic_lists = [v for k, v in sub.items() if k.endswith("_topics") and isinstance(v, list)]
-            total_topics += sum(len(lst) for lst in topic_lists)
-            total_discussions += len(sub.get("discussions", []))
-        print(f"\nTotal: {total_topics} Topics, {total_discussions} Discussions")
-        save_scraped_data_per_app(data, args.outdir)
-    else:
-        print("There is no data returned!")
+    try:
+        store = open_store(args.store) if args.store else None
+    except (ValueError, sqlite3.Error) as e:
+        parser.error(f"--store: {e}")
+    try:
+        dedup = near_dupes.NearDupIndex(args.near_dupes, args.near_dupe_threshold) if args.near_dupes else None
+    except (ValueError, sqlite3.Error) as e:
+        parser.error(f"--near-dupes: {e}")
+
+    cache = ResponseCache(args.cache, args.cache_ttl, args.cache_max_mb * 1024 * 1024) if args.cache else None
+    pool_size = max(args.pool_size, args.concurrency, args.comment_workers if args.comments else 0)
+    recorder = FixtureRecorder(args.record) if args.record else None
+    transport = transport_for_delay(args.delay, pool_size, args.timeout, cache,
+                                    args.adaptive_rate, args.base_url, recorder, identities)
+    transport.revalidate_heads = args.since_last or args.daemon
+    state_db = args.state_db or os.path.join(args.outdir, STATE_DB_NAME)
+    state = StateStore(state_db) if args.since_last or args.daemon else None
+    manifest = RunManifest(args.outdir, resume=args.resume) if queue is None and not (args.daemon or args.backfill) else None
+    harvester = CommentHarvester(transport, args.outdir, args.delay, args.comment_budget, args.comment_workers,
+                                 store) if args.comments else None
+    writer = RunWriter(args.outdir, state, args.format, args.export_views, store, harvester, dedup,
+                       args.write_queue, args.fsync)
+    if args.profile == "cprofile" and args.concurrency > 1:
+        print("Note: cprofile only sees the main thread; use --profile sample with --concurrency > 1")
+    METRICS.reset()
+    try:
+        with profiled(args.profile, args.outdir):
+            if queue is not None:
+                worker_id = default_worker_id()
+                done = run_worker(queue, args.max_posts, args.delay, args.concurrency, transport, state, writer,
+                                  worker_id, args.lease)
+                print(f"Worker {worker_id} completed {done} targets; queue {queue.counts()}")
+            elif args.daemon:
+                stop = threading.Event()
+                def request_stop(signum, frame) -> None:
+                    if not stop.is_set(): print("Stopping: finishing the polls in flight...")
+                    stop.set()
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    signal.signal(sig, request_stop)
+                polls = run_daemon(build_targets(selected_apps, selected_categories), args.max_posts, args.delay,
+                                   transport, state, writer, args.concurrency, args.poll_target,
+                                   args.min_interval, args.max_interval, stop)
+                print(f"Daemon stopped after {polls} polls; schedule saved in {state_db}")
+            elif backfill_range is not None:
+                try:
+                    backfill(build_targets(selected_apps, selected_categories), *backfill_range,
+                             args.backfill_window * 86400, args.delay, args.concurrency, transport, writer)
+                except TimeRangeIgnored as e:
+                    parser.error(f"--backfill: {e}")
+            else:
+                scrape_reddit(selected_apps, selected_categories, args.max_posts, args.delay,
+                              args.concurrency, transport, state, manifest, writer, args.coalesce)
+            writer.close()
+            writer.summarize()
+            if harvester is not None: harvester.run()
+        if cache is not None: print(cache.summary())
+        if recorder is not None: print(f"Recorded {recorder.saved} fixtures -> {args.record}")
+        if identities is not None: print(identities.summary())
+    finally:
+        # Targets still queued for writing are saved before the stores they update are closed.
+        writer.close()
+        transport.close()
+        if state is not None: state.close()
+        if store is not None: store.close()
+        if dedup is not None: dedup.close()
+        if queue is not None: queue.close()
+        if args.metrics:
+            METRICS.write(args.metrics)
+            print(f"Metrics -> {args.metrics}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,419 @@
+# report (analytics over scraped output)
+# a) Per-app and per-category stats plus a daily timeline for everything under output/
+#    python report.py --outdir output
+# b) Weekly buckets, top 10 authors, JSON and CSV summaries
+#    python report.py --bucket week --top-authors 10 --json report.json --csv report.csv
+# c) Keep a columnar snapshot so later reports skip re-parsing the JSON output (rebuilt when the output changes)
+#    python report.py --snapshot output/.report_snapshot.npz
+# d) Report on a consolidated store written with reddit_scraper.py --store sqlite:PATH
+#    python report.py --db output/posts.db
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from array import array
+from collections.abc import Iterable
+
+try:
+    import numpy as np
+except ImportError:  # required here; reported by main()
+    np = None
+
+from scraper.files import iter_jsonl, load_saved_meta, pa, pq, saved_output_files
+
+BUCKET_UNITS = {"hour": "h", "day": "D", "week": "W", "month": "M"}
+DEFAULT_TOP_AUTHORS = 5
+PERCENTILES = {"p50": 0.5, "p90": 0.9}
+IGNORED_AUTHORS = ("", "[deleted]")
+MIN_SPAN_SECONDS = 3600.0  # floor for the posting-rate span, so a burst of posts is not read as thousands/day
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday; numpy's datetime64[W] weeks start on that weekday
+COLUMN_NAMES = ("group", "author", "created_utc", "score", "num_comments")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Summarize scraped Reddit output per app, category and time bucket.")
+    parser.add_argument(
+        "--outdir",
+        default="output",
+        help="Root output directory written by reddit_scraper.py, any --format (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        help="Read a consolidated SQLite store (reddit_scraper.py --store sqlite:PATH) instead of --outdir.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="Columnar .npz snapshot of the loaded posts; reused while the --outdir files are unchanged.",
+    )
+    parser.add_argument(
+        "--bucket",
+        choices=list(BUCKET_UNITS),
+        default="day",
+        help="Time bucket of the per-app timeline; weeks start on Monday (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--top-authors",
+        type=int,
+        default=DEFAULT_TOP_AUTHORS,
+        help="Most active authors listed per app and category (default: %(default)s)",
+    )
+    parser.add_argument("--json", default=None, help="Write the full summary (including the timeline) as JSON.")
+    parser.add_argument("--csv", default=None, help="Write the per-app and per-category rows as CSV.")
+    return parser.parse_args()
+
+
+class PostColumns:
+    """Posts as parallel NumPy arrays.
+
+    `group` indexes `groups` ((category, app_key) pairs) and `author` indexes `authors`;
+    `created_utc` is NaN where a post has no timestamp.
+    """
+
+    def __init__(self, groups: list[tuple[str, str]], authors: list[str], columns: dict):
+        self.groups = groups
+        self.authors = authors
+        self.group = columns["group"]
+        self.author = columns["author"]
+        self.created_utc = columns["created_utc"]
+        self.score = columns["score"]
+        self.num_comments = columns["num_comments"]
+
+    def __len__(self) -> int:
+        return len(self.group)
+
+    def save(self, path: str, signature: str) -> None:
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, signature=np.array(signature), categories=np.array([c for c, _ in self.groups], dtype=str),
+                 apps=np.array([a for _, a in self.groups], dtype=str), authors=np.array(self.authors, dtype=str),
+                 **{name: getattr(self, name) for name in COLUMN_NAMES})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, signature: str) -> "PostColumns | None":
+        """The snapshot at `path`, or None if it is missing or was taken from different files."""
+        if not os.path.exists(path): return None
+        with np.load(path, allow_pickle=False) as snap:
+            if str(snap["signature"]) != signature: return None
+            groups = list(zip(snap["categories"].tolist(), snap["apps"].tolist()))
+            return cls(groups, snap["authors"].tolist(), {name: snap[name] for name in COLUMN_NAMES})
+
+
+class ColumnBuilder:
+    """Accumulates posts into typed arrays, interning groups and authors as int32 codes."""
+
+    def __init__(self):
+        self.group_codes = {}
+        self.author_codes = {"": 0}
+        self.group = array("i")
+        self.author = array("i")
+        self.created_utc = array("d")
+        self.score = array("q")
+        self.num_comments = array("q")
+
+    def group_code(self, category: str, app_key: str) -> int:
+        return self.group_codes.setdefault((category, app_key), len(self.group_codes))
+
+    def add_posts(self, category: str, app_key: str, posts: Iterable[dict]) -> None:
+        g, authors, nan = self.group_code(category, app_key), self.author_codes, float("nan")
+        for p in posts:
+            author = p.get("author") or ""
+            code = authors.get(author)
+            if code is None: code = authors[author] = len(authors)
+            created = p.get("created_utc")
+            self.group.append(g)
+            self.author.append(code)
+            self.created_utc.append(nan if created is None else created)
+            self.score.append(p.get("score") or 0)
+            self.num_comments.append(p.get("num_comments") or 0)
+
+    def add_table(self, category: str, app_key: str, table) -> None:
+        """Columnar (parquet/arrow) posts: only each file's distinct authors go through Python."""
+        self.group.frombytes(np.full(table.num_rows, self.group_code(category, app_key), dtype=np.int32).tobytes())
+        encoded = table.column("author").combine_chunks().dictionary_encode()
+        names = encoded.dictionary.to_pylist()
+        # Map the file's author dictionary to global codes; the extra slot is for null authors.
+        local = np.array([self.author_codes.setdefault(a or "", len(self.author_codes)) for a in names] + [0],
+                         dtype=np.int32)
+        self.author.frombytes(local[encoded.indices.fill_null(len(names)).to_numpy()].tobytes())
+        created = table.column("created_utc").combine_chunks().fill_null(float("nan"))
+        self.created_utc.frombytes(created.to_numpy().astype(np.float64).tobytes())
+        for name in ("score", "num_comments"):
+            values = table.column(name).combine_chunks().fill_null(0)
+            getattr(self, name).frombytes(values.to_numpy().astype(np.int64).tobytes())
+
+    def build(self) -> PostColumns:
+        columns = {
+            "group": np.frombuffer(self.group, dtype=np.int32),
+            "author": np.frombuffer(self.author, dtype=np.int32),
+            "created_utc": np.frombuffer(self.created_utc, dtype=np.float64),
+            "score": np.frombuffer(self.score, dtype=np.int64),
+            "num_comments": np.frombuffer(self.num_comments, dtype=np.int64),
+        }
+        return PostColumns(list(self.group_codes), list(self.author_codes), columns)
+
+
+def files_signature(files: list[str]) -> str:
+    parts = []
+    for fp in files:
+        st = os.stat(fp)
+        parts.append(f"{fp}:{st.st_size}:{st.st_mtime_ns}")
+        if fp.endswith("_meta.json"):
+            with open(fp, "r", encoding="utf-8") as f:
+                posts_file = os.path.join(os.path.dirname(fp), json.load(f).get("posts_file", ""))
+            if os.path.isfile(posts_file):
+                st = os.stat(posts_file)
+                parts.append(f"{posts_file}:{st.st_size}:{st.st_mtime_ns}")
+    return "\n".join(parts)
+
+def load_outdir(files: list[str]) -> PostColumns:
+    """Columns of every file from saved_output_files."""
+    builder = ColumnBuilder()
+    for fp in files:
+        if fp.endswith("_topics.json"):
+            with open(fp, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            builder.add_posts(data.get("category", "Uncategorized"), data.get("app_key", "unknown"), data.get("posts", []))
+            continue
+        data, fmt, path = load_saved_meta(fp)
+        category, app_key = data.get("category", "Uncategorized"), data.get("app_key", "unknown")
+        if not os.path.isfile(path): continue
+        if fmt == "parquet":
+            builder.add_table(category, app_key, pq.read_table(path, columns=list(COLUMN_NAMES[1:])))
+        elif fmt == "arrow":
+            with pa.memory_map(path) as source:
+                builder.add_table(category, app_key, pa.ipc.open_file(source).read_all())
+        else:
+            builder.add_posts(category, app_key, iter_jsonl(path))
+    return builder.build()
+
+def load_db(path: str) -> PostColumns:
+    builder = ColumnBuilder()
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT category, app_key, author, created_utc, score, num_comments FROM posts ORDER BY category, app_key"
+        )
+        fields = ("author", "created_utc", "score", "num_comments")
+        current, batch = None, []
+        for category, app_key, *values in rows:
+            if (category, app_key) != current:
+                if batch: builder.add_posts(*current, batch)
+                current, batch = (category, app_key), []
+            batch.append(dict(zip(fields, values)))
+        if batch: builder.add_posts(*current, batch)
+    finally:
+        conn.close()
+    return builder.build()
+
+
+def sorted_runs(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Integer `values` ordered by (key, value), so each group's values form one sorted run.
+
+    Key and value are packed into one int64 and sorted in a single pass, several times faster
+    than a two-key lexsort; lexsort is only the fallback when the packed range would overflow.
+    """
+    lo = int(values.min())
+    width = int(values.max()) - lo + 1
+    if (int(keys.max()) + 1) * width >= 1 << 62:
+        return values[np.lexsort((values, keys))]
+    return np.sort(keys.astype(np.int64) * width + (values - lo)) % width + lo
+
+def distribution(keys: np.ndarray, values: np.ndarray, counts: np.ndarray, starts: np.ndarray) -> dict:
+    """Per-group mean, percentiles and max of `values`; groups must be non-empty."""
+    runs = sorted_runs(keys, values)
+    stats = {"mean": np.bincount(keys, weights=values, minlength=len(counts)) / counts}
+    for name, q in PERCENTILES.items():
+        stats[name] = runs[starts + np.floor(q * (counts - 1)).astype(np.int64)]
+    stats["max"] = runs[starts + counts - 1]
+    return stats
+
+def top_authors(keys: np.ndarray, n_groups: int, authors: np.ndarray, ignored: np.ndarray,
+                n_top: int) -> list[list]:
+    """For each group, its `n_top` most frequent authors as (author code, posts), busiest first."""
+    tops = [[] for _ in range(n_groups)]
+    keep = ~np.isin(authors, ignored)
+    width = np.int64(int(authors.max()) + 1 if len(authors) else 1)
+    pairs, counts = np.unique(keys[keep].astype(np.int64) * width + authors[keep], return_counts=True)
+    group, author = pairs // width, pairs % width
+    order = np.lexsort((author, -counts, group))
+    group, author, counts = group[order], author[order], counts[order]
+    first = np.searchsorted(group, group)  # index where each row's group starts
+    chosen = np.flatnonzero(np.arange(len(group)) - first < n_top)
+    for g, a, c in zip(group[chosen].tolist(), author[chosen].tolist(), counts[chosen].tolist()):
+        tops[g].append((a, c))
+    return tops
+
+def group_summary(keys: np.ndarray, n_groups: int, cols: PostColumns, n_top: int, ignored: np.ndarray) -> list[dict]:
+    """Stats of every non-empty group of `keys` (one int code per post), by group code."""
+    counts = np.bincount(keys, minlength=n_groups)
+    present = np.flatnonzero(counts)
+    # Renumber to the non-empty groups so every run below has at least one post.
+    remap = np.full(n_groups, -1, dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    keys = remap[keys]
+    counts = counts[present]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    score = distribution(keys, cols.score, counts, starts)
+    comments = distribution(keys, cols.num_comments, counts, starts)
+    # fmin/fmax skip NaN, so undated posts do not affect the range.
+    first, last = np.full(len(counts), np.nan), np.full(len(counts), np.nan)
+    np.fmin.at(first, keys, cols.created_utc)
+    np.fmax.at(last, keys, cols.created_utc)
+    dated = np.bincount(keys[~np.isnan(cols.created_utc)], minlength=len(counts))
+    span = np.maximum(np.where(dated > 0, last - first, np.nan), MIN_SPAN_SECONDS)
+    tops = top_authors(keys, len(counts), cols.author, ignored, n_top)
+    rows = []
+    for i, code in enumerate(present.tolist()):
+        has_dates = bool(dated[i])
+        rows.append({
+            "code": code,
+            "posts": int(counts[i]),
+            "first_utc": float(first[i]) if has_dates else None,
+            "last_utc": float(last[i]) if has_dates else None,
+            "posts_per_day": round(float(dated[i] / span[i] * 86400), 3) if has_dates else None,
+            "score": {k: round(float(v[i]), 3) for k, v in score.items()},
+            "num_comments": {k: round(float(v[i]), 3) for k, v in comments.items()},
+            "top_authors": [[cols.authors[a], c] for a, c in tops[i]],
+        })
+    return rows
+
+def timeline(cols: PostColumns, unit: str) -> list[dict]:
+    """Posts and mean score/comments per (app, time bucket)."""
+    dated = ~np.isnan(cols.created_utc)
+    if unit == "W":
+        # Monday-based ISO weeks, labelled by the Monday they start on.
+        days = cols.created_utc[dated].astype("datetime64[s]").astype("datetime64[D]").astype(np.int64)
+        buckets = (days + EPOCH_WEEKDAY) // 7
+    else:
+        buckets = cols.created_utc[dated].astype("datetime64[s]").astype(f"datetime64[{unit}]").astype(np.int64)
+    if not len(buckets): return []
+    lo = buckets.min()
+    keys = cols.group[dated].astype(np.int64) * (buckets.max() - lo + 1) + (buckets - lo)
+    uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    score = np.bincount(inverse, weights=cols.score[dated]) / counts
+    comments = np.bincount(inverse, weights=cols.num_comments[dated]) / counts
+    groups, offsets = np.divmod(uniq, buckets.max() - lo + 1)
+    if unit == "W":
+        labels = np.datetime_as_string(((offsets + lo) * 7 - EPOCH_WEEKDAY).astype("datetime64[D]"))
+    else:
+        labels = np.datetime_as_string((offsets + lo).astype(f"datetime64[{unit}]"))
+    return [
+        {"category": cols.groups[g][0], "app": cols.groups[g][1], "bucket": str(label), "posts": int(n),
+         "score_mean": round(float(s), 3), "num_comments_mean": round(float(c), 3)}
+        for g, label, n, s, c in zip(groups.tolist(), labels, counts.tolist(), score.tolist(), comments.tolist())
+    ]
+
+def build_report(cols: PostColumns, bucket: str = "day", n_top: int = DEFAULT_TOP_AUTHORS) -> dict:
+    ignored = np.array([i for i, a in enumerate(cols.authors) if a in IGNORED_AUTHORS], dtype=np.int32)
+    apps = []
+    for row in group_summary(cols.group, len(cols.groups), cols, n_top, ignored):
+        category, app = cols.groups[row.pop("code")]
+        apps.append({"category": category, "app": app, **row})
+    apps.sort(key=lambda row: (row["category"], row["app"]))
+    categories = sorted({c for c, _ in cols.groups})
+    category_of_group = np.array([categories.index(c) for c, _ in cols.groups], dtype=np.int64)
+    by_category = []
+    for row in group_summary(category_of_group[cols.group], len(categories), cols, n_top, ignored):
+        category = categories[row.pop("code")]
+        by_category.append({"category": category, "apps": sum(app["category"] == category for app in apps), **row})
+    return {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "posts": len(cols),
+        "bucket": bucket,
+        "apps": apps,
+        "categories": by_category,
+        "timeline": timeline(cols, BUCKET_UNITS[bucket]),
+    }
+
+
+CSV_FIELDS = ["level", "category", "app", "posts", "first_utc", "last_utc", "posts_per_day",
+              *(f"score_{k}" for k in ("mean", *PERCENTILES, "max")),
+              *(f"num_comments_{k}" for k in ("mean", *PERCENTILES, "max")), "top_authors"]
+
+def csv_rows(report: dict) -> Iterable[dict]:
+    for level, rows in (("app", report["apps"]), ("category", report["categories"])):
+        for row in rows:
+            flat = {"level": level, **{k: row.get(k) for k in ("category", "app", "posts", "first_utc",
+                                                                 "last_utc", "posts_per_day")}}
+            for field in ("score", "num_comments"):
+                flat.update({f"{field}_{k}": v for k, v in row[field].items()})
+            flat["top_authors"] = ";".join(f"{a}:{c}" for a, c in row["top_authors"])
+            yield flat
+
+def write_csv(report: dict, path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(csv_rows(report))
+
+
+def main() -> int:
+    args = parse_args()
+    if np is None:
+        print("report.py requires the 'numpy' package")
+        return 1
+    if args.top_authors < 0:
+        print("--top-authors cannot be negative")
+        return 1
+    t0 = time.perf_counter()
+    if args.db:
+        if not os.path.exists(args.db):
+            print(f"No database found at '{args.db}'")
+            return 1
+        cols, source = load_db(args.db), args.db
+    else:
+        files = saved_output_files(args.outdir)
+        if not files:
+            print(f"No output files found under '{args.outdir}'")
+            return 1
+        signature = files_signature(files)
+        cols = PostColumns.load(args.snapshot, signature) if args.snapshot else None
+        source = f"snapshot {args.snapshot}" if cols is not None else args.outdir
+        if cols is None:
+            cols = load_outdir(files)
+            if args.snapshot: cols.save(args.snapshot, signature)
+    if not len(cols):
+        print("No posts found")
+        return 1
+    loaded = time.perf_counter()
+    report = build_report(cols, args.bucket, args.top_authors)
+    done = time.perf_counter()
+
+    print("Per-app report:")
+    for row in report["apps"]:
+        rate = f"{row['posts_per_day']:9.1f}" if row["posts_per_day"] is not None else f"{'-':>9}"
+        authors = ", ".join(f"{a} ({c})" for a, c in row["top_authors"][:3])
+        print(
+            f"- {row['app']:30} posts={row['posts']:6} posts/day={rate} "
+            f"score p50={row['score']['p50']:6g} p90={row['score']['p90']:7g} "
+            f"comments p50={row['num_comments']['p50']:5g} p90={row['num_comments']['p90']:6g}  {authors}"
+        )
+    print("\nPer-category report:")
+    for row in report["categories"]:
+        print(f"- {row['category']:30} apps={row['apps']:3} posts={row['posts']:7} "
+              f"score mean={row['score']['mean']:8.2f} comments mean={row['num_comments']['mean']:7.2f}")
+
+    print("\nSummary:")
+    print(f"- source: {source}")
+    print(f"- posts: {report['posts']}")
+    print(f"- apps: {len(report['apps'])}")
+    print(f"- {report['bucket']} buckets: {len(report['timeline'])}")
+    print(f"- load_seconds: {loaded - t0:.3f}")
+    print(f"- aggregate_seconds: {done - loaded:.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, ensure_ascii=True)
+        print(f"- json: {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"- csv: {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
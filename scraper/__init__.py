@@ -0,0 +1,2 @@
+"""Building blocks of reddit_scraper.py. Modules only import what they use, so tools that need just the
+saved-output readers (scraper.files) do not pull in requests or the rest of the scraper."""
@@ -0,0 +1,167 @@
+# Configured apps, categories and how selections turn into scrape targets.
+
+from scraper.common import norm_app, norm_label
+
+
+APP_INFO = {
+    # Productivity App
+    norm_app("Google Drive"):                 {"category": "Productivity", "sub": "googleworkspace"},
+    norm_app("Google Docs"):                  {"category": "Productivity", "sub": "googledocs"},
+    norm_app("CAmScanner"):                   {"category": "Productivity", "search": "CamScanner"},
+    norm_app("Google Gemini"):                {"category": "Productivity", "sub": "GoogleGeminiAI"},
+    norm_app("Google Sheets"):                {"category": "Productivity", "sub": "googlesheets"},
+    norm_app("Microsoft Word: Edit Documents"): {"category": "Productivity", "sub": "MicrosoftWord"},
+    norm_app("ChatGPT"):                      {"category": "Productivity", "sub": "ChatGPT"},
+    norm_app("Perplexity"):                   {"category": "Productivity", "sub": "perplexity_ai"},
+    norm_app("Adobe Acrobat Reader"):         {"category": "Productivity", "sub": "Acrobat"},
+
+    # Social networking (Pinterest default lives under Share photos & videos)
+    norm_app("Facebook"):                     {"category": "Social networking", "sub": "facebook"},
+    norm_app("Pinterest"):                    {"category": "Share photos & videos", "sub": "Pinterest"},
+    norm_app("Reddit"):                       {"category": "Social networking", "sub": "reddit"},
+    norm_app("SnapChat"):                     {"category": "Social networking", "sub": "snapchat"},
+    norm_app("telegram"):                     {"category": "Social networking", "sub": "Telegram"},
+    norm_app("Signal"):                       {"category": "Social networking", "sub": "signal"},
+    norm_app("Ok: Social network"):           {"category": "Social networking", "sub": "okru"},
+
+    # Communication
+    norm_app("Zoom"):                         {"category": "Communication", "sub": "Zoom"},
+    norm_app("Discord"):                      {"category": "Communication", "sub": "discordapp"},
+    norm_app("imo"):                          {"category": "Communication", "search": "imo app"},
+    norm_app("Viber"):                        {"category": "Communication", "sub": "viber"},
+    norm_app("WhatsApp"):                     {"category": "Communication", "sub": "WhatsApp"},
+    norm_app("Facebook Messenger"):           {"category": "Communication", "sub": "FacebookMessenger"},
+    norm_app("Google Meet"):                  {"category": "Communication", "sub": "GoogleMeet"},
+    norm_app("Ms Teams"):                     {"category": "Communication", "sub": "MicrosoftTeams"},
+
+    # Share photos & videos
+    norm_app("TickTock Live"):                {"category": "Share photos & videos", "sub": "TikTok"},
+    norm_app("TikTok Studio"):                {"category": "Share photos & videos", "sub": "TikTokhelp"},
+    norm_app("Bigo Live"):                    {"category": "Share photos & videos", "sub": "BIGOLIVE"},
+    norm_app("Moj: short Drame and Reels"):   {"category": "Share photos & videos", "search": "Moj app"},
+    norm_app("Likee"):                        {"category": "Share photos & videos", "sub": "Likee"},
+    norm_app("Twitch"):                       {"category": "Share photos & videos", "sub": "Twitch"},
+    norm_app("Threads"):                      {"category": "Share photos & videos", "sub": "ThreadsApp"},
+
+    # Travel & local
+    norm_app("Uber"):                         {"category": "Travel & local", "sub": "uber"},
+    norm_app("Rapido"):                       {"category": "Travel & local", "search": "Rapido app"},
+    norm_app("Booking.com"):                  {"category": "Travel & local", "sub": "Bookingcom"},
+    norm_app("Airbnd"):                       {"category": "Travel & local", "sub": "AirBnB"},
+    norm_app("InDrive"):                      {"category": "Travel & local", "sub": "Indrive"},
+    norm_app("ConfirmTKt"):                   {"category": "Travel & local", "search": "ConfirmTkt"},
+    norm_app("train booking ap"):             {"category": "Travel & local", "sub": "IRCTC"},
+    norm_app("redBus book Bus"):              {"category": "Travel & local", "sub": "redbus"},
+}
+
+CATEGORY_LISTS = {
+    "Productivity": [
+        "Google Drive","Google Docs","CAmScanner","Google Gemini","Google Sheets",
+        "Microsoft Word: Edit Documents","ChatGPT","Perplexity","Adobe Acrobat Reader",
+    ],
+    "Social networking": [
+        "Facebook","Pinterest","Reddit","SnapChat","telegram","Signal","Ok: Social network",
+    ],
+    "Communication": [
+        "Zoom","Discord","imo","Viber","WhatsApp","Facebook Messenger","Google Meet","Ms Teams",
+    ],
+    "Share photos & videos": [
+        "Pinterest","TickTock Live","TikTok Studio","Bigo Live",
+        "Moj: short Drame and Reels","Likee","Twitch","Threads",
+    ],
+    "Travel & local": [
+        "Uber","Rapido","Booking.com","Airbnd","InDrive","ConfirmTKt","train booking ap","redBus book Bus",
+    ],
+}
+VALID_CATEGORIES = list(CATEGORY_LISTS.keys())
+CATEGORY_NORM_TO_CANON = {norm_label(c): c for c in VALID_CATEGORIES}
+CATEGORY_ALIASES = {
+    "social": "Social networking",
+    "socialnetworking": "Social networking",
+    "sharephotosvideos": "Share photos & videos",
+    "sharephotosandvideos": "Share photos & videos",
+    "travellocal": "Travel & local",
+    "travelandlocal": "Travel & local",
+    "communication": "Communication",
+    "productivity": "Productivity",
+    "all": "*",
+    "*": "*",
+}
+
+
+def source_key_for(info: dict) -> str:
+    return f"sub:{info['sub']}" if "sub" in info else f"search:{info['search']}"
+
+def target_key_for(app_key: str, info: dict) -> str:
+    return f"{app_key}|{source_key_for(info)}"
+
+
+def canonical_category(label: str) -> str | list[str] | None:
+    nk = norm_label(label)
+    if nk in CATEGORY_NORM_TO_CANON: return CATEGORY_NORM_TO_CANON[nk]
+    if nk in CATEGORY_ALIASES:
+        canon = CATEGORY_ALIASES[nk]
+        return VALID_CATEGORIES if canon == "*" else canon
+    return None
+
+def build_targets_from_categories(categories: list[str]) -> list[tuple[str, dict]]:
+    # Expand categories (aliases + '*' support)
+    expanded = []
+    for c in categories:
+        canon = canonical_category(c)
+        if canon is None:
+            print(f"Unknown category '{c}'")
+            continue
+        if isinstance(canon, list):  # '*' expanded
+            expanded.extend(canon)
+        else:
+            expanded.append(canon)
+
+    targets, seen = [], set()
+    for cat in expanded:
+        app_names = CATEGORY_LISTS.get(cat, [])
+        for display in app_names:
+            app_key = norm_app(display)
+            base_info = APP_INFO.get(app_key)
+            if not base_info:
+                print(f"Skipping unknown app '{display}' in category '{cat}'")
+                continue
+            info = dict(base_info)
+            info["category"] = cat  # override to requested cat
+            sig = (app_key, cat)
+            if sig not in seen:
+                targets.append((app_key, info))
+                seen.add(sig)
+    return targets
+
+def build_targets_from_apps(apps: list[str]) -> list[tuple[str, dict]]:
+    targets, seen = [], set()
+    for name in apps:
+        key = norm_app(name)
+        if key in APP_INFO:
+            info = APP_INFO[key]
+            sig = (key, info.get("category",""))
+            if sig not in seen:
+                targets.append((key, info))
+                seen.add(sig)
+        else:
+            print(f"Skipping unknown app '{name}' (normalized '{key}')")
+    return targets
+
+def build_targets(selected_apps: list[str], selected_categories: list[str]) -> list[tuple[str, dict]]:
+    targets = []
+    if selected_categories:
+        targets.extend(build_targets_from_categories(selected_categories))
+    if selected_apps:
+        targets.extend(build_targets_from_apps(selected_apps))
+    if not selected_apps and not selected_categories:
+        targets = [(k, v) for k, v in APP_INFO.items()]
+        targets.sort(key=lambda kv: (kv[1].get("category",""), kv[0]))
+
+    deduped, seen = [], set()
+    for app_key, info in targets:
+        # Deduplicate per source so apps listed in multiple categories are scraped only once.
+        sig = (app_key, info.get("sub"), info.get("search"))
+        if sig in seen: continue
+        seen.add(sig); deduped.append((app_key, info))
+    return deduped
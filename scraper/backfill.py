@@ -0,0 +1,124 @@
+# --backfill: historical crawl over time-window shards split until each fits under the listing cap.
+
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from scraper.apps import target_key_for
+from scraper.common import log
+from scraper.listing import REDDIT_LISTING_CAP, Post, iter_listing
+from scraper.output import target_result
+from scraper.scrape import DEFAULT_CONCURRENCY, deliver
+from scraper.transport import DEFAULT_POOL_SIZE, Transport, transport_for_delay
+
+
+DEFAULT_BACKFILL_WINDOW_DAYS = 30.0
+BACKFILL_SPLIT_POSTS = 900  # a window listing this long may have been cut off at REDDIT_LISTING_CAP
+BACKFILL_MIN_WINDOW_SECONDS = 60
+BACKFILL_MIN_IN_RANGE = 0.5  # a window's first page with fewer posts inside the window means the range was ignored
+
+def parse_backfill_range(value: str) -> tuple[int, int]:
+    """FROM..TO as UTC dates (YYYY-MM-DD) or epoch seconds; TO is exclusive and defaults to now."""
+    def parse(part: str) -> int:
+        if part.isdigit(): return int(part)
+        return int(datetime.strptime(part, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+    start, sep, end = value.partition("..")
+    if not sep or not start: raise ValueError("expected FROM..TO, e.g. 2023-01-01..2024-01-01")
+    start_ts, end_ts = parse(start), parse(end) if end else int(time.time())
+    if end_ts <= start_ts: raise ValueError("TO must be after FROM")
+    return start_ts, end_ts
+
+def iter_window_posts(info: dict, start: int, end: int, delay_seconds: float,
+                      transport: Transport) -> Iterator[list[Post]]:
+    """Newest-first posts of one target created in [start, end), via a time-restricted search."""
+    window = f"timestamp:{start}..{end - 1}"
+    if "sub" in info:
+        slug = info["sub"]
+        url, params, label = f"{transport.base_url}/r/{slug}/search.json", {"q": window, "restrict_sr": "on"}, f"r/{slug}"
+    else:
+        query = info["search"].replace("'", "\\'")
+        url, params, label = f"{transport.base_url}/search.json", {"q": f"(and '{query}' {window})"}, f"search '{info['search']}'"
+    params.update(sort="new", syntax="cloudsearch")
+    return iter_listing(transport, url, params, REDDIT_LISTING_CAP, delay_seconds, label, info.get("sub"))
+
+class TimeRangeIgnored(RuntimeError):
+    """The server answered a time-restricted search with posts from outside the window."""
+
+def scrape_window(info: dict, start: int, end: int, delay_seconds: float,
+                  transport: Transport) -> tuple[list[Post], int | None]:
+    """Fetch one window: (posts, end of the part still missing if the listing was cut off, else None)."""
+    posts, fetched, oldest = [], 0, end
+    for page in iter_window_posts(info, start, end, delay_seconds, transport):
+        first = fetched == 0
+        fetched += len(page)
+        for post in page:
+            created = post.get("created_utc")
+            if created is None: continue
+            oldest = min(oldest, int(created) + 1)
+            # The range is re-checked here in case the server applied it loosely.
+            if start <= created < end: posts.append(post)
+        if first and page and len(posts) < len(page) * BACKFILL_MIN_IN_RANGE:
+            raise TimeRangeIgnored(f"the server ignored the time range of a search for {start}..{end}: "
+                                   f"{len(page) - len(posts)}/{len(page)} posts fell outside it")
+    if fetched < BACKFILL_SPLIT_POSTS: return posts, None
+    return posts, oldest
+
+def backfill(targets: list[tuple[str, dict]], start: int, end: int, window_seconds: float, delay_seconds: float,
+             concurrency: int = DEFAULT_CONCURRENCY, transport: Transport | None = None,
+             sink: Callable[[dict], None] | None = None) -> list[dict]:
+    """Collect every post from [start, end) for each target as window shards, splitting windows that hit the cap."""
+    transport = transport or transport_for_delay(delay_seconds, max(DEFAULT_POOL_SIZE, concurrency))
+    step = max(int(window_seconds), BACKFILL_MIN_WINDOW_SECONDS)
+    posts = [{} for _ in targets]
+    pending, failed = [0] * len(targets), [0] * len(targets)
+    t0 = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        shards = {}
+        def submit(i: int, a: int, b: int) -> None:
+            shards[pool.submit(scrape_window, targets[i][1], a, b, delay_seconds, transport)] = (i, a, b)
+            pending[i] += 1
+        for i, (app_key, info) in enumerate(targets):
+            log(f"Backfilling {app_key} from {time.strftime('%Y-%m-%d', time.gmtime(start))} "
+                f"to {time.strftime('%Y-%m-%d', time.gmtime(end))}...")
+            # Newest windows first, so the pool works through targets roughly one at a time.
+            for b in range(end, start, -step):
+                submit(i, max(start, b - step), b)
+        while shards:
+            done, _ = wait(shards, return_when=FIRST_COMPLETED)
+            for fut in done:
+                i, a, b = shards.pop(fut)
+                app_key, info = targets[i]
+                pending[i] -= 1
+                try:
+                    window_posts, missing_end = fut.result()
+                except TimeRangeIgnored:
+                    for fut in shards: fut.cancel()
+                    raise
+                except Exception as e:
+                    failed[i] += 1
+                    log(f"ERROR ({app_key} window {a}..{b}): {e}")
+                    window_posts, missing_end = [], None
+                for post in window_posts:
+                    posts[i].setdefault(post.get("id"), post)
+                if missing_end is not None and missing_end >= b:
+                    log(f"WARNING ({app_key}): window {a}..{b} was not narrowed by the server; keeping "
+                        f"{len(window_posts)} posts")
+                elif missing_end is not None and b - a <= BACKFILL_MIN_WINDOW_SECONDS:
+                    log(f"WARNING ({app_key}): window {a}..{b} is denser than the listing cap; "
+                        f"older posts in it are skipped")
+                elif missing_end is not None and missing_end - a <= 2 * BACKFILL_MIN_WINDOW_SECONDS:
+                    submit(i, a, missing_end)
+                elif missing_end is not None:
+                    mid = (a + missing_end) // 2
+                    submit(i, mid, missing_end)
+                    submit(i, a, mid)
+                if pending[i]: continue
+                if failed[i]: log(f"WARNING ({app_key}): {failed[i]} backfill windows failed")
+                target_posts = sorted(posts[i].values(), key=lambda p: p.get("created_utc") or 0, reverse=True)
+                posts[i] = None
+                result = deliver(target_key_for(app_key, info), target_result(app_key, info, target_posts),
+                                  time.perf_counter() - t0, None, sink)
+                if result is not None: results.append(result)
+    return results
@@ -0,0 +1,121 @@
+# --cache response cache and --record replay fixtures.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+from scraper.files import fixture_key
+
+
+DEFAULT_CACHE_TTL_SECONDS = 3600.0
+DEFAULT_CACHE_MAX_MB = 512
+
+class ResponseCache:
+    """On-disk (SQLite) cache of successful GET bodies with a TTL and size-based LRU eviction."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_CACHE_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = self.revalidated = self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)")
+            # Running total of the stored bodies, so a store only scans the table when it must evict.
+            self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def tally(self, counter: str) -> None:
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def key_for(url: str, params: dict | None) -> str:
+        return f"{url}?{urlencode(sorted((params or {}).items()))}"
+
+    def lookup(self, key: str) -> tuple[bytes, str | None, str | None, bool] | None:
+        """Return (body, etag, last_modified, fresh) for a cached entry, or None."""
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None: return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        body, etag, last_modified, stored_at = row
+        return body, etag, last_modified, now - stored_at < self.ttl
+
+    def store(self, key: str, body: bytes, etag: str | None, last_modified: str | None) -> None:
+        now = time.time()
+        with self.lock, self.conn:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body)),
+            )
+            self.size += len(body) - (old[0] if old else 0)
+            if self.size > self.max_bytes: self._evict()
+
+    def refresh(self, key: str) -> None:
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def _evict(self) -> None:
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.size -= size
+            if self.size <= self.max_bytes: break
+
+    def summary(self) -> str:
+        return f"Cache: {self.hits} hits, {self.revalidated} revalidated, {self.misses} misses"
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+class FixtureRecorder:
+    """Saves each successful response as <dirpath>/<fixture_key>.json for fake_reddit.py --fixtures."""
+
+    def __init__(self, dirpath: str):
+        os.makedirs(dirpath, exist_ok=True)
+        self.dirpath = dirpath
+        self.saved = 0
+        self.lock = threading.Lock()
+
+    def save(self, url: str, params: dict | None, resp: requests.Response) -> None:
+        try:
+            body = resp.json()
+        except ValueError:
+            return
+        path = urlparse(url).path
+        fixture = {"path": path, "params": {k: str(v) for k, v in (params or {}).items()},
+                   "status": resp.status_code, "body": body}
+        fp = os.path.join(self.dirpath, f"{fixture_key(path, params)}.json")
+        tmp = f"{fp}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False)
+        os.replace(tmp, fp)
+        with self.lock:
+            self.saved += 1
+
+
+def cached_response(url: str, body: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body
+    resp.url = url
+    resp.headers["Content-Type"] = "application/json"
+    return resp
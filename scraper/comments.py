@@ -0,0 +1,127 @@
+# Comment tree harvesting for --comments.
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from scraper.common import sanitize_dirname, sanitize_filename
+from scraper.files import atomic_output
+from scraper.listing import decode_json
+from scraper.store import SqlitePostStore
+from scraper.transport import Transport, get_with_retries
+
+
+MORECHILDREN_BATCH_SIZE = 100
+DEFAULT_COMMENT_BUDGET = 5000
+DEFAULT_COMMENT_WORKERS = 4
+
+def normalize_comment(d: dict, link_id: str) -> dict:
+    return {
+        "id": d.get("id"), "parent_id": d.get("parent_id"), "link_id": d.get("link_id", link_id),
+        "author": d.get("author"), "body": d.get("body"), "score": d.get("score"),
+        "created_utc": d.get("created_utc"), "depth": d.get("depth"),
+    }
+
+def flatten_comments(children: list[dict], link_id: str, comments: list[dict], more_ids: list[str]) -> None:
+    """Depth-first walk of a comment tree; `more` stubs are collected for batched expansion."""
+    stack = list(reversed(children))
+    while stack:
+        child = stack.pop()
+        kind, d = child.get("kind"), child.get("data") or {}
+        if kind == "t1":
+            comments.append(normalize_comment(d, link_id))
+            replies = d.get("replies")
+            if isinstance(replies, dict):
+                stack.extend(reversed(replies.get("data", {}).get("children", [])))
+        elif kind == "more":
+            more_ids.extend(d.get("children") or [])
+
+class CommentHarvester:
+    """Opt-in --comments stage: comment trees of the most-discussed posts, written to <app>_comments.jsonl."""
+
+    def __init__(self, transport: Transport, outdir: str, delay_seconds: float, budget: int,
+                 workers: int = DEFAULT_COMMENT_WORKERS, store: SqlitePostStore | None = None):
+        self.transport = transport
+        self.outdir = outdir
+        self.delay_seconds = delay_seconds
+        self.budget = budget
+        self.workers = workers
+        self.store = store
+        self.candidates = []
+        self.files = {}
+        self.outputs = None
+        self.lock = threading.Lock()
+        self.comments = self.threads = self.more_requests = 0
+
+    def add_candidates(self, result: dict) -> None:
+        app_key, category = result.get("app_key", "unknown"), result.get("category", "Uncategorized")
+        with self.lock:
+            self.candidates.extend(
+                (p.get("num_comments") or 0, app_key, category, p["id"])
+                for p in result.get("posts", []) if p.get("id") and p.get("num_comments")
+            )
+
+    def remaining(self) -> int:
+        with self.lock:
+            return self.budget - self.comments
+
+    def run(self) -> None:
+        # Most-discussed threads first; skip what cannot fit in the remaining budget estimate.
+        queue, planned, seen = [], 0, set()
+        for num_comments, app_key, category, post_id in sorted(self.candidates, reverse=True):
+            if (app_key, post_id) in seen or planned >= self.budget: continue
+            seen.add((app_key, post_id))
+            queue.append((app_key, category, post_id))
+            planned += num_comments
+        if not queue: return
+        print(f"Fetching comments for {len(queue)} posts (budget {self.budget} comments)...")
+        # Each app's file is written under a temp name and renamed into place once every thread is in.
+        with ExitStack() as self.outputs, ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for fut in [pool.submit(self._harvest_thread, *item) for item in queue]:
+                try:
+                    fut.result()
+                except Exception as e:
+                    print(f"ERROR (comments): {e}")
+        self.files.clear()
+        print(f"Comments: {self.comments} from {self.threads} threads ({self.more_requests} 'more' batches)")
+
+    def _harvest_thread(self, app_key: str, category: str, post_id: str) -> None:
+        if self.remaining() <= 0: return
+        link_id = f"t3_{post_id}"
+        url = f"{self.transport.base_url}/comments/{post_id}/.json"
+        payload = decode_json(get_with_retries(self.transport, url, {"limit": 500}, f"comments {post_id}",
+                                               self.delay_seconds, "comments").content)
+        comments, more_ids = [], []
+        if isinstance(payload, list) and len(payload) > 1:
+            flatten_comments(payload[1].get("data", {}).get("children", []), link_id, comments, more_ids)
+        more_batches = 0
+        while more_ids and len(comments) < self.remaining():
+            batch, more_ids = more_ids[:MORECHILDREN_BATCH_SIZE], more_ids[MORECHILDREN_BATCH_SIZE:]
+            params = {"api_type": "json", "link_id": link_id, "children": ",".join(batch)}
+            payload = decode_json(get_with_retries(self.transport, f"{self.transport.base_url}/api/morechildren.json",
+                                                   params, f"morechildren {post_id}", self.delay_seconds,
+                                                   "morechildren").content)
+            things = payload.get("json", {}).get("data", {}).get("things", [])
+            flatten_comments(things, link_id, comments, more_ids)
+            more_batches += 1
+        with self.lock:
+            comments = comments[:max(0, self.budget - self.comments)]
+            self.comments += len(comments)
+            self.threads += 1
+            self.more_requests += more_batches
+            self._write(app_key, category, comments)
+        if self.store is not None:
+            self.store.write_comments(app_key, comments)
+
+    def _write(self, app_key: str, category: str, comments: list[dict]) -> None:
+        f = self.files.get(app_key)
+        if f is None:
+            cat_dir = os.path.join(self.outdir, sanitize_dirname(category))
+            os.makedirs(cat_dir, exist_ok=True)
+            tmp = self.outputs.enter_context(
+                atomic_output(os.path.join(cat_dir, f"{sanitize_filename(app_key)}_comments.jsonl")))
+            f = self.files[app_key] = self.outputs.enter_context(open(tmp, "w", encoding="utf-8"))
+        for c in comments:
+            f.write(json.dumps(c, ensure_ascii=False, separators=(",", ":")) + "\n")
@@ -0,0 +1,45 @@
+# Logging and name helpers shared across the scraper.
+
+import re
+import threading
+
+
+_log_local = threading.local()
+
+def log(msg: str) -> None:
+    # Worker threads buffer their output so it can be replayed in target order.
+    buf = getattr(_log_local, "buffer", None)
+    if buf is None: print(msg)
+    else: buf.append(msg)
+
+def buffer_log(enabled: bool) -> None:
+    _log_local.buffer = [] if enabled else None
+
+def take_log_buffer() -> list[str]:
+    lines = _log_local.buffer or []
+    _log_local.buffer = None
+    return lines
+
+
+def norm_app(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", name.lower())
+
+def norm_label(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", s.lower())
+
+def sanitize_filename(s: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9._-]+", "_", s).strip("_")
+
+def sanitize_dirname(s: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9._ -]+", "_", s).strip().strip("_")
+
+def key_for_app(app_key: str) -> str:
+    return f"{app_key}_topics"
+
+def derive_title_from_permalink(permalink: str) -> str:
+    parts = permalink.split("/")
+    if "comments" in parts:
+        i = parts.index("comments")
+        if len(parts) > i + 2:
+            return parts[i + 2].replace("-", " ").replace("_", " ").strip() or "Untitled"
+    return "Untitled"
@@ -0,0 +1,123 @@
+# --daemon: per-source incremental polling on a schedule derived from each source's posting rate.
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from scraper.apps import source_key_for, target_key_for
+from scraper.scrape import DEFAULT_CONCURRENCY, run_target, hand_off
+from scraper.state import StateStore
+from scraper.transport import Transport
+
+
+DEFAULT_POLL_TARGET = 50
+DEFAULT_MIN_INTERVAL_SECONDS = 300.0
+DEFAULT_MAX_INTERVAL_SECONDS = 6 * 3600.0
+DAEMON_RATE_ALPHA = 0.5  # weight of the newest poll in each source's posting-rate estimate
+DAEMON_WAKE_SECONDS = 1.0
+
+def observed_rate(posts: list[dict], since: float | None, now: float) -> float | None:
+    """Posts/sec seen by one poll, over the time since the previous poll (or the oldest post, on a first poll)."""
+    if since is not None: return len(posts) / max(now - since, 1e-6)
+    times = [p.get("created_utc") for p in posts if p.get("created_utc") is not None]
+    if not times: return None
+    return len(times) / max(now - min(times), 1e-6)
+
+class PollScheduler:
+    """Per-target polling plan for --daemon, kept in the StateStore; due targets with the most new posts go first."""
+
+    def __init__(self, targets: list[tuple[str, dict]], state: StateStore, poll_target: int = DEFAULT_POLL_TARGET,
+                 min_interval: float = DEFAULT_MIN_INTERVAL_SECONDS,
+                 max_interval: float = DEFAULT_MAX_INTERVAL_SECONDS):
+        self.targets = {target_key_for(app_key, info): (app_key, info) for app_key, info in targets}
+        self.state = state
+        self.poll_target = poll_target
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        saved = state.load_schedule()
+        # target_key -> [rate, last_poll, next_poll]; targets never polled are due right away.
+        self.entries = {key: list(saved.get(key, (None, None, 0.0))) for key in self.targets}
+        self.running = set()
+        self.cond = threading.Condition()
+
+    def expected_posts(self, target_key: str, now: float) -> float:
+        rate, last_poll, _ = self.entries[target_key]
+        if rate is None or last_poll is None: return float("inf")
+        return rate * (now - last_poll)
+
+    def next_due(self, stop: threading.Event) -> str | None:
+        """Block until a target is due and claim it; None once `stop` is set."""
+        with self.cond:
+            while not stop.is_set():
+                now = time.time()
+                idle = [k for k in self.entries if k not in self.running]
+                due = [k for k in idle if self.entries[k][2] <= now]
+                if due:
+                    target_key = max(due, key=lambda k: self.expected_posts(k, now))
+                    self.running.add(target_key)
+                    return target_key
+                wake = min((self.entries[k][2] for k in idle), default=now + DAEMON_WAKE_SECONDS)
+                self.cond.wait(min(max(wake - now, 0.0), DAEMON_WAKE_SECONDS))
+        return None
+
+    def done(self, target_key: str, posts: list[dict] | None, truncated: bool = False) -> float:
+        """Fold a poll's new posts (None if it failed) into the rate estimate and schedule the next poll."""
+        now = time.time()
+        with self.cond:
+            rate, last_poll, _ = self.entries[target_key]
+            if posts is None:
+                interval = self.min_interval
+            else:
+                sample = observed_rate(posts, None if truncated else last_poll, now)
+                if sample is not None:
+                    rate = sample if rate is None else DAEMON_RATE_ALPHA * sample + (1 - DAEMON_RATE_ALPHA) * rate
+                last_poll = now
+                interval = self.poll_target / rate if rate else self.max_interval
+                interval = min(max(interval, self.min_interval), self.max_interval)
+            self.entries[target_key] = [rate, last_poll, now + interval]
+            self.state.save_schedule(target_key, rate, last_poll, now + interval)
+            self.running.discard(target_key)
+            self.cond.notify_all()
+        return interval
+
+def run_daemon(targets: list[tuple[str, dict]], max_posts: int, delay_seconds: float, transport: Transport,
+               state: StateStore, sink: Callable[[dict], None] | None = None,
+               concurrency: int = DEFAULT_CONCURRENCY, poll_target: int = DEFAULT_POLL_TARGET,
+               min_interval: float = DEFAULT_MIN_INTERVAL_SECONDS,
+               max_interval: float = DEFAULT_MAX_INTERVAL_SECONDS, stop: threading.Event | None = None) -> int:
+    """Poll `targets` incrementally until `stop` is set; returns the number of polls made."""
+    stop = stop or threading.Event()
+    scheduler = PollScheduler(targets, state, poll_target, min_interval, max_interval)
+    lock = threading.Lock()
+    polls = 0
+
+    def work() -> None:
+        nonlocal polls
+        while True:
+            target_key = scheduler.next_due(stop)
+            if target_key is None: return
+            app_key, info = scheduler.targets[target_key]
+            fetched = []
+            def deliver(result: dict) -> None:
+                # Keep the new posts only: the sink may merge saved output into the result.
+                fetched.append(list(result["posts"]))
+                # Mark them seen once the sink has saved them, whatever the sink is (a RunWriter already does).
+                record = partial(state.record, source_key_for(info), fetched[0])
+                if sink is not None: hand_off(sink, result, record)
+                else: record()
+            _, lines = run_target(app_key, info, True, max_posts, delay_seconds, transport, state, sink=deliver)
+            posts = fetched[0] if fetched else None
+            interval = scheduler.done(target_key, posts, truncated=posts is not None and len(posts) >= max_posts)
+            rate = scheduler.entries[target_key][0]
+            with lock:
+                polls += 1
+                for line in lines: print(line)
+                print(f"Next poll of {app_key} in {interval:.0f}s"
+                      + (f" (~{rate * 3600:.1f} new posts/hour)" if rate is not None else ""))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for fut in [pool.submit(work) for _ in range(concurrency)]:
+            fut.result()
+    return polls
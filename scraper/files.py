@@ -0,0 +1,136 @@
+# Saved output files: the readers shared by reddit_scraper.py, report.py, near_dupes.py,
+# data_quality_check.py and fake_reddit.py, and the atomic rename used for every file the scraper writes.
+# Standard library only (plus the optional pyarrow/zstandard readers), so importing it does not load the scraper.
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for --format parquet/arrow
+    pa = pq = None
+try:
+    import zstandard
+except ImportError:  # optional: only needed for --format jsonl.zst
+    zstandard = None
+
+
+def fixture_key(path: str, params: dict | None) -> str:
+    """Replay fixture name for a request; `limit` is left out so a recorded full page serves smaller ones."""
+    query = urlencode(sorted((k, str(v)) for k, v in (params or {}).items() if k != "limit"))
+    return hashlib.sha1(f"{path}?{query}".encode("utf-8")).hexdigest()[:20]
+
+def open_text(path: str, mode: str):
+    """Open a (possibly .gz/.zst compressed) text file."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("reading/writing .zst output requires the 'zstandard' package")
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    with open_text(path, "r") as f:
+        for line in f:
+            if line.strip(): yield json.loads(line)
+
+def read_posts_file(path: str, fmt: str) -> list[dict]:
+    if fmt in ("parquet", "arrow"):
+        if pa is None:
+            raise RuntimeError(f"reading {fmt} output requires the 'pyarrow' package")
+        if fmt == "parquet":
+            return pq.read_table(path).to_pylist()
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all().to_pylist()
+    return list(iter_jsonl(path))
+
+def saved_output_files(outdir: str) -> list[str]:
+    """One file per saved app, any --format: <app>_meta.json if saved compact, else <app>_topics.json."""
+    metas = glob.glob(os.path.join(outdir, "**", "*_meta.json"), recursive=True)
+    compact = {fp[:-len("_meta.json")] for fp in metas}
+    legacy = [fp for fp in glob.glob(os.path.join(outdir, "**", "*_topics.json"), recursive=True)
+              if fp[:-len("_topics.json")] not in compact]
+    return sorted(legacy + metas)
+
+def load_saved_meta(fp: str) -> tuple[dict, str, str]:
+    """(metadata, format, post store path) of a compact <app>_meta.json."""
+    with open(fp, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    fmt = meta.pop("format", "jsonl")
+    return meta, fmt, os.path.join(os.path.dirname(fp), meta.pop("posts_file", ""))
+
+_output_batch = threading.local()
+
+def replace_or_discard(tmp: str, path: str) -> None:
+    """os.replace(tmp, path), removing tmp if the rename fails so no temp file is left behind."""
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+
+class FileBatch:
+    """Output files staged under temp names, then fsynced and renamed into place together (--fsync)."""
+
+    def __init__(self):
+        self.staged = []  # (temp path, final path)
+
+    def commit(self) -> None:
+        """Fsync and rename every staged file. On error, the files not yet renamed are removed and the error re-raised."""
+        dirs = {os.path.dirname(path) or "." for _, path in self.staged}
+        try:
+            for tmp, _ in self.staged:
+                fd = os.open(tmp, os.O_RDONLY)
+                try: os.fsync(fd)
+                finally: os.close(fd)
+            while self.staged:
+                replace_or_discard(*self.staged[0])
+                self.staged.pop(0)
+        except OSError:
+            self.discard()
+            raise
+        # The renames themselves are only durable once their directories are synced.
+        for d in dirs:
+            fd = os.open(d, os.O_RDONLY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+
+    @contextmanager
+    def staging(self) -> Iterator[None]:
+        """Stage the atomic_output renames made on this thread in this batch until the block exits."""
+        _output_batch.batch = self
+        try:
+            yield
+        finally:
+            _output_batch.batch = None
+
+    def discard(self) -> None:
+        for tmp, _ in self.staged:
+            try: os.remove(tmp)
+            except OSError: pass
+        self.staged.clear()
+
+@contextmanager
+def atomic_output(path: str) -> Iterator[str]:
+    """Yield a temp path to write instead of `path`; it is renamed over `path` on success (or at FileBatch.commit())."""
+    d, name = os.path.split(path)
+    tmp = os.path.join(d, f".{name}.{os.getpid()}-{threading.get_ident()}.tmp{os.path.splitext(name)[1]}")
+    try:
+        yield tmp
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    batch = getattr(_output_batch, "batch", None)
+    if batch is not None: batch.staged.append((tmp, path))
+    else: replace_or_discard(tmp, path)
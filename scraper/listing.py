@@ -0,0 +1,128 @@
+# Reddit listing pagination and the Post record built from each listing child.
+
+import json
+from collections.abc import Callable, Iterator
+from urllib.parse import urljoin
+
+try:
+    import orjson
+except ImportError:  # optional: faster listing decode, falls back to json
+    orjson = None
+
+from scraper.common import derive_title_from_permalink
+from scraper.metrics import METRICS
+from scraper.transport import REDDIT_BASE_URL, Transport, get_with_retries, transport_for_delay
+
+
+MAX_REDDIT_PAGE_SIZE = 100
+REDDIT_LISTING_CAP = 1000  # Reddit stops paginating any listing after about this many items
+POST_FIELDS = ("title", "url", "score", "num_comments", "created_utc", "author", "subreddit",
+               "subreddit_name_prefixed", "id")
+
+def decode_json(body: bytes):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+class Post:
+    """One normalized post in __slots__ (about a quarter of a 9-key dict); read like a dict via get() and []."""
+
+    # cluster_id is set only by the near-duplicate stage (--near-dupes) and written only when set.
+    __slots__ = POST_FIELDS + ("cluster_id",)
+    _fields = frozenset(__slots__)
+
+    def __init__(self, *values):
+        for field, value in zip(POST_FIELDS, values):
+            setattr(self, field, value)
+        self.cluster_id = None
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Post":
+        post = cls(*(d.get(field) for field in POST_FIELDS))
+        post.cluster_id = d.get("cluster_id")
+        return post
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def __getitem__(self, key: str):
+        if key not in self._fields: raise KeyError(key)
+        return getattr(self, key)
+
+    def as_dict(self) -> dict:
+        d = {field: getattr(self, field) for field in POST_FIELDS}
+        if self.cluster_id is not None: d["cluster_id"] = self.cluster_id
+        return d
+
+def json_default(obj):
+    if isinstance(obj, Post): return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def normalize_post(d: dict, fallback_sub: str | None = None) -> Post:
+    permalink = d.get("permalink", "")
+    # Reddit permalinks are site-relative paths; plain concatenation skips urljoin's parsing.
+    permalink = REDDIT_BASE_URL + permalink if permalink[:1] == "/" and permalink[:2] != "//" else urljoin(
+        REDDIT_BASE_URL, permalink)
+    title = d.get("title") or derive_title_from_permalink(permalink)
+    return Post(
+        title, permalink, d.get("score"), d.get("num_comments"), d.get("created_utc"), d.get("author"),
+        d.get("subreddit", fallback_sub), d.get("subreddit_name_prefixed", fallback_sub and f"r/{fallback_sub}"),
+        d.get("id"),
+    )
+
+def iter_listing(transport: Transport, url: str, params: dict, max_posts: int, delay_seconds: float,
+                 label: str, fallback_sub: str | None = None, stop: Callable[[Post], bool] | None = None,
+                 after: str | None = None,
+                 on_page: Callable[[list[Post], str | None], None] | None = None) -> Iterator[list[Post]]:
+    """Follow a listing's `after` cursor, yielding normalized posts a page at a time until `stop` matches a post."""
+    count = 0
+    while count < max_posts:
+        page_params = dict(params, limit=min(MAX_REDDIT_PAGE_SIZE, max_posts - count))
+        if after: page_params["after"] = after
+        resp = get_with_retries(transport, url, page_params, label, delay_seconds)
+        with METRICS.stage("parse"):
+            payload = decode_json(resp.content)
+        children = payload.get("data", {}).get("children", [])
+        with METRICS.stage("build"):
+            page = [normalize_post(child.get("data") or {}, fallback_sub) for child in children[:max_posts - count]]
+        if not children: break
+        if stop:
+            cut = next((i for i, post in enumerate(page) if stop(post)), None)
+            if cut is not None:
+                if on_page: on_page(page[:cut], None)
+                if page[:cut]: yield page[:cut]
+                break
+        count += len(page)
+        after = payload.get("data", {}).get("after")
+        if on_page: on_page(page, after)
+        yield page
+        if not after: break
+
+def iter_subreddit_posts(subreddit_slug: str, max_posts: int, delay_seconds: float,
+                         transport: Transport | None = None,
+                         stop: Callable[[Post], bool] | None = None, after: str | None = None,
+                         on_page: Callable[[list[Post], str | None], None] | None = None) -> Iterator[list[Post]]:
+    transport = transport or transport_for_delay(delay_seconds)
+    # Incremental runs need newest-first ordering so already-seen posts end the crawl.
+    listing = "new.json" if stop else ".json"
+    url = f"{transport.base_url}/r/{subreddit_slug}/{listing}"
+    return iter_listing(transport, url, {}, max_posts, delay_seconds, f"r/{subreddit_slug}", subreddit_slug,
+                        stop, after, on_page)
+
+def iter_search_posts(query: str, max_posts: int, delay_seconds: float,
+                      transport: Transport | None = None,
+                      stop: Callable[[Post], bool] | None = None, after: str | None = None,
+                      on_page: Callable[[list[Post], str | None], None] | None = None) -> Iterator[list[Post]]:
+    transport = transport or transport_for_delay(delay_seconds)
+    url = f"{transport.base_url}/search.json"
+    params = {"q": query, "sort": "new"} if stop else {"q": query}
+    return iter_listing(transport, url, params, max_posts, delay_seconds, f"search '{query}'", None,
+                        stop, after, on_page)
+
+def fetch_subreddit_posts(subreddit_slug: str, max_posts: int, delay_seconds: float,
+                          transport: Transport | None = None) -> list[Post]:
+    """Crawl a subreddit into one list of Post records (read them like dicts, or use as_dict())."""
+    return [p for page in iter_subreddit_posts(subreddit_slug, max_posts, delay_seconds, transport) for p in page]
+
+def fetch_search_posts(query: str, max_posts: int, delay_seconds: float,
+                       transport: Transport | None = None) -> list[Post]:
+    """Crawl a search listing into one list of Post records."""
+    return [p for page in iter_search_posts(query, max_posts, delay_seconds, transport) for p in page]
@@ -0,0 +1,192 @@
+# Run metrics (request latency, status codes, stage timings) and the --profile hooks.
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_SAMPLE_SECONDS = 0.005
+PROFILE_NAMES = {"cprofile": "profile.prof", "sample": "profile.folded"}
+
+def _prom_escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prom_labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_prom_escape(v)}"' for k, v in labels.items()) + "}"
+
+class RunMetrics:
+    """Thread-safe run telemetry: stage wall/CPU time, per-source request latency, bytes, retries and sleeps."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started = time.time()
+            self.stages = {}     # stage -> [calls, wall seconds, cpu seconds]
+            self.sources = {}    # source -> requests, bytes, retries, latency sum/max and histogram buckets
+            self.responses = {}  # HTTP status -> count
+            self.retries = {}    # reason (429 | 5xx | error) -> count
+            self.sleep = {"ratelimit": 0.0, "backoff": 0.0}
+            self.targets = {}    # app_key -> {"seconds", "posts"}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # thread_time() is per-thread CPU, so the CPU figure stays right with parallel workers.
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.thread_time() - cpu0
+            with self.lock:
+                entry = self.stages.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1; entry[1] += wall; entry[2] += cpu
+
+    def _source(self, source: str) -> dict:
+        entry = self.sources.get(source)
+        if entry is None:
+            entry = self.sources[source] = {"requests": 0, "bytes": 0, "retries": 0, "latency_sum": 0.0,
+                                            "latency_max": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+        return entry
+
+    def observe_request(self, source: str, seconds: float, status: int, nbytes: int) -> None:
+        i = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self.lock:
+            entry = self._source(source or "other")
+            entry["requests"] += 1
+            entry["bytes"] += nbytes
+            entry["latency_sum"] += seconds
+            entry["latency_max"] = max(entry["latency_max"], seconds)
+            entry["buckets"][i] += 1
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def observe_retry(self, source: str, reason: str, sleep_seconds: float) -> None:
+        with self.lock:
+            self._source(source or "other")["retries"] += 1
+            self.retries[reason] = self.retries.get(reason, 0) + 1
+            self.sleep["backoff"] += sleep_seconds
+
+    def observe_sleep(self, kind: str, seconds: float) -> None:
+        with self.lock:
+            self.sleep[kind] = self.sleep.get(kind, 0.0) + seconds
+
+    def observe_target(self, app_key: str, seconds: float, posts: int) -> None:
+        with self.lock:
+            self.targets[app_key] = {"seconds": round(seconds, 6), "posts": posts}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            sources = {}
+            for source, e in self.sources.items():
+                counts = dict(zip([f"{b:g}" for b in LATENCY_BUCKETS] + ["+Inf"], e["buckets"]))
+                sources[source] = {"requests": e["requests"], "bytes": e["bytes"], "retries": e["retries"],
+                                   "latency_sum": e["latency_sum"], "latency_max": e["latency_max"],
+                                   "latency_buckets": counts}
+            return {
+                "started_at": self.started, "run_seconds": time.time() - self.started,
+                "stages": {k: {"calls": c, "wall_seconds": w, "cpu_seconds": u} for k, (c, w, u) in self.stages.items()},
+                "sources": sources, "responses": {str(k): v for k, v in sorted(self.responses.items())},
+                "retries": dict(self.retries), "sleep_seconds": dict(self.sleep), "targets": dict(self.targets),
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snap, p = self.snapshot(), "reddit_scraper"
+        lines = [f"# TYPE {p}_run_seconds gauge", f"{p}_run_seconds {snap['run_seconds']:.6f}",
+                 f"# TYPE {p}_stage_seconds_total counter"]
+        for stage, e in snap["stages"].items():
+            lines.append(f"{p}_stage_seconds_total{_prom_labels(stage=stage, clock='wall')} {e['wall_seconds']:.6f}")
+            lines.append(f"{p}_stage_seconds_total{_prom_labels(stage=stage, clock='cpu')} {e['cpu_seconds']:.6f}")
+        lines.append(f"# TYPE {p}_stage_calls_total counter")
+        lines += [f"{p}_stage_calls_total{_prom_labels(stage=stage)} {e['calls']}" for stage, e in snap["stages"].items()]
+        lines.append(f"# TYPE {p}_request_seconds histogram")
+        for source, e in snap["sources"].items():
+            cumulative = 0
+            for le, n in e["latency_buckets"].items():
+                cumulative += n
+                lines.append(f"{p}_request_seconds_bucket{_prom_labels(source=source, le=le)} {cumulative}")
+            lines.append(f"{p}_request_seconds_sum{_prom_labels(source=source)} {e['latency_sum']:.6f}")
+            lines.append(f"{p}_request_seconds_count{_prom_labels(source=source)} {e['requests']}")
+        for name, field in (("downloaded_bytes_total", "bytes"), ("retries_total", "retries")):
+            lines.append(f"# TYPE {p}_{name} counter")
+            lines += [f"{p}_{name}{_prom_labels(source=source)} {e[field]}" for source, e in snap["sources"].items()]
+        lines.append(f"# TYPE {p}_responses_total counter")
+        lines += [f"{p}_responses_total{_prom_labels(status=k)} {v}" for k, v in snap["responses"].items()]
+        lines.append(f"# TYPE {p}_sleep_seconds_total counter")
+        lines += [f"{p}_sleep_seconds_total{_prom_labels(kind=k)} {v:.6f}" for k, v in snap["sleep_seconds"].items()]
+        for name, field in (("target_seconds", "seconds"), ("target_posts", "posts")):
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines += [f"{p}_{name}{_prom_labels(target=k)} {v[field]}" for k, v in snap["targets"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write JSON, or the Prometheus text format when `path` ends in .prom."""
+        body = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2)
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+METRICS = RunMetrics()
+
+
+class StackSampler:
+    """All-thread sampling profiler with cProfile's interface; dump_stats writes collapsed stacks."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_SECONDS):
+        self.interval = interval
+        self.counts = {}
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def enable(self) -> None:
+        self.thread.start()
+
+    def disable(self) -> None:
+        self.done.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self.done.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me: continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def dump_stats(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.counts.items(), key=lambda kv: -kv[1]):
+                f.write(f"{stack} {n}\n")
+
+@contextmanager
+def profiled(mode: str | None, outdir: str) -> Iterator[None]:
+    """Run the block under cProfile (calling thread only) or the all-thread StackSampler and save the profile."""
+    if mode is None:
+        yield
+        return
+    os.makedirs(outdir, exist_ok=True)
+    path = os.path.join(outdir, PROFILE_NAMES[mode])
+    profiler = cProfile.Profile() if mode == "cprofile" else StackSampler()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        if mode == "cprofile":
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        print(f"Profile ({mode}) -> {path}")
@@ -0,0 +1,142 @@
+# OAuth app identities for --oauth: token refresh, the on-disk token cache and the identity pool.
+
+import json
+import math
+import os
+import threading
+import time
+
+import requests
+
+from scraper.common import log
+from scraper.files import atomic_output
+from scraper.ratelimit import AdaptiveLimiter
+
+
+REDDIT_OAUTH_URL = "https://oauth.reddit.com"
+OAUTH_TOKEN_PATH = "/api/v1/access_token"
+OAUTH_TOKENS_NAME = ".oauth_tokens.json"
+TOKEN_REFRESH_MARGIN_SECONDS = 60.0  # tokens are renewed this long before they expire
+
+class TokenCache:
+    """OAuth access tokens by identity name, kept in a JSON file (mode 0600) so later runs reuse unexpired ones."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.tokens = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.tokens = json.load(f)
+            except (OSError, ValueError) as e:
+                log(f"ERROR (token cache): {e}; starting empty")
+
+    def get(self, name: str) -> tuple[str, float] | None:
+        entry = self.tokens.get(name)
+        return (entry["access_token"], entry["expires_at"]) if entry else None
+
+    def put(self, name: str, token: str, expires_at: float) -> None:
+        with self.lock:
+            self.tokens[name] = {"access_token": token, "expires_at": expires_at}
+            if not self.path: return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with atomic_output(self.path) as tmp, os.fdopen(
+                    os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+                json.dump(self.tokens, f, indent=2)
+
+class OAuthIdentity:
+    """One OAuth app (password grant when it has a username): its bearer token and its own limiter."""
+
+    def __init__(self, creds: dict, token_url: str, cache: TokenCache, rate: float):
+        self.client_id = creds["client_id"]
+        self.client_secret = creds.get("client_secret", "")
+        self.username = creds.get("username")
+        self.password = creds.get("password")
+        self.name = creds.get("name") or (f"{self.client_id}:{self.username}" if self.username else self.client_id)
+        self.user_agent = creds.get("user_agent") or (
+            f"script:{self.client_id}:1.0" + (f" (by /u/{self.username})" if self.username else ""))
+        self.token_url = token_url
+        self.cache = cache
+        self.limiter = AdaptiveLimiter(rate)
+        self.remaining = None  # requests left in the current window, per the last X-Ratelimit-Remaining
+        self.reset_at = 0.0
+        self.requests = self.refreshes = 0
+        self.token, self.expires_at = cache.get(self.name) or (None, 0.0)
+        self.refresh_at = self.expires_at - TOKEN_REFRESH_MARGIN_SECONDS
+        self.lock = threading.Lock()
+
+    def quota(self, now: float) -> float:
+        """Requests left in this identity's window; unlimited until a response says otherwise."""
+        if self.remaining is None or now >= self.reset_at: return math.inf
+        return self.remaining
+
+    def authorization(self, session: requests.Session, timeout: float) -> str:
+        with self.lock:
+            if self.token is None or time.time() >= self.refresh_at:
+                self._refresh(session, timeout)
+            return f"bearer {self.token}"
+
+    def invalidate(self, authorization: str) -> None:
+        """Forget a token the server rejected, unless another request already replaced it."""
+        with self.lock:
+            if authorization == f"bearer {self.token}": self.token = None
+
+    def _refresh(self, session: requests.Session, timeout: float) -> None:
+        data = ({"grant_type": "password", "username": self.username, "password": self.password}
+                if self.username else {"grant_type": "client_credentials"})
+        resp = session.post(self.token_url, data=data, auth=(self.client_id, self.client_secret),
+                            headers={"User-Agent": self.user_agent}, timeout=timeout)
+        resp.raise_for_status()
+        body = resp.json()
+        if "access_token" not in body:
+            raise RuntimeError(f"OAuth token request for {self.name} failed: {body.get('error', body)}")
+        lifetime = float(body.get("expires_in", 3600))
+        self.token, self.expires_at = body["access_token"], time.time() + lifetime
+        self.refresh_at = self.expires_at - min(TOKEN_REFRESH_MARGIN_SECONDS, lifetime / 2)
+        self.refreshes += 1
+        self.cache.put(self.name, self.token, self.expires_at)
+
+    def observe(self, headers) -> None:
+        self.limiter.observe(headers)
+        try:
+            remaining, reset = float(headers["X-Ratelimit-Remaining"]), float(headers["X-Ratelimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        with self.lock:
+            self.remaining, self.reset_at = remaining, time.monotonic() + reset
+
+class IdentityPool:
+    """OAuth identities sharing the run: each request goes to the identity with the most quota left."""
+
+    def __init__(self, identities: list[OAuthIdentity]):
+        self.identities = identities
+        self.lock = threading.Lock()
+
+    def acquire(self) -> OAuthIdentity:
+        with self.lock:
+            now = time.monotonic()
+            ready = [i for i in self.identities if i.limiter.paused_until <= now]
+            if not ready: ready = [min(self.identities, key=lambda i: i.limiter.paused_until)]
+            identity = max(ready, key=lambda i: (i.quota(now), -i.requests))
+            # Count the request against the window now, so concurrent workers spread out before replies arrive.
+            if identity.remaining is not None: identity.remaining -= 1
+            identity.requests += 1
+        identity.limiter.acquire()
+        return identity
+
+    def summary(self) -> str:
+        return "OAuth: " + ", ".join(f"{i.name} {i.requests} requests/{i.refreshes} token refreshes"
+                                     for i in self.identities)
+
+def load_identities(path: str, token_url: str, token_cache: str | None, delay_seconds: float) -> IdentityPool:
+    """IdentityPool from a JSON list of {client_id, client_secret[, username, password, user_agent, name]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        creds = json.load(f)
+    if isinstance(creds, dict): creds = creds.get("identities", [])
+    if not creds or not all(isinstance(c, dict) and c.get("client_id") for c in creds):
+        raise ValueError("expected a list of {client_id, client_secret[, username, password, user_agent]}")
+    # --delay paces each identity until its X-Ratelimit-* headers arrive.
+    rate = 1.0 / delay_seconds if delay_seconds > 0 else 0.0
+    cache = TokenCache(token_cache)
+    return IdentityPool([OAuthIdentity(c, token_url, cache, rate) for c in creds])
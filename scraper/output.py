@@ -0,0 +1,238 @@
+# Per-app output files: paths, format writers, merging with earlier runs and the views CSV.
+
+import csv
+import json
+import os
+import time
+from collections.abc import Iterable
+
+import requests
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for --format parquet/arrow
+    pa = pq = None
+
+from scraper.common import key_for_app, log, sanitize_dirname, sanitize_filename
+from scraper.files import atomic_output, open_text, read_posts_file
+from scraper.listing import Post, json_default
+from scraper.metrics import METRICS
+from scraper.transport import REDDIT_BASE_URL
+
+
+OUTPUT_FORMATS = ["json", "jsonl", "jsonl.gz", "jsonl.zst", "parquet", "arrow"]
+POST_ARROW_SCHEMA = pa.schema([
+    ("id", pa.string()), ("title", pa.string()), ("url", pa.string()), ("score", pa.int64()),
+    ("num_comments", pa.int64()), ("created_utc", pa.float64()), ("author", pa.string()),
+    ("subreddit", pa.string()), ("subreddit_name_prefixed", pa.string()),
+]) if pa is not None else None
+
+def count_views(posts: Iterable[dict]) -> int:
+    """Number of topic (and discussion) rows append_views would build: one per distinct URL."""
+    return len({p.get("url") for p in posts} - {None, ""})
+
+def with_views(sub: dict) -> dict:
+    """Copy of a result with its topic/discussion views built just before `posts`, in the legacy key order."""
+    topics_key = key_for_app(sub.get("app_key", "unknown"))
+    if topics_key in sub or "discussions" in sub: return sub
+    topics, discussions = [], []
+    append_views(sub.get("app_key", "unknown"), sub.get("posts", []), topics, discussions, set())
+    out = {}
+    for k, v in sub.items():
+        if k == "posts":
+            out[topics_key] = topics
+            out["discussions"] = discussions
+        out[k] = v
+    return out
+
+def append_views(app_key: str, posts: list[dict], topics: list[dict], discussions: list[dict], seen: set) -> None:
+    for post in posts:
+        permalink = post.get("url", "")
+        if not permalink or permalink in seen: continue
+        seen.add(permalink)
+        ptitle = (post.get("title") or "Untitled").strip() or "Untitled"
+        discussions.append({
+            "title": ptitle, "url": permalink, "type": "discussion",
+            "score": post.get("score"), "num_comments": post.get("num_comments"),
+            "created_utc": post.get("created_utc"), "author": post.get("author"),
+            "post_subreddit": post.get("subreddit"),
+        })
+        topics.append({
+            "title": ptitle, "type": f"{app_key}_topic", "post_url": permalink,
+            "score": post.get("score"), "num_comments": post.get("num_comments"),
+            "created_utc": post.get("created_utc"), "post_subreddit": post.get("subreddit"),
+        })
+
+def target_result(app_key: str, info: dict, posts: list[Post]) -> dict:
+    if "sub" in info:
+        slug = info["sub"]
+        display_name = posts[0].get("subreddit", slug) if posts else slug
+        title = posts[0].get("subreddit_name_prefixed", f"r/{slug}") if posts else f"r/{slug}"
+        source_url = f"{REDDIT_BASE_URL}/r/{slug}/"
+        mode, source = "subreddit", slug
+    else:
+        query = info["search"]
+        display_name = title = f"Search: {query}"
+        source_url = f"{REDDIT_BASE_URL}/search/?q={requests.utils.quote(query)}"
+        mode, source = "search", query
+    return {
+        "app_key": app_key,
+        "category": info.get("category", "Uncategorized"),
+        "mode": mode,
+        "source": source,
+        "url": source_url,
+        "title": title,
+        "subreddit": display_name,
+        "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_posts_collected": len(posts),
+        "posts": posts,
+    }
+
+def merge_with_existing(result: dict, outdir: str, fmt: str = "json") -> dict:
+    """Fold previously saved posts for the same app behind the newly fetched ones."""
+    try:
+        old_posts = read_saved_posts(outdir, result.get("category", "Uncategorized"),
+                                     result.get("app_key", "unknown"), fmt)
+    except (OSError, ValueError) as e:
+        log(f"ERROR (merge {result.get('app_key')}): {e}")
+        return result
+    if not old_posts: return result
+    new_ids = {p.get("id") for p in result["posts"]}
+    posts = result["posts"] + [Post.from_dict(p) for p in old_posts if p.get("id") not in new_ids]
+    result["new_posts_collected"] = len(result["posts"])
+    result["total_posts_collected"] = len(posts)
+    result["posts"] = posts
+    return result
+
+def assign_clusters(result: dict, index) -> None:
+    """Tag the result's posts with their near-duplicate cluster IDs (Post records; dicts are converted)."""
+    posts = [p if isinstance(p, Post) else Post.from_dict(p) for p in result.get("posts", [])]
+    with METRICS.stage("near_dupes"):
+        for post, cluster_id in zip(posts, index.assign(posts)):
+            post.cluster_id = cluster_id
+    result["posts"] = posts
+
+
+def output_paths(outdir: str, category_label: str, app_key: str) -> tuple[str, str]:
+    cat_dir = os.path.join(outdir, sanitize_dirname(category_label))
+    base = sanitize_filename(app_key)
+    return os.path.join(cat_dir, f"{base}_topics.json"), os.path.join(cat_dir, f"{base}_topics.csv")
+
+def posts_path(outdir: str, category_label: str, app_key: str, fmt: str) -> str:
+    cat_dir = os.path.join(outdir, sanitize_dirname(category_label))
+    return os.path.join(cat_dir, f"{sanitize_filename(app_key)}_posts.{fmt}")
+
+def meta_path(outdir: str, category_label: str, app_key: str) -> str:
+    cat_dir = os.path.join(outdir, sanitize_dirname(category_label))
+    return os.path.join(cat_dir, f"{sanitize_filename(app_key)}_meta.json")
+
+def write_posts_jsonl(posts: Iterable[dict], path: str) -> int:
+    count = 0
+    with atomic_output(path) as tmp, open_text(tmp, "w") as f:
+        for post in posts:
+            f.write(json.dumps(post, ensure_ascii=False, separators=(",", ":"), default=json_default))
+            f.write("\n")
+            count += 1
+    return count
+
+def write_posts_columnar(posts: list[dict], path: str, fmt: str) -> int:
+    if pa is None:
+        raise RuntimeError(f"--format {fmt} requires the 'pyarrow' package")
+    # Column-wise build reads Post records and dicts alike without materializing a dict per row.
+    schema = POST_ARROW_SCHEMA
+    if any(p.get("cluster_id") is not None for p in posts):
+        schema = schema.append(pa.field("cluster_id", pa.string()))
+    table = pa.table({name: [p.get(name) for p in posts] for name in schema.names}, schema=schema)
+    with atomic_output(path) as tmp:
+        if fmt == "parquet":
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            # Uncompressed Arrow IPC so loaders can memory-map it.
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as w:
+                w.write_table(table)
+    return table.num_rows
+
+def read_saved_posts(outdir: str, category_label: str, app_key: str, fmt: str = "json") -> list[dict]:
+    if fmt == "json":
+        json_name, _ = output_paths(outdir, category_label, app_key)
+        if not os.path.exists(json_name): return []
+        with open(json_name, "r", encoding="utf-8") as f:
+            return json.load(f).get("posts", [])
+    path = posts_path(outdir, category_label, app_key, fmt)
+    return read_posts_file(path, fmt) if os.path.exists(path) else []
+
+def write_views_csv(sub: dict, csv_name: str) -> None:
+    app = sub.get("app_key", "")
+    topics = [v for k, v in sub.items() if k.endswith("_topics") and isinstance(v, list)]
+    discussions = sub.get("discussions")
+    if not topics and discussions is None:
+        # Compact formats only keep posts; rebuild the views from them.
+        topic_list, discussions = [], []
+        append_views(app, sub.get("posts", []), topic_list, discussions, set())
+        topics = [topic_list]
+    with atomic_output(csv_name) as tmp, open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["App Key","Category","Type","Title","URL","Post Subreddit","Scraped At"])
+        scraped_at = sub.get("scraped_at", "")
+        category = sub.get("category", "")
+        for v in topics:
+            for topic in v:
+                w.writerow([
+                    app, category, topic.get("type",""),
+                    topic.get("title",""), topic.get("post_url",""),
+                    topic.get("post_subreddit",""), scraped_at,
+                ])
+        for d in discussions or []:
+            w.writerow([
+                app, category, d.get("type",""),
+                d.get("title",""), d.get("url",""),
+                d.get("post_subreddit",""), scraped_at,
+            ])
+
+def save_compact(sub: dict, outdir: str, fmt: str) -> None:
+    """Write one app as a single post store plus a small metadata sidecar (no topic/discussion copies)."""
+    category_label, app_key = sub.get("category", "Uncategorized"), sub.get("app_key", "unknown")
+    path = posts_path(outdir, category_label, app_key, fmt)
+    posts = sub.get("posts", [])
+    if fmt in ("parquet", "arrow"):
+        write_posts_columnar(posts, path, fmt)
+    else:
+        write_posts_jsonl(posts, path)
+    meta = {k: v for k, v in sub.items() if k not in ("posts", "discussions") and not k.endswith("_topics")}
+    meta["format"] = fmt
+    meta["posts_file"] = os.path.basename(path)
+    with atomic_output(meta_path(outdir, category_label, app_key)) as tmp, open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=True)
+    log(f"Saved {fmt.upper()} -> {path}")
+
+def save_scraped_data_per_app(data: list[dict], outdir: str, fmt: str = "json", export_views: bool = False) -> bool:
+    """Write each app's files; errors are logged per file. Returns False if any file could not be written."""
+    if not data:
+        print("No data"); return True
+    ok = True
+    for sub in data:
+        json_name, csv_name = output_paths(outdir, sub.get("category", "Uncategorized"), sub.get("app_key", "unknown"))
+        os.makedirs(os.path.dirname(json_name), exist_ok=True)
+
+        if fmt != "json":
+            try:
+                save_compact(sub, outdir, fmt)
+            except Exception as e:
+                log(f"ERROR ({fmt}): {e}"); ok = False
+            if not export_views: continue
+        else:
+            sub = with_views(sub)  # built once, shared by the JSON file and the CSV below
+            try:
+                with atomic_output(json_name) as tmp, open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(sub, f, indent=2, ensure_ascii=True, default=json_default)
+                log(f"Saved JSON -> {json_name}")
+            except Exception as e:
+                log(f"ERROR (JSON): {e}"); ok = False
+
+        try:
+            write_views_csv(sub, csv_name)
+            log(f"Saved CSV  -> {csv_name}")
+        except Exception as e:
+            log(f"ERROR (CSV): {e}"); ok = False
+    return ok
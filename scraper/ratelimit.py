@@ -0,0 +1,104 @@
+# Request pacing: the fixed-delay token bucket, the X-Ratelimit-* driven limiter and retry backoff.
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+RATELIMIT_FULL_SPEED_FRACTION = 0.5
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all workers to cap total requests/sec."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        # Stops every worker, e.g. when the server asks us to back off with Retry-After.
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers) -> None:
+        pass
+
+class AdaptiveLimiter(TokenBucket):
+    """Paces requests from Reddit's X-Ratelimit-* headers, spreading the window's budget until it resets."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        super().__init__(rate, capacity)
+        self.interval = None
+        self.next_allowed = 0.0
+
+    def acquire(self) -> None:
+        if self.interval is None: return super().acquire()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                start = max(self.next_allowed, self.paused_until)
+                if now >= start:
+                    self.next_allowed = now + self.interval
+                    return
+                wait = start - now
+            time.sleep(wait)
+
+    def observe(self, headers) -> None:
+        try:
+            remaining = float(headers["X-Ratelimit-Remaining"])
+            reset = float(headers["X-Ratelimit-Reset"])
+            used = float(headers.get("X-Ratelimit-Used", 0))
+        except (KeyError, TypeError, ValueError):
+            return
+        with self.lock:
+            if remaining < 1:
+                self.paused_until = max(self.paused_until, time.monotonic() + reset)
+                self.interval = reset
+                return
+            fraction_left = remaining / max(remaining + used, 1.0)
+            pressure = max(0.0, 1.0 - fraction_left / RATELIMIT_FULL_SPEED_FRACTION)
+            self.interval = reset / remaining * pressure
+
+def limiter_for_delay(delay_seconds: float, adaptive: bool = False) -> TokenBucket:
+    # A delay of N seconds between requests is a rate of 1/N requests/sec across the whole run.
+    rate = 1.0 / delay_seconds if delay_seconds > 0 else 0.0
+    return AdaptiveLimiter(rate) if adaptive else TokenBucket(rate)
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_seconds(attempt: int, delay_seconds: float) -> float:
+    # Exponential backoff with jitter, so parallel workers don't retry in lockstep.
+    base = max(delay_seconds, BACKOFF_BASE_SECONDS)
+    return min(BACKOFF_MAX_SECONDS, base * 2 ** attempt) * random.uniform(0.5, 1.0)
@@ -0,0 +1,274 @@
+# Scraping targets: one crawl per target or coalesced r/a+b+c groups, run in parallel or as a --queue worker.
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+
+from scraper.apps import build_targets, source_key_for, target_key_for
+from scraper.common import buffer_log, log, take_log_buffer
+from scraper.listing import REDDIT_LISTING_CAP, iter_listing, iter_search_posts, iter_subreddit_posts
+from scraper.metrics import METRICS
+from scraper.output import count_views, target_result
+from scraper.state import RunManifest, StateStore, TargetCheckpoint
+from scraper.transport import DEFAULT_POOL_SIZE, Transport, transport_for_delay
+from scraper.workqueue import DEFAULT_LEASE_SECONDS, QUEUE_POLL_SECONDS, WorkQueue, default_worker_id
+from scraper.writer import RunWriter
+
+
+DEFAULT_CONCURRENCY = 1
+DEFAULT_COALESCE = 1
+COALESCE_OVERSCAN = 2
+
+def scrape_one_target(app_key: str, info: dict, max_posts: int, delay_seconds: float,
+                      transport: Transport | None = None, state: StateStore | None = None,
+                      checkpoint: TargetCheckpoint | None = None) -> dict:
+    stop = None
+    if state is not None:
+        known_ids = state.known_ids(source_key_for(info))
+        _, newest_utc = state.cursor_for(source_key_for(info))
+        stop = lambda post: post.get("id") in known_ids or (
+            newest_utc is not None and (post.get("created_utc") or 0) < newest_utc)
+    resumed = checkpoint.posts if checkpoint else []
+    after = checkpoint.after if checkpoint else None
+    on_page = checkpoint.save_page if checkpoint else None
+    remaining = 0 if checkpoint and checkpoint.exhausted else max_posts - len(resumed)
+    if resumed:
+        log(f"Resuming {app_key} after {len(resumed)} checkpointed posts...")
+    if "sub" in info:
+        slug = info["sub"]
+        log(f"Scraping r/{slug} (up to {max_posts} posts)...")
+        pages = iter_subreddit_posts(slug, remaining, delay_seconds, transport, stop, after, on_page)
+    else:
+        query = info["search"]
+        log(f"Searching Reddit for '{query}' (up to {max_posts} posts)...")
+        pages = iter_search_posts(query, remaining, delay_seconds, transport, stop, after, on_page)
+    # Only the compact Post records are kept; topic/discussion views are derived at write time.
+    posts = []
+    for page in chain([resumed] if resumed else [], pages):
+        posts.extend(page)
+    return target_result(app_key, info, posts)
+
+def plan_groups(targets: list[tuple[str, dict]], group_size: int, max_posts: int) -> list[list[tuple[str, dict]]]:
+    """Batch up to `group_size` subreddit targets per r/a+b+c listing, within REDDIT_LISTING_CAP posts."""
+    group_size = max(1, min(group_size, REDDIT_LISTING_CAP // max(max_posts, 1)))
+    subs = [t for t in targets if "sub" in t[1]]
+    groups = [subs[i:i + group_size] for i in range(0, len(subs), group_size)]
+    return groups + [[t] for t in targets if "sub" not in t[1]]
+
+def scrape_group(group: list[tuple[str, dict]], max_posts: int, delay_seconds: float,
+                 transport: Transport) -> list[dict]:
+    """Crawl one r/a+b+c listing and split it into per-target results; short ones continue their own listing."""
+    keys = [target_key_for(app_key, info) for app_key, info in group]
+    buckets, seen = {k: [] for k in keys}, {k: set() for k in keys}
+    owners_by_sub = {}
+    for key, (_, info) in zip(keys, group):
+        owners_by_sub.setdefault(info["sub"].lower(), []).append(key)
+    label = "r/" + "+".join(dict.fromkeys(info["sub"] for _, info in group))
+    url, params = f"{transport.base_url}/{label}/.json", {}
+    owners = lambda post: owners_by_sub.get((post.get("subreddit") or "").lower(), [])
+
+    log(f"Coalesced {label} for {len(group)} targets (up to {max_posts} posts each)...")
+    fetched, cursor = 0, {"after": None}
+    for page in iter_listing(transport, url, params, max_posts * len(group) * COALESCE_OVERSCAN, delay_seconds,
+                             label, on_page=lambda page, after: cursor.update(after=after)):
+        fetched += len(page)
+        for post in page:
+            for key in owners(post):
+                if len(buckets[key]) < max_posts and post.get("id") not in seen[key]:
+                    buckets[key].append(post)
+                    seen[key].add(post.get("id"))
+        if all(len(b) >= max_posts for b in buckets.values()): break
+    complete = cursor["after"] is None and fetched < REDDIT_LISTING_CAP
+
+    results = []
+    for key, (app_key, info) in zip(keys, group):
+        posts = buckets[key]
+        if len(posts) < max_posts and not complete:
+            log(f"Topping up {app_key}: {len(posts)}/{max_posts} posts from the combined listing")
+            # Continue the subreddit's own listing after the last of its posts the combined one returned.
+            after = f"t3_{posts[-1].get('id')}" if posts else None
+            for page in iter_subreddit_posts(info["sub"], max_posts - len(posts), delay_seconds, transport,
+                                             after=after):
+                posts.extend(p for p in page if p.get("id") not in seen[key])
+                seen[key].update(p.get("id") for p in page)
+                if len(posts) >= max_posts: break
+            del posts[max_posts:]
+        results.append(target_result(app_key, info, posts))
+    return results
+
+def run_target(app_key: str, info: dict, buffered: bool, max_posts: int, delay_seconds: float,
+                transport: Transport, state: StateStore | None = None, manifest: RunManifest | None = None,
+                sink: Callable[[dict], None] | None = None) -> tuple[dict | None, list[str]]:
+    buffer_log(buffered)
+    target_key = target_key_for(app_key, info)
+    try:
+        if manifest is not None and manifest.is_done(target_key):
+            log(f"Skipping {app_key}: already completed in the resumed run")
+            result = None
+        else:
+            checkpoint = manifest.checkpoint_for(target_key) if manifest is not None else None
+            t0 = time.perf_counter()
+            result = scrape_one_target(app_key, info, max_posts, delay_seconds, transport, state, checkpoint)
+            result = deliver(target_key, result, time.perf_counter() - t0, manifest, sink)
+    except Exception as e:
+        result = None
+        log(f"ERROR ({app_key}): {e}")
+    return result, take_log_buffer()
+
+def hand_off(sink: Callable[[dict], None], result: dict, on_written: Callable[[], None] | None = None,
+             on_failed: Callable[[], None] | None = None) -> None:
+    """Pass a result to a sink; on_written runs once it is saved, on_failed if a RunWriter could not save it."""
+    if isinstance(sink, RunWriter):
+        sink(result, on_written, on_failed)
+        return
+    sink(result)
+    if on_written is not None: on_written()
+
+def deliver(target_key: str, result: dict, seconds: float, manifest: RunManifest | None,
+             sink: Callable[[dict], None] | None) -> dict | None:
+    app_key = result["app_key"]
+    topics_count = discussions_count = count_views(result["posts"])
+    posts_count = result.get("total_posts_collected", 0)
+    METRICS.observe_target(target_key, seconds, posts_count)
+    log(
+        f"Collected for {app_key}: "
+        f"{posts_count} posts, {topics_count} topics, {discussions_count} discussions"
+    )
+    # A target whose output is not saved stays in_progress, so --resume delivers it again from its partial pages.
+    done = partial(manifest.mark_done, target_key) if manifest is not None else None
+    if sink is not None:
+        # Hand the target off right away so only one target's data is held per worker.
+        hand_off(sink, result, done)
+        result = None
+    elif done is not None:
+        done()
+    return result
+
+def _run_group(group: list[tuple[str, dict]], buffered: bool, max_posts: int, delay_seconds: float,
+               transport: Transport, manifest: RunManifest | None = None,
+               sink: Callable[[dict], None] | None = None) -> tuple[list[dict], list[str]]:
+    buffer_log(buffered)
+    results = []
+    try:
+        t0 = time.perf_counter()
+        group_results = scrape_group(group, max_posts, delay_seconds, transport)
+        # The combined crawl serves every target at once, so each is charged the group's time.
+        seconds = time.perf_counter() - t0
+        for (app_key, info), result in zip(group, group_results):
+            result = deliver(target_key_for(app_key, info), result, seconds, manifest, sink)
+            if result is not None: results.append(result)
+    except Exception as e:
+        log(f"ERROR ({'+'.join(app_key for app_key, _ in group)}): {e}")
+    return results, take_log_buffer()
+
+def scrape_reddit(selected_apps: list[str], selected_categories: list[str], max_posts: int, delay_seconds: float,
+                  concurrency: int = DEFAULT_CONCURRENCY, transport: Transport | None = None,
+                  state: StateStore | None = None, manifest: RunManifest | None = None,
+                  sink: Callable[[dict], None] | None = None, coalesce: int = DEFAULT_COALESCE) -> list[dict]:
+    """Scrape every selected target; results are returned, or passed to `sink` as each target finishes."""
+    deduped = build_targets(selected_apps, selected_categories)
+    if not deduped:
+        print("No valid targets.")
+        return []
+
+    # One transport for the whole run: its bucket paces every request across all workers
+    # and its pooled session pays the connection setup once per host.
+    transport = transport or transport_for_delay(delay_seconds, max(DEFAULT_POOL_SIZE, concurrency))
+    run = partial(run_target, max_posts=max_posts, delay_seconds=delay_seconds, transport=transport,
+                  state=state, manifest=manifest, sink=sink)
+
+    def run_one(app_key: str, info: dict, buffered: bool) -> tuple[list[dict], list[str]]:
+        result, lines = run(app_key, info, buffered)
+        return ([result] if result is not None else []), lines
+
+    # Each job takes `buffered` and returns (results, log lines).
+    jobs = [partial(run_one, app_key, info) for app_key, info in deduped]
+    if coalesce > 1 and state is None:
+        run_group = partial(_run_group, max_posts=max_posts, delay_seconds=delay_seconds, transport=transport,
+                            manifest=manifest, sink=sink)
+        pending = [t for t in deduped if manifest is None or not manifest.is_done(target_key_for(*t))]
+        jobs = [partial(run_group, group) if len(group) > 1 else partial(run_one, *group[0])
+                for group in plan_groups(pending, coalesce, max_posts)]
+    results = []
+    if concurrency <= 1:
+        for job in jobs:
+            results.extend(job(False)[0])
+        return results
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(job, True) for job in jobs]
+        # Collect in submission order so results and console output stay deterministic.
+        for fut in futures:
+            job_results, lines = fut.result()
+            for line in lines: print(line)
+            results.extend(job_results)
+    return results
+
+def run_worker(queue: WorkQueue, max_posts: int, delay_seconds: float, concurrency: int = DEFAULT_CONCURRENCY,
+               transport: Transport | None = None, state: StateStore | None = None,
+               sink: Callable[[dict], None] | None = None, worker_id: str | None = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """Drain a shared WorkQueue with `concurrency` threads; returns the number of targets completed."""
+    worker_id = worker_id or default_worker_id()
+    transport = transport or transport_for_delay(delay_seconds, max(DEFAULT_POOL_SIZE, concurrency))
+    held, lock, stop = set(), threading.Lock(), threading.Event()
+    completed = 0
+
+    def heartbeat() -> None:
+        while not stop.wait(lease_seconds / 3):
+            with lock:
+                keys = list(held)
+            for key in keys:
+                queue.heartbeat(key, worker_id, lease_seconds)
+
+    def work() -> None:
+        nonlocal completed
+        while True:
+            job = queue.claim(worker_id, lease_seconds)
+            if job is None:
+                counts = queue.counts()
+                # Wait on targets leased elsewhere: if their worker dies they come back as pending.
+                if not counts.get("leased") and not counts.get("expired"): return
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+            target_key, app_key, info = job
+            written = []
+            def write(result: dict) -> None:
+                if not queue.heartbeat(target_key, worker_id, lease_seconds):
+                    log(f"Lease on {target_key} was lost; leaving it to the worker that holds it now")
+                    return
+                written.append(target_key)
+                # The job is completed once its output is on disk, which may be after run_target returns.
+                complete = partial(queue.complete, target_key, worker_id)
+                if sink is not None:
+                    # Unsaved output releases the lease instead, so the target is claimed again.
+                    hand_off(sink, result, complete, partial(queue.fail, target_key, worker_id, "output not saved"))
+                else: complete()
+            with lock:
+                held.add(target_key)
+            try:
+                _, lines = run_target(app_key, info, True, max_posts, delay_seconds, transport, state, sink=write)
+            finally:
+                with lock:
+                    held.discard(target_key)
+            with lock:
+                for line in lines: print(line)
+            if written:
+                with lock:
+                    completed += 1
+            else:
+                queue.fail(target_key, worker_id, next((l for l in lines if "ERROR" in l), "not written"))
+
+    beat = threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True)
+    beat.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for fut in [pool.submit(work) for _ in range(concurrency)]:
+                fut.result()
+    finally:
+        stop.set()
+        beat.join()
+    return completed
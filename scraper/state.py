@@ -0,0 +1,156 @@
+# Cross-run state: --since-last cursors, the --resume run manifest and per-target checkpoints.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from scraper.common import sanitize_filename
+from scraper.listing import Post, json_default
+
+
+STATE_DB_NAME = ".scraper_state.sqlite3"
+MANIFEST_NAME = ".run_manifest.json"
+PARTIAL_DIRNAME = ".partial"
+
+def source_key_for_result(result: dict) -> str:
+    return f"sub:{result['source']}" if result.get("mode") == "subreddit" else f"search:{result['source']}"
+
+class StateStore:
+    """SQLite store of per-source cursors and seen post IDs for --since-last runs (and the --daemon schedule)."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " source_key TEXT PRIMARY KEY, newest_id TEXT, newest_created_utc REAL, updated_at TEXT);"
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " source_key TEXT NOT NULL, post_id TEXT NOT NULL, PRIMARY KEY (source_key, post_id))"
+                " WITHOUT ROWID;"
+                "CREATE TABLE IF NOT EXISTS schedule ("
+                " target_key TEXT PRIMARY KEY, rate REAL, last_poll REAL, next_poll REAL NOT NULL);"
+            )
+
+    def cursor_for(self, source_key: str) -> tuple[str | None, float | None]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT newest_id, newest_created_utc FROM sources WHERE source_key = ?", (source_key,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def known_ids(self, source_key: str) -> set[str]:
+        with self.lock:
+            rows = self.conn.execute("SELECT post_id FROM seen WHERE source_key = ?", (source_key,))
+            return {r[0] for r in rows}
+
+    def record(self, source_key: str, posts: list[dict]) -> None:
+        dated = [p for p in posts if p.get("id") and p.get("created_utc") is not None]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen (source_key, post_id) VALUES (?, ?)",
+                [(source_key, p["id"]) for p in posts if p.get("id")],
+            )
+            if not dated: return
+            newest = max(dated, key=lambda p: p["created_utc"])
+            self.conn.execute(
+                "INSERT INTO sources (source_key, newest_id, newest_created_utc, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(source_key) DO UPDATE SET"
+                " newest_id = excluded.newest_id, newest_created_utc = excluded.newest_created_utc,"
+                " updated_at = excluded.updated_at"
+                " WHERE excluded.newest_created_utc >= COALESCE(sources.newest_created_utc, 0)",
+                (source_key, newest["id"], newest["created_utc"], time.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+
+    def load_schedule(self) -> dict[str, tuple[float | None, float | None, float]]:
+        """target_key -> (posts/sec estimate, last poll, next poll) as saved by the --daemon scheduler."""
+        with self.lock:
+            rows = self.conn.execute("SELECT target_key, rate, last_poll, next_poll FROM schedule").fetchall()
+        return {r[0]: r[1:] for r in rows}
+
+    def save_schedule(self, target_key: str, rate: float | None, last_poll: float | None, next_poll: float) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO schedule (target_key, rate, last_poll, next_poll) VALUES (?, ?, ?, ?)",
+                (target_key, rate, last_poll, next_poll),
+            )
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+class RunManifest:
+    """Checkpoint of a run (<outdir>/.run_manifest.json); in-progress posts are kept under <outdir>/.partial/."""
+
+    def __init__(self, outdir: str, resume: bool = False):
+        self.path = os.path.join(outdir, MANIFEST_NAME)
+        self.partial_dir = os.path.join(outdir, PARTIAL_DIRNAME)
+        self.lock = threading.Lock()
+        self.targets = {}
+        if resume and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.targets = json.load(f).get("targets", {})
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._write()
+
+    def is_done(self, target_key: str) -> bool:
+        return self.targets.get(target_key, {}).get("status") == "done"
+
+    def checkpoint_for(self, target_key: str) -> "TargetCheckpoint":
+        return TargetCheckpoint(self, target_key)
+
+    def update(self, target_key: str, **fields) -> None:
+        with self.lock:
+            self.targets[target_key] = dict(self.targets.get(target_key, {}), **fields)
+            self._write()
+
+    def mark_done(self, target_key: str) -> None:
+        self.update(target_key, status="done", after=None)
+        partial = self.partial_path(target_key)
+        if os.path.exists(partial): os.remove(partial)
+
+    def partial_path(self, target_key: str) -> str:
+        return os.path.join(self.partial_dir, f"{sanitize_filename(target_key)}.jsonl")
+
+    def _write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.strftime("%Y-%m-%d %H:%M:%S"), "targets": self.targets}, f, indent=2)
+        os.replace(tmp, self.path)
+
+class TargetCheckpoint:
+    """Per-target view of the manifest used by scrape_one_target to resume and record progress."""
+
+    def __init__(self, manifest: RunManifest, target_key: str):
+        self.manifest = manifest
+        self.target_key = target_key
+        self.path = manifest.partial_path(target_key)
+        entry = manifest.targets.get(target_key, {})
+        self.posts, self.after, self.exhausted, self.size = [], None, False, 0
+        committed = entry.get("partial_bytes") or 0
+        if (entry.get("status") == "in_progress" and committed and os.path.exists(self.path)
+                and os.path.getsize(self.path) >= committed):
+            with open(self.path, "r+b") as f:
+                # Drop posts appended after the last manifest update (a crash in between), or --resume repeats them.
+                f.truncate(committed)
+                self.posts = [Post.from_dict(json.loads(line)) for line in f if line.strip()]
+            self.after = entry.get("after")
+            self.exhausted = self.after is None
+            self.size = committed
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        self.pages = entry.get("pages", 0) if self.posts else 0
+        manifest.update(target_key, status="in_progress", after=self.after, pages=self.pages,
+                        partial_bytes=self.size)
+
+    def save_page(self, page: list[Post], after: str | None) -> None:
+        with open(self.path, "ab") as f:
+            f.write("".join(json.dumps(post, ensure_ascii=True, default=json_default) + "\n"
+                            for post in page).encode("ascii"))
+            self.size = f.tell()
+        self.pages += 1
+        self.manifest.update(self.target_key, status="in_progress", after=after, pages=self.pages,
+                             partial_bytes=self.size)
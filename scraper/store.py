@@ -0,0 +1,87 @@
+# Consolidated SQLite post store (--store).
+
+import os
+import sqlite3
+import threading
+
+
+STORE_BATCH_SIZE = 500
+
+class SqlitePostStore:
+    """Consolidated SQLite backend (--store sqlite:PATH): one row per (app_key, post id), upserted in batches."""
+
+    POST_COLUMNS = ["app_key", "category", "id", "title", "url", "score", "num_comments", "created_utc",
+                    "author", "subreddit", "subreddit_name_prefixed", "scraped_at", "cluster_id"]
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(
+                "CREATE TABLE IF NOT EXISTS targets ("
+                " app_key TEXT PRIMARY KEY, category TEXT, mode TEXT, source TEXT, url TEXT, title TEXT,"
+                " subreddit TEXT, scraped_at TEXT, total_posts_collected INTEGER);"
+                "CREATE TABLE IF NOT EXISTS posts ("
+                " app_key TEXT NOT NULL, category TEXT, id TEXT NOT NULL, title TEXT, url TEXT, score INTEGER,"
+                " num_comments INTEGER, created_utc REAL, author TEXT, subreddit TEXT,"
+                " subreddit_name_prefixed TEXT, scraped_at TEXT, cluster_id TEXT, PRIMARY KEY (app_key, id));"
+                "CREATE INDEX IF NOT EXISTS posts_category ON posts (category);"
+                "CREATE INDEX IF NOT EXISTS posts_subreddit ON posts (subreddit);"
+                "CREATE INDEX IF NOT EXISTS posts_created ON posts (created_utc);"
+                "CREATE INDEX IF NOT EXISTS posts_url ON posts (url);"
+                "CREATE TABLE IF NOT EXISTS comments ("
+                " app_key TEXT NOT NULL, id TEXT NOT NULL, link_id TEXT, parent_id TEXT, author TEXT, body TEXT,"
+                " score INTEGER, created_utc REAL, depth INTEGER, PRIMARY KEY (app_key, id));"
+                "CREATE INDEX IF NOT EXISTS comments_link ON comments (link_id);"
+            )
+            if "cluster_id" not in {row[1] for row in self.conn.execute("PRAGMA table_info(posts)")}:
+                self.conn.execute("ALTER TABLE posts ADD COLUMN cluster_id TEXT")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS posts_cluster ON posts (cluster_id)")
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.POST_COLUMNS if c not in ("app_key", "id"))
+        self.upsert_sql = (
+            f"INSERT INTO posts ({', '.join(self.POST_COLUMNS)}) VALUES ({', '.join('?' * len(self.POST_COLUMNS))})"
+            f" ON CONFLICT(app_key, id) DO UPDATE SET {updates}"
+        )
+
+    def write(self, result: dict) -> int:
+        app_key, category = result.get("app_key", "unknown"), result.get("category", "Uncategorized")
+        scraped_at = result.get("scraped_at")
+        rows = [
+            (app_key, category, p["id"], p.get("title"), p.get("url"), p.get("score"), p.get("num_comments"),
+             p.get("created_utc"), p.get("author"), p.get("subreddit"), p.get("subreddit_name_prefixed"), scraped_at,
+             p.get("cluster_id"))
+            for p in result.get("posts", []) if p.get("id")
+        ]
+        # One transaction per target, flushed in fixed-size batches.
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO targets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (app_key, category, result.get("mode"), result.get("source"), result.get("url"),
+                 result.get("title"), result.get("subreddit"), scraped_at, result.get("total_posts_collected")),
+            )
+            for start in range(0, len(rows), STORE_BATCH_SIZE):
+                self.conn.executemany(self.upsert_sql, rows[start:start + STORE_BATCH_SIZE])
+        return len(rows)
+
+    def write_comments(self, app_key: str, comments: list[dict]) -> None:
+        rows = [
+            (app_key, c["id"], c.get("link_id"), c.get("parent_id"), c.get("author"), c.get("body"),
+             c.get("score"), c.get("created_utc"), c.get("depth"))
+            for c in comments if c.get("id")
+        ]
+        with self.lock, self.conn:
+            for start in range(0, len(rows), STORE_BATCH_SIZE):
+                self.conn.executemany("INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      rows[start:start + STORE_BATCH_SIZE])
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+def open_store(spec: str) -> SqlitePostStore:
+    scheme, _, path = spec.partition(":")
+    if scheme != "sqlite" or not path:
+        raise ValueError(f"unsupported store '{spec}' (expected sqlite:PATH)")
+    return SqlitePostStore(path)
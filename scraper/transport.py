@@ -0,0 +1,143 @@
+# Pooled HTTP session with pacing, the response cache and OAuth identities, plus the retry loop.
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from scraper.cache import FixtureRecorder, ResponseCache, cached_response
+from scraper.common import log
+from scraper.metrics import METRICS
+from scraper.oauth import IdentityPool
+from scraper.ratelimit import TokenBucket, backoff_seconds, limiter_for_delay, parse_retry_after
+
+
+UA_BROWSER = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+REDDIT_BASE_URL = "https://www.reddit.com"
+MAX_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT_SECONDS = 15.0
+
+class Transport:
+    """Shared HTTP layer: one pooled keep-alive session plus the run-wide limiter or an IdentityPool."""
+
+    def __init__(self, limiter: TokenBucket, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, cache: ResponseCache | None = None,
+                 base_url: str = REDDIT_BASE_URL, recorder: FixtureRecorder | None = None,
+                 identities: IdentityPool | None = None):
+        self.limiter = limiter
+        self.identities = identities
+        self.revalidate_heads = False  # set for --since-last/--daemon: never serve a cached first page unchecked
+        self.timeout = timeout
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": UA_BROWSER, "Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, params: dict | None = None, source: str = "") -> requests.Response:
+        """GET through the cache and limiter; `source` labels the request in METRICS (e.g. "r/python")."""
+        resp = self._get(url, params, source)
+        if self.recorder is not None and resp.status_code == 200:
+            self.recorder.save(url, params, resp)
+        return resp
+
+    def _send(self, url: str, params: dict | None, headers: dict | None, source: str) -> requests.Response:
+        t0 = time.perf_counter()
+        identity = self.identities.acquire() if self.identities is not None else None
+        if identity is None: self.limiter.acquire()
+        t1 = time.perf_counter()
+        METRICS.observe_sleep("ratelimit", t1 - t0)
+        with METRICS.stage("network"):
+            if identity is not None:
+                headers = dict(headers or {}, Authorization=identity.authorization(self.session, self.timeout))
+                headers["User-Agent"] = identity.user_agent
+            resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            if resp.status_code == 401 and identity is not None:
+                # The token expired or was revoked early: get a new one and send the request once more.
+                identity.invalidate(headers["Authorization"])
+                headers["Authorization"] = identity.authorization(self.session, self.timeout)
+                resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        METRICS.observe_request(source, time.perf_counter() - t1, resp.status_code, len(resp.content))
+        (identity or self.limiter).observe(resp.headers)
+        resp.identity = identity
+        return resp
+
+    def pause(self, seconds: float, resp: requests.Response | None = None) -> None:
+        """Honor a Retry-After: only the OAuth identity that received it waits, otherwise every worker does."""
+        identity = getattr(resp, "identity", None)
+        (identity.limiter if identity is not None else self.limiter).pause(seconds)
+
+    def _get(self, url: str, params: dict | None, source: str) -> requests.Response:
+        if self.cache is None:
+            return self._send(url, params, None, source)
+
+        key = ResponseCache.key_for(url, params)
+        entry = self.cache.lookup(key)
+        headers = {}
+        if entry is not None:
+            body, etag, last_modified, fresh = entry
+            # Incremental runs must see new posts: first pages (no `after` cursor) are always revalidated.
+            if fresh and not (self.revalidate_heads and not (params or {}).get("after")):
+                self.cache.tally("hits")
+                return cached_response(url, body)
+            if etag: headers["If-None-Match"] = etag
+            if last_modified: headers["If-Modified-Since"] = last_modified
+        resp = self._send(url, params, headers, source)
+        if resp.status_code == 304 and entry is not None:
+            self.cache.tally("revalidated")
+            self.cache.refresh(key)
+            return cached_response(url, entry[0])
+        self.cache.tally("misses")
+        if resp.status_code == 200:
+            self.cache.store(key, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return resp
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache is not None: self.cache.close()
+
+def transport_for_delay(delay_seconds: float, pool_size: int = DEFAULT_POOL_SIZE,
+                        timeout: float = DEFAULT_TIMEOUT_SECONDS, cache: ResponseCache | None = None,
+                        adaptive: bool = False, base_url: str = REDDIT_BASE_URL,
+                        recorder: FixtureRecorder | None = None, identities: IdentityPool | None = None) -> Transport:
+    return Transport(limiter_for_delay(delay_seconds, adaptive), pool_size, timeout, cache, base_url, recorder,
+                     identities)
+
+
+def get_with_retries(transport: Transport, url: str, params: dict, label: str,
+                     delay_seconds: float, source: str | None = None) -> requests.Response:
+    # `source` groups requests in METRICS; it defaults to the label (e.g. "r/python").
+    source = source or label
+    for attempt in range(MAX_RETRIES):
+        try:
+            resp = transport.get(url, params, source)
+            if resp.status_code == 429 or 500 <= resp.status_code < 600:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    wait = retry_after
+                    transport.pause(wait, resp)
+                else:
+                    wait = backoff_seconds(attempt, delay_seconds)
+                log(f"Transient HTTP {resp.status_code} on {label}; sleeping {wait:.1f}s...")
+                METRICS.observe_retry(source, "429" if resp.status_code == 429 else "5xx", wait)
+                time.sleep(wait)
+                continue
+            resp.raise_for_status()
+            return resp
+        except RequestException as e:
+            if attempt == MAX_RETRIES - 1:
+                raise RuntimeError(f"Request failed on {label}: {e}") from e
+            wait = backoff_seconds(attempt, delay_seconds)
+            log(f"Request error on {label}; sleeping {wait:.1f}s...")
+            METRICS.observe_retry(source, "error", wait)
+            time.sleep(wait)
+    raise RuntimeError(f"Failed after {MAX_RETRIES} retries on {label}")
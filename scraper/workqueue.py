@@ -0,0 +1,205 @@
+# Lease-based work queues for --queue workers (in-memory and shared SQLite).
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from scraper.apps import target_key_for
+
+
+DEFAULT_LEASE_SECONDS = 120.0
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_POLL_SECONDS = 0.25
+
+class WorkQueue(ABC):
+    """Lease-based target queue; expired leases go back to pending, so a crashed worker's targets are retried."""
+
+    @abstractmethod
+    def enqueue(self, targets: list[tuple[str, dict]]) -> int:
+        """Add targets as pending; finished or failed ones are reset, leased ones are left alone."""
+
+    @abstractmethod
+    def claim(self, worker: str, lease_seconds: float) -> tuple[str, str, dict] | None:
+        """Lease the next pending target: (target_key, app_key, info), or None if nothing is pending."""
+
+    @abstractmethod
+    def heartbeat(self, target_key: str, worker: str, lease_seconds: float) -> bool:
+        """Extend a lease; False means the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, target_key: str, worker: str) -> None:
+        """Mark a leased target done."""
+
+    @abstractmethod
+    def fail(self, target_key: str, worker: str, error: str) -> None:
+        """Release a lease after an error; the target is retried until QUEUE_MAX_ATTEMPTS claims."""
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """Number of targets per status."""
+
+    def close(self) -> None:
+        pass
+
+class MemoryWorkQueue(WorkQueue):
+    """In-process queue: a stand-in for tests, benchmarks and embedding."""
+
+    def __init__(self):
+        self.entries = {}  # target_key -> dict(app_key, info, status, worker, lease_expires, attempts, error)
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        for e in self.entries.values():
+            if e["status"] == "leased" and e["lease_expires"] < now:
+                e["status"] = "failed" if e["attempts"] >= QUEUE_MAX_ATTEMPTS else "pending"
+                e["worker"] = None
+
+    def enqueue(self, targets: list[tuple[str, dict]]) -> int:
+        with self.lock:
+            for app_key, info in targets:
+                key = target_key_for(app_key, info)
+                e = self.entries.get(key)
+                if e is None or e["status"] in ("done", "failed"):
+                    self.entries[key] = {"app_key": app_key, "info": dict(info), "status": "pending", "worker": None,
+                                         "lease_expires": 0.0, "attempts": 0, "error": None}
+            return len(targets)
+
+    def claim(self, worker: str, lease_seconds: float) -> tuple[str, str, dict] | None:
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            for key, e in self.entries.items():
+                if e["status"] == "pending":
+                    e.update(status="leased", worker=worker, lease_expires=now + lease_seconds,
+                             attempts=e["attempts"] + 1)
+                    return key, e["app_key"], dict(e["info"])
+        return None
+
+    def heartbeat(self, target_key: str, worker: str, lease_seconds: float) -> bool:
+        with self.lock:
+            e = self.entries.get(target_key)
+            if not e or e["status"] != "leased" or e["worker"] != worker: return False
+            e["lease_expires"] = time.time() + lease_seconds
+            return True
+
+    def complete(self, target_key: str, worker: str) -> None:
+        with self.lock:
+            e = self.entries.get(target_key)
+            if e and e["worker"] == worker: e.update(status="done", worker=None)
+
+    def fail(self, target_key: str, worker: str, error: str) -> None:
+        with self.lock:
+            e = self.entries.get(target_key)
+            if e and e["worker"] == worker:
+                e.update(status="failed" if e["attempts"] >= QUEUE_MAX_ATTEMPTS else "pending", worker=None, error=error)
+
+    def counts(self) -> dict[str, int]:
+        with self.lock:
+            self._expire(time.time())
+            out = {}
+            for e in self.entries.values():
+                out[e["status"]] = out.get(e["status"], 0) + 1
+            return out
+
+class SqliteWorkQueue(WorkQueue):
+    """Queue in one SQLite file (--queue sqlite:PATH); claims run in BEGIN IMMEDIATE transactions."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Autocommit mode: claim() manages its own write transaction.
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(
+                "CREATE TABLE IF NOT EXISTS queue ("
+                " target_key TEXT PRIMARY KEY, app_key TEXT NOT NULL, info TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_expires REAL NOT NULL DEFAULT 0,"
+                " attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL);"
+                "CREATE INDEX IF NOT EXISTS queue_status ON queue (status);"
+            )
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self.lock:
+            return self.conn.execute(sql, params).rowcount
+
+    def enqueue(self, targets: list[tuple[str, dict]]) -> int:
+        now = time.time()
+        rows = [(target_key_for(app_key, info), app_key, json.dumps(info), now) for app_key, info in targets]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO queue (target_key, app_key, info, updated_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(target_key) DO UPDATE SET status = 'pending', attempts = 0, error = NULL,"
+                    " info = excluded.info, updated_at = excluded.updated_at"
+                    " WHERE queue.status IN ('done', 'failed')", rows)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def claim(self, worker: str, lease_seconds: float) -> tuple[str, str, dict] | None:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self.conn.execute(
+                    "UPDATE queue SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                    " worker = NULL, updated_at = ? WHERE status = 'leased' AND lease_expires < ?",
+                    (QUEUE_MAX_ATTEMPTS, now, now))
+                row = self.conn.execute(
+                    "SELECT target_key, app_key, info FROM queue WHERE status = 'pending' ORDER BY rowid LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self.conn.execute(
+                        "UPDATE queue SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1,"
+                        " updated_at = ? WHERE target_key = ?", (worker, now + lease_seconds, now, row[0]))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return (row[0], row[1], json.loads(row[2])) if row is not None else None
+
+    def heartbeat(self, target_key: str, worker: str, lease_seconds: float) -> bool:
+        now = time.time()
+        return self._write(
+            "UPDATE queue SET lease_expires = ?, updated_at = ? WHERE target_key = ? AND worker = ? AND status = 'leased'",
+            (now + lease_seconds, now, target_key, worker)) == 1
+
+    def complete(self, target_key: str, worker: str) -> None:
+        self._write("UPDATE queue SET status = 'done', worker = NULL, updated_at = ? WHERE target_key = ? AND worker = ?",
+                    (time.time(), target_key, worker))
+
+    def fail(self, target_key: str, worker: str, error: str) -> None:
+        self._write(
+            "UPDATE queue SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL,"
+            " error = ?, updated_at = ? WHERE target_key = ? AND worker = ?",
+            (QUEUE_MAX_ATTEMPTS, error, time.time(), target_key, worker))
+
+    def counts(self) -> dict[str, int]:
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'expired' ELSE status END, COUNT(*)"
+                " FROM queue GROUP BY 1", (now,)).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+def open_queue(spec: str) -> WorkQueue:
+    scheme, _, path = spec.partition(":")
+    if scheme == "memory" and not path: return MemoryWorkQueue()
+    if scheme != "sqlite" or not path:
+        raise ValueError(f"unsupported queue '{spec}' (expected sqlite:PATH or memory:)")
+    return SqliteWorkQueue(path)
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,145 @@
+# RunWriter: saves each finished target (files, store, comments, state) inline or on a write-behind thread.
+
+import sqlite3
+import threading
+from collections.abc import Callable
+from contextlib import nullcontext
+from functools import partial
+from queue import Queue
+
+from scraper.comments import CommentHarvester
+from scraper.common import log
+from scraper.files import FileBatch
+from scraper.metrics import METRICS
+from scraper.output import assign_clusters, count_views, merge_with_existing, save_scraped_data_per_app
+from scraper.state import StateStore, source_key_for_result
+from scraper.store import SqlitePostStore
+
+
+DEFAULT_WRITE_QUEUE = 0  # finished targets buffered for the write-behind thread before fetching waits; 0 = write inline
+
+class RunWriter:
+    """Sink for scrape_reddit: saves each target as it completes, inline or on a write-behind thread."""
+
+    def __init__(self, outdir: str, state: StateStore | None = None, fmt: str = "json",
+                 export_views: bool = False, store: SqlitePostStore | None = None,
+                 comments: CommentHarvester | None = None, near_dupes=None, write_queue: int = 0,
+                 fsync_every: int = 0):
+        self.outdir = outdir
+        self.near_dupes = near_dupes
+        self.comments = comments
+        self.state = state
+        self.fmt = fmt
+        self.export_views = export_views
+        self.store = store
+        self.targets = self.posts = self.topics = self.discussions = self.failed = 0
+        self.lock = threading.Lock()
+        self.fsync_every = fsync_every
+        self.batch = FileBatch() if fsync_every else None
+        self.batch_apps = set()
+        self.after_commit = []
+        self.batch_lock = threading.Lock()
+        self.pending = Queue(maxsize=write_queue) if write_queue else None
+        self.thread = None
+        if self.pending is not None:
+            self.thread = threading.Thread(target=self._drain, name="write-behind", daemon=True)
+            self.thread.start()
+
+    def __call__(self, result: dict, on_written: Callable[[], None] | None = None,
+                 on_failed: Callable[[], None] | None = None) -> None:
+        if self.pending is None:
+            self._write(result, on_written, on_failed)
+            return
+        with METRICS.stage("write_wait"):
+            self.pending.put((result, on_written, on_failed))
+
+    def _drain(self) -> None:
+        while True:
+            item = self.pending.get()
+            if item is None: return
+            try:
+                self._write(*item)
+            except Exception as e:
+                log(f"ERROR (write {item[0].get('app_key')}): {e}")
+                if item[2] is not None: item[2]()
+
+    def _write(self, result: dict, on_written: Callable[[], None] | None,
+               on_failed: Callable[[], None] | None = None) -> None:
+        with METRICS.stage("write"), self.batch_lock if self.batch is not None else nullcontext():
+            if self.batch is not None:
+                # A --since-last merge reads the saved file, so an app already in this batch is committed first.
+                app = (result.get("category"), result.get("app_key"))
+                if app in self.batch_apps: self._commit()
+                self.batch_apps.add(app)
+            with self.batch.staging() if self.batch is not None else nullcontext():
+                if self.state is not None:
+                    result = merge_with_existing(result, self.outdir, self.fmt)
+                    if "new_posts_collected" in result:
+                        log(f"Merged {result['new_posts_collected']} fetched posts with saved output: "
+                            f"{result['total_posts_collected']} posts")
+                if self.near_dupes is not None:
+                    assign_clusters(result, self.near_dupes)
+                saved = save_scraped_data_per_app([result], self.outdir, self.fmt, self.export_views)
+            if self.store is not None:
+                try:
+                    log(f"Upserted {self.store.write(result)} posts -> store")
+                except sqlite3.Error as e:
+                    log(f"ERROR (store): {e}")
+            if not saved:
+                # Leave the posts unseen so the next --since-last run fetches them again.
+                log(f"Not recording {result.get('app_key')} as written: its output could not be saved")
+                with self.lock:
+                    self.failed += 1
+                if on_failed is not None: on_failed()
+                return
+            # Only mark posts as seen once they are on disk.
+            done = [partial(self.state.record, source_key_for_result(result), result.get("posts", []))] \
+                if self.state is not None else []
+            if on_written is not None: done.append(on_written)
+            if self.batch is None:
+                for fn in done: fn()
+            else:
+                self.after_commit.append((done, on_failed))
+                if len(self.batch_apps) >= self.fsync_every: self._commit()
+        if self.comments is not None:
+            self.comments.add_candidates(result)
+        views = count_views(result.get("posts", []))
+        with self.lock:
+            self.targets += 1
+            self.posts += len(result.get("posts", []))
+            self.topics += views
+            self.discussions += views
+
+    def _commit(self) -> None:
+        done, self.after_commit = self.after_commit, []
+        self.batch_apps.clear()
+        with METRICS.stage("fsync"):
+            try:
+                self.batch.commit()
+            except OSError as e:
+                log(f"ERROR (fsync): {e}")
+                with self.lock:
+                    self.failed += len(done)
+                for _, on_failed in done:
+                    if on_failed is not None: on_failed()
+                return
+        for fns, _ in done:
+            for fn in fns: fn()
+
+    def close(self) -> None:
+        """Write whatever is still queued and commit the last --fsync batch."""
+        if self.thread is not None:
+            self.pending.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.batch is not None:
+            with self.batch_lock:
+                self._commit()
+
+    def summarize(self) -> None:
+        if self.targets:
+            print(f"\nTotal: {self.topics} Topics, {self.discussions} Discussions")
+        elif not self.failed:
+            print("There is no data returned!")
+        if self.failed:
+            print(f"{self.failed} targets could not be saved; they will be fetched again by the next run")
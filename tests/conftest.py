@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# The scripts and the scraper package live at the repository root, next to this directory.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_reddit  # noqa: E402
+
+
+@pytest.fixture
+def fake():
+    """A default fake_reddit server on a free port."""
+    with fake_reddit.serving() as server:
+        yield server
@@ -0,0 +1,47 @@
+import pytest
+
+import fake_reddit
+from scraper.apps import build_targets
+from scraper.backfill import TimeRangeIgnored, backfill, parse_backfill_range
+from scraper.transport import transport_for_delay
+
+DAY = 86400
+# fake_reddit's history has one post per minute per source, newest at SYNTHETIC_NEWEST_UTC.
+END = int(fake_reddit.SYNTHETIC_NEWEST_UTC) - 30 * DAY
+START = END - 2 * DAY
+
+
+def test_parse_backfill_range():
+    assert parse_backfill_range("2024-01-01..2024-01-02") == (1704067200, 1704153600)
+    assert parse_backfill_range("100..200") == (100, 200)
+    for bad in ("2024-01-01", "..2024-01-01", "200..100"):
+        with pytest.raises(ValueError):
+            parse_backfill_range(bad)
+
+
+def test_collects_every_post_in_range(fake):
+    targets = build_targets(["Uber", "Rapido"], [])
+    transport = transport_for_delay(0.0, base_url=fake.base_url)
+    try:
+        # One-day windows hold 1440 posts, more than a listing returns, so each one has to be split.
+        results = backfill(targets, START, END, DAY, 0.0, concurrency=4, transport=transport)
+    finally:
+        transport.close()
+    assert sorted(r["app_key"] for r in results) == ["rapido", "uber"]
+    for result in results:
+        created = [p.get("created_utc") for p in result["posts"]]
+        assert len(created) == 2 * DAY // fake_reddit.SYNTHETIC_SPACING_SECONDS
+        assert len({p.get("id") for p in result["posts"]}) == len(created)
+        assert all(START <= c < END for c in created)
+        assert created == sorted(created, reverse=True)
+
+
+def test_fails_when_the_server_ignores_the_range(fake, monkeypatch):
+    # Without the timestamp: query the fake serves its plain newest-first listing, far newer than the range.
+    monkeypatch.setattr(fake_reddit, "window_query", lambda params: None)
+    transport = transport_for_delay(0.0, base_url=fake.base_url)
+    try:
+        with pytest.raises(TimeRangeIgnored):
+            backfill(build_targets(["Uber"], []), START, END, DAY, 0.0, transport=transport)
+    finally:
+        transport.close()
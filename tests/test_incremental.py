@@ -0,0 +1,65 @@
+import json
+import sys
+import time
+
+import pytest
+
+import fake_reddit
+import reddit_scraper
+from scraper.output import read_saved_posts
+from scraper.state import MANIFEST_NAME, TargetCheckpoint
+
+CATEGORY = "Travel & local"
+
+
+def run_cli(monkeypatch, base_url: str, outdir, *flags: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["reddit_scraper.py", "-a", "Uber", "--base-url", base_url,
+                                      "--outdir", str(outdir), "--delay", "0", *flags])
+    reddit_scraper.main()
+
+
+def saved_ids(outdir) -> list[str]:
+    return [p["id"] for p in read_saved_posts(str(outdir), CATEGORY, "uber")]
+
+
+def test_resume_after_interrupt(fake, monkeypatch, tmp_path):
+    run_cli(monkeypatch, fake.base_url, tmp_path / "clean", "--max-posts", "500")
+    expected = saved_ids(tmp_path / "clean")
+    assert len(expected) == 500
+
+    save_page = TargetCheckpoint.save_page
+    def crash_on_third_page(self, page, after):
+        if self.pages < 2: return save_page(self, page, after)
+        # The page reaches the partial file, but the run dies before the manifest records it.
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(post.as_dict()) + "\n" for post in page)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(TargetCheckpoint, "save_page", crash_on_third_page)
+    outdir = tmp_path / "resumed"
+    with pytest.raises(KeyboardInterrupt):
+        run_cli(monkeypatch, fake.base_url, outdir, "--max-posts", "500")
+    assert saved_ids(outdir) == []
+    manifest = json.loads((outdir / MANIFEST_NAME).read_text())["targets"]
+    assert [t["pages"] for t in manifest.values()] == [2]
+
+    monkeypatch.setattr(TargetCheckpoint, "save_page", save_page)
+    requests_before = fake.requests
+    run_cli(monkeypatch, fake.base_url, outdir, "--max-posts", "500", "--resume")
+    assert saved_ids(outdir) == expected
+    assert fake.requests - requests_before == 3  # only the pages after the last checkpoint
+
+
+def test_since_last_merges_new_posts(monkeypatch, tmp_path):
+    # r/uber gets 100 new posts/sec (source_rate divides --live-rate by a per-source power of two).
+    live_rate = 100.0 / fake_reddit.source_rate("uber", 1.0)
+    with fake_reddit.serving(live_rate=live_rate, listing_size=200) as server:
+        run_cli(monkeypatch, server.base_url, tmp_path, "--max-posts", "50", "--since-last")
+        first = saved_ids(tmp_path)
+        assert len(first) == 50
+        time.sleep(0.2)
+        run_cli(monkeypatch, server.base_url, tmp_path, "--max-posts", "50", "--since-last")
+    merged = saved_ids(tmp_path)
+    new = merged[:len(merged) - len(first)]
+    assert len(new) >= 10
+    assert merged[len(new):] == first  # earlier posts follow the new ones, in their saved order
+    assert len(set(merged)) == len(merged)
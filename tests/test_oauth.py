@@ -0,0 +1,56 @@
+import json
+import time
+
+import fake_reddit
+from scraper.oauth import OAUTH_TOKEN_PATH, TokenCache, load_identities
+from scraper.transport import transport_for_delay
+
+
+def oauth_transport(server, tmp_path, clients: int = 1):
+    creds = tmp_path / "oauth.json"
+    creds.write_text(json.dumps([{"client_id": f"client{i}", "client_secret": f"secret{i}"} for i in range(clients)]))
+    identities = load_identities(str(creds), server.base_url + OAUTH_TOKEN_PATH, str(tmp_path / "tokens.json"), 0.0)
+    return transport_for_delay(0.0, base_url=server.base_url, identities=identities), identities
+
+
+def test_refreshes_a_revoked_token_on_401(tmp_path):
+    with fake_reddit.serving(oauth_clients=1) as server:
+        transport, identities = oauth_transport(server, tmp_path)
+        try:
+            assert transport.get(f"{server.base_url}/r/oauth/.json").status_code == 200
+            first = identities.identities[0].token
+            server.tokens.clear()  # revoke every token before it expires
+            assert transport.get(f"{server.base_url}/r/oauth/.json").status_code == 200
+        finally:
+            transport.close()
+        identity = identities.identities[0]
+        assert identity.refreshes == 2
+        assert identity.token != first
+        assert server.tokens_issued == 2
+
+
+def test_renews_tokens_before_they_expire(tmp_path):
+    with fake_reddit.serving(oauth_clients=1, token_ttl=0.4) as server:
+        transport, identities = oauth_transport(server, tmp_path)
+        try:
+            for _ in range(3):
+                assert transport.get(f"{server.base_url}/r/oauth/.json").status_code == 200
+                time.sleep(0.25)
+        finally:
+            transport.close()
+        # Each token is renewed halfway through its short lifetime, so no request is rejected.
+        assert identities.identities[0].refreshes >= 2
+
+
+def test_reuses_cached_tokens_across_runs(tmp_path):
+    with fake_reddit.serving(oauth_clients=2) as server:
+        for _ in range(2):
+            transport, identities = oauth_transport(server, tmp_path, clients=2)
+            try:
+                for _ in range(4):
+                    assert transport.get(f"{server.base_url}/r/oauth/.json").status_code == 200
+            finally:
+                transport.close()
+        assert server.tokens_issued == 2
+        assert set(server.client_requests) == {"client0", "client1"}
+    assert set(TokenCache(str(tmp_path / "tokens.json")).tokens) == {"client0", "client1"}
@@ -0,0 +1,62 @@
+import time
+
+import fake_reddit
+from scraper.ratelimit import AdaptiveLimiter, TokenBucket, parse_retry_after
+from scraper.transport import get_with_retries, transport_for_delay
+
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(rate=50.0)
+    t0 = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # The first token is banked; the other ten wait 1/50 s each.
+    assert time.monotonic() - t0 >= 0.19
+
+
+def test_token_bucket_pause_blocks_every_caller():
+    bucket = TokenBucket(rate=0.0)
+    bucket.pause(0.2)
+    t0 = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - t0 >= 0.19
+
+
+def test_adaptive_limiter_follows_headers():
+    limiter = AdaptiveLimiter(rate=0.0)
+    limiter.observe({"X-Ratelimit-Remaining": "90", "X-Ratelimit-Used": "10", "X-Ratelimit-Reset": "60"})
+    assert limiter.interval == 0.0  # plenty left: full speed
+    limiter.observe({"X-Ratelimit-Remaining": "10", "X-Ratelimit-Used": "90", "X-Ratelimit-Reset": "60"})
+    assert 0 < limiter.interval <= 6.0
+    limiter.observe({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Used": "100", "X-Ratelimit-Reset": "5"})
+    assert limiter.paused_until > time.monotonic() + 4
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_fixed_delay_paces_requests_to_the_server(fake):
+    transport = transport_for_delay(0.05, base_url=fake.base_url)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(6):
+            transport.get(f"{fake.base_url}/r/pacing/.json", {"limit": 1})
+        assert time.perf_counter() - t0 >= 0.24
+    finally:
+        transport.close()
+
+
+def test_adaptive_limiter_stays_within_the_server_budget():
+    with fake_reddit.serving(ratelimit=8, ratelimit_window=1.0) as server:
+        transport = transport_for_delay(0.0, adaptive=True, base_url=server.base_url)
+        try:
+            for _ in range(12):
+                get_with_retries(transport, f"{server.base_url}/r/budget/.json", {"limit": 1}, "r/budget", 0.0)
+        finally:
+            transport.close()
+        assert server.requests == 12
+        assert server.throttled == 0
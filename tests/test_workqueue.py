@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from scraper.workqueue import QUEUE_MAX_ATTEMPTS, MemoryWorkQueue, SqliteWorkQueue, open_queue
+
+TARGETS = [("uber", {"sub": "uber", "category": "Travel & local"}),
+           ("rapido", {"search": "Rapido app", "category": "Travel & local"})]
+LEASE = 0.1
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    q = MemoryWorkQueue() if request.param == "memory" else SqliteWorkQueue(str(tmp_path / "queue.sqlite3"))
+    yield q
+    q.close()
+
+
+def test_claims_each_target_once(queue):
+    queue.enqueue(TARGETS)
+    first, second = queue.claim("w1", 60), queue.claim("w2", 60)
+    assert {first[1], second[1]} == {"uber", "rapido"}
+    assert queue.claim("w3", 60) is None
+    queue.complete(first[0], "w1")
+    queue.complete(second[0], "w2")
+    assert queue.counts() == {"done": 2}
+
+
+def test_expired_lease_goes_back_to_pending(queue):
+    queue.enqueue(TARGETS[:1])
+    key, _, info = queue.claim("crashed", LEASE)
+    assert info == TARGETS[0][1]
+    time.sleep(LEASE * 2)
+    assert queue.claim("rescuer", 60)[0] == key
+    # The worker that lost the lease can neither extend nor finish it.
+    assert not queue.heartbeat(key, "crashed", 60)
+    queue.complete(key, "crashed")
+    assert queue.counts() == {"leased": 1}
+    queue.complete(key, "rescuer")
+    assert queue.counts() == {"done": 1}
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    queue.enqueue(TARGETS[:1])
+    key, _, _ = queue.claim("w1", LEASE)
+    for _ in range(4):
+        time.sleep(LEASE / 2)
+        assert queue.heartbeat(key, "w1", LEASE)
+    assert queue.claim("w2", 60) is None
+
+
+def test_gives_up_after_max_attempts(queue):
+    queue.enqueue(TARGETS[:1])
+    for attempt in range(QUEUE_MAX_ATTEMPTS):
+        key, _, _ = queue.claim(f"w{attempt}", LEASE)
+        time.sleep(LEASE * 2)
+    assert queue.claim("last", 60) is None
+    assert queue.counts() == {"failed": 1}
+    # Enqueueing again resets a failed target.
+    queue.enqueue(TARGETS[:1])
+    assert queue.claim("again", 60)[0] == key
+
+
+def test_open_queue_specs(tmp_path):
+    assert isinstance(open_queue("memory:"), MemoryWorkQueue)
+    q = open_queue(f"sqlite:{tmp_path / 'q.sqlite3'}")
+    assert isinstance(q, SqliteWorkQueue)
+    q.close()
+    with pytest.raises(ValueError):
+        open_queue("redis://localhost")